@@ -0,0 +1,109 @@
+#
+#
+# Micro-benchmark of the per-frame feature path.
+#   old: create_landmark_array -> list -> deque -> torch.tensor(window)
+#   new: write_landmark_array into LandmarkWindow -> zero-copy tensor view
+# Uses synthetic MediaPipe-like results, so no camera or model is needed.
+#
+# Usage:  python benchmarks/bench_landmark_features.py --frames 20000
+#
+#
+
+import os
+import sys
+
+# Add project root to the system path so you can import hand_utils.* and inference.*
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import argparse
+import time
+from collections import deque
+from types import SimpleNamespace
+import numpy as np
+import torch
+from hand_utils.hand_tracker import HandTracker
+from inference.landmark_window import LandmarkWindow
+from hand_utils.features import SEQUENCE_LENGTH
+
+
+#---------------------------------------------#
+# FAKE MEDIAPIPE RESULTS                      #
+#                                             #
+#---------------------------------------------#
+def make_results(rng, num_hands=2):
+    hands = []
+    handedness = []
+    for label in ["Right", "Left"][:num_hands]:
+        points = rng.random((21, 3))
+        hands.append(SimpleNamespace(landmark=[SimpleNamespace(x=x, y=y, z=z) for x, y, z in points]))
+        handedness.append(SimpleNamespace(classification=[SimpleNamespace(label=label, score=rng.random())]))
+    return SimpleNamespace(multi_hand_landmarks=hands or None, multi_handedness=handedness or None)
+
+
+#---------------------------------------------#
+# THE TWO PATHS                               #
+#                                             #
+#---------------------------------------------#
+def run_old(hand_tracker, results_list, seq_length):
+    window = deque(maxlen=seq_length)
+    start = time.perf_counter()
+    for results in results_list:
+        window.append(hand_tracker.create_landmark_array(results))
+        if len(window) == seq_length:
+            input_tensor = torch.tensor(window, dtype=torch.float32).unsqueeze(0)
+    return time.perf_counter() - start
+
+
+def run_new(hand_tracker, results_list, seq_length):
+    window = LandmarkWindow(seq_length)
+    start = time.perf_counter()
+    for results in results_list:
+        hand_tracker.write_landmark_array(results, window.next_row())
+        window.commit()
+        if window.is_full():
+            input_tensor = window.tensor().unsqueeze(0)
+    return time.perf_counter() - start
+
+
+#---------------------------------------------#
+# MAIN                                        #
+#                                             #
+#---------------------------------------------#
+def main():
+    parser = argparse.ArgumentParser(description="Per-frame cost of old vs new landmark feature path")
+    parser.add_argument("--frames", type=int, default=20000)
+    parser.add_argument("--seq-length", type=int, default=SEQUENCE_LENGTH)
+    parser.add_argument("--hands", type=int, default=2, choices=[0, 1, 2])
+    args = parser.parse_args()
+
+    # Feature methods only, skip starting MediaPipe
+    hand_tracker = HandTracker.__new__(HandTracker)
+
+    rng = np.random.default_rng(0)
+    results_list = [make_results(rng, args.hands) for _ in range(256)]
+    results_list = [results_list[i % 256] for i in range(args.frames)]
+
+    # Both paths must give the same features
+    row = np.empty(135, dtype=np.float32)
+    for results in results_list[:256]:
+        old = np.array(hand_tracker.create_landmark_array(results, timestamp=1.0), dtype=np.float32)
+        new = hand_tracker.write_landmark_array(results, row, timestamp=1.0)
+        if not np.allclose(old, new, atol=1e-6):
+            raise AssertionError("write_landmark_array does not match create_landmark_array")
+
+    run_old(hand_tracker, results_list[:1000], args.seq_length)  # warm-up
+    run_new(hand_tracker, results_list[:1000], args.seq_length)
+    old_time = run_old(hand_tracker, results_list, args.seq_length)
+    new_time = run_new(hand_tracker, results_list, args.seq_length)
+
+    print(f"{args.frames} frames, {args.hands} hands, window of {args.seq_length}")
+    print(f"old (list + deque + torch.tensor): {1e6 * old_time / args.frames:8.2f} us/frame")
+    print(f"new (LandmarkWindow + view)      : {1e6 * new_time / args.frames:8.2f} us/frame")
+    print(f"speed-up: {old_time / new_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+#
+#
+# End-to-end benchmark of the detection pipeline on recorded data.
+# Replays recorded videos (decode -> MediaPipe -> features -> SignLSTM) or
+# landmark_data .npy sequences (features -> SignLSTM, MediaPipe bypassed).
+# Runs headless: no camera, no display.
+#
+# Reports per-stage latency percentiles, frames per second, peak RSS and
+# CPU utilisation, and writes them as JSON so runs can be compared between
+# commits.
+#
+# Usage:  python benchmarks/bench_pipeline.py --landmarks landmark_data/ -o bench.json
+#         python benchmarks/bench_pipeline.py --videos recorded_videos/ --mode streaming --stride 5
+#
+#
+
+import os
+import sys
+
+# Add project root to the system path so you can import hand_utils.*, inference.* and training.*
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import argparse
+import json
+import platform
+import resource
+import subprocess
+import time
+import numpy as np
+import torch
+from inference.landmark_window import LandmarkWindow
+from hand_utils.features import MODEL_RATE, SEQUENCE_LENGTH
+from hand_utils.resampling import LandmarkResampler
+from inference.streaming import StreamingSignLSTM
+from inference.batch_inference import find_inputs, VIDEO_EXTENSIONS
+from training.model import load_sign_lstm
+
+
+#---------------------------------------------#
+# PER-STAGE TIMER                             #
+#                                             #
+#---------------------------------------------#
+class StageTimer:
+    def __init__(self):
+        self.samples = {}
+
+    def add(self, stage, seconds):
+        self.samples.setdefault(stage, []).append(seconds)
+
+    def summary(self):
+        summary = {}
+        for stage, samples in self.samples.items():
+            ms = 1000 * np.array(samples)
+            summary[stage] = {
+                "count": len(ms),
+                "mean_ms": round(float(ms.mean()), 4),
+                "p50_ms": round(float(np.percentile(ms, 50)), 4),
+                "p95_ms": round(float(np.percentile(ms, 95)), 4),
+                "p99_ms": round(float(np.percentile(ms, 99)), 4),
+                "max_ms": round(float(ms.max()), 4),
+            }
+        return summary
+
+
+#---------------------------------------------#
+# INFERENCE STAGE                             #
+# same resampling / window / streaming logic  #
+# as detection                                #
+#---------------------------------------------#
+class Predictor:
+    def __init__(self, model, seq_length, mode, stride, device, rate=MODEL_RATE):
+        self.model = model
+        self.mode = mode
+        self.device = device
+        self.resampler = LandmarkResampler(rate)
+        self.window = LandmarkWindow(seq_length)
+        self.streamer = StreamingSignLSTM(model, seq_length, stride, device, rate) if mode == "streaming" else None
+
+    def reset(self):
+        self.resampler.reset()
+        self.window.clear()
+        if self.streamer is not None:
+            self.streamer.reset()
+
+    # One captured frame: resampled to the model rate (zero, one or several
+    # rows), then every row goes through the model like in detection.py.
+    # Returns the last output, or None.
+    @torch.no_grad()
+    def step(self, feature_vector, timestamp):
+        rows = self.resampler.push(feature_vector, timestamp)
+        output = None
+        for row in rows:
+            if self.streamer is not None:
+                row_output = self.streamer.step(row)
+                if row_output is not None:
+                    output = row_output
+            else:
+                self.window.append(row)
+
+        if self.streamer is None and len(rows) and self.window.is_full():
+            output = self.model(self.window.model_input().unsqueeze(0).to(self.device))
+        return output
+
+
+#---------------------------------------------#
+# REPLAY SOURCES                              #
+#                                             #
+#---------------------------------------------#
+# Timestamps stay float64 (epoch times) and are made continuous across files,
+# as LandmarkReplaySource does for detection.py
+def replay_landmarks(paths, predictor, timer, max_frames, reset_per_clip=False, rate=MODEL_RATE):
+    frames = 0
+    last_timestamp = None
+    for path in paths:
+        sequence = np.load(path).astype(np.float64)
+        if not len(sequence):
+            continue
+        if reset_per_clip:
+            predictor.reset()
+        start_time = 0.0 if last_timestamp is None else last_timestamp + 1 / rate
+        timestamps = sequence[:, -1] - sequence[0, -1] + start_time
+        last_timestamp = timestamps[-1]
+        for row, timestamp in zip(sequence, timestamps):
+            start = time.perf_counter()
+            output = predictor.step(row, timestamp)
+            if output is not None:
+                torch.softmax(output, dim=1).max(dim=1)
+            timer.add("inference", time.perf_counter() - start)
+
+            frames += 1
+            if frames >= max_frames:
+                return frames
+    return frames
+
+
+def replay_videos(paths, predictor, timer, max_frames, reset_per_clip=False):
+    from hand_utils.hand_tracker import HandTracker
+    from hand_utils.frame_sources import VideoFileSource
+
+    hand_tracker = HandTracker()
+    feature_vector = np.empty(135, dtype=np.float32)
+
+    frames = 0
+    for path in paths:
+        source = VideoFileSource(path)
+        if reset_per_clip:
+            predictor.reset()
+        while True:
+            start = time.perf_counter()
+            frame = source.read()
+            if frame is None:
+                break
+            t_decode = time.perf_counter()
+            _, results = hand_tracker.process_frame(frame.image)
+            t_landmarks = time.perf_counter()
+            hand_tracker.write_landmark_array(results, feature_vector, timestamp=frame.timestamp)
+            t_features = time.perf_counter()
+            output = predictor.step(feature_vector, frame.timestamp)
+            if output is not None:
+                torch.softmax(output, dim=1).max(dim=1)
+            t_inference = time.perf_counter()
+
+            timer.add("decode", t_decode - start)
+            timer.add("landmarks", t_landmarks - t_decode)
+            timer.add("features", t_features - t_landmarks)
+            timer.add("inference", t_inference - t_features)
+            timer.add("total", t_inference - start)
+
+            frames += 1
+            if frames >= max_frames:
+                source.release()
+                return frames
+        source.release()
+    return frames
+
+
+#---------------------------------------------#
+# MACHINE / BUILD INFO                        #
+#                                             #
+#---------------------------------------------#
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       cwd=project_root, stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+#---------------------------------------------#
+# MAIN                                        #
+#                                             #
+#---------------------------------------------#
+def main():
+    parser = argparse.ArgumentParser(description="Headless end-to-end benchmark on recorded data")
+    parser.add_argument("--landmarks", help="directory of .npy landmark sequences (MediaPipe bypassed)")
+    parser.add_argument("--videos", help="directory of recorded videos")
+    parser.add_argument("--model", default="sign_lstm.pth")
+    parser.add_argument("--label-map", default="label_map.json")
+    parser.add_argument("--mode", choices=["window", "streaming"], default="window")
+    parser.add_argument("--stride", type=int, default=1)
+    parser.add_argument("--seq-length", type=int, default=SEQUENCE_LENGTH)
+    parser.add_argument("--rate", type=float, default=MODEL_RATE, help="model rate frames are resampled to")
+    parser.add_argument("--max-frames", type=int, default=10000)
+    parser.add_argument("--reset-per-clip", action="store_true",
+                        help="start a new window for every file (default: one continuous stream, like the live loop)")
+    parser.add_argument("--threads", type=int, default=None, help="torch.set_num_threads")
+    parser.add_argument("-o", "--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    if not args.landmarks and not args.videos:
+        parser.error("give --landmarks and/or --videos")
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    with open(args.label_map, "r") as f:
+        num_classes = len(json.load(f))
+    device = torch.device("cpu")
+    model = load_sign_lstm(args.model, num_classes, device)
+    predictor = Predictor(model, args.seq_length, args.mode, args.stride, device, args.rate)
+
+    timer = StageTimer()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+
+    frames = 0
+    if args.landmarks:
+        paths = [p for p in find_inputs(args.landmarks) if p.endswith(".npy")]
+        frames += replay_landmarks(paths, predictor, timer, args.max_frames, args.reset_per_clip, args.rate)
+    if args.videos and frames < args.max_frames:
+        paths = [p for p in find_inputs(args.videos) if p.lower().endswith(VIDEO_EXTENSIONS)]
+        frames += replay_videos(paths, predictor, timer, args.max_frames - frames, args.reset_per_clip)
+
+    wall_time = time.perf_counter() - wall_start
+    cpu_time = time.process_time() - cpu_start
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "torch": torch.__version__,
+            "torch_threads": torch.get_num_threads(),
+        },
+        "config": {
+            "mode": args.mode,
+            "stride": args.stride,
+            "seq_length": args.seq_length,
+            "rate": args.rate,
+            "reset_per_clip": args.reset_per_clip,
+            "landmarks": args.landmarks,
+            "videos": args.videos,
+        },
+        "frames": frames,
+        "wall_time_s": round(wall_time, 3),
+        "fps": round(frames / wall_time, 1) if wall_time > 0 else None,
+        "cpu_percent": round(100 * cpu_time / wall_time, 1) if wall_time > 0 else None,
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": timer.summary(),
+    }
+
+    print(f"{frames} frames in {report['wall_time_s']}s -> {report['fps']} FPS, "
+          f"CPU {report['cpu_percent']}%, peak RSS {report['peak_rss_mb']} MB")
+    for stage, s in report["stages"].items():
+        print(f"  {stage:10s} p50 {s['p50_ms']:8.3f} ms   p95 {s['p95_ms']:8.3f} ms   p99 {s['p99_ms']:8.3f} ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"[INFO] Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,143 +12,377 @@ if project_root not in sys.path:
     sys.path.append(project_root)
 
 
+import argparse
 import cv2
 import torch
 import numpy as np
-from collections import deque
 from hand_utils.hand_tracker import HandTracker
+from hand_utils.adaptive_tracker import AdaptiveHandTracker
+from hand_utils.frame_sources import open_source
+from hand_utils.resampling import LandmarkResampler
+from hand_utils.features import MODEL_RATE, SEQUENCE_LENGTH
+from hand_utils.metrics import METRICS, MetricsServer, MetricsDumper
+from training.model import load_sign_lstm
+from inference.backends import BACKENDS, DEFAULT_PATHS, load_backend, quantize_sign_lstm
+from inference.streaming import StreamingSignLSTM
+from inference.pipeline import DetectionPipeline
+from inference.landmark_window import LandmarkWindow
+from inference.prediction_log import PredictionLogWriter
+from inference.event_decoder import SignEventDecoder
 import json
+import signal
 import time
-import torch.nn as nn
 
 #---------------------------------------------#
 # CONFIGURATION                               #
 #---------------------------------------------#
-MODEL_PATH = "sign_lstm.pth"
-SEQ_LENGTH = 30
+MODEL_PATH = "sign_lstm.pth"  # fp32 weights, exported backends are made from these
+SEQ_LENGTH = SEQUENCE_LENGTH  # frames per window, the length the model was trained on
+# MODEL_RATE (hand_utils/features.py): frames are resampled to the model's training rate
 CONF_THRESHOLD = 0.8
-TARGET_FPS = 30
-FRAME_DURATION = 1 / TARGET_FPS
+
+# 'window' re-runs the full SEQ_LENGTH window through the LSTM every frame,
+# 'streaming' carries the LSTM state forward one frame at a time and gives a
+# prediction every STRIDE frames (STRIDE = SEQ_LENGTH means periodic reset)
+parser = argparse.ArgumentParser(description="Real-time sign detection")
+parser.add_argument("--source", default="0",
+                    help="camera index, 'picamera', 'synthetic', a video file, an image folder or recorded .npy landmarks")
+parser.add_argument("--realtime", action="store_true",
+                    help="play recorded sources at their original rate instead of full speed")
+parser.add_argument("--prefetch", type=int, default=0,
+                    help="frames to read ahead on a background thread (recorded sources)")
+parser.add_argument("--backend", choices=BACKENDS, default="eager",
+                    help="model runtime, export the others with 'python inference/backends.py export'")
+parser.add_argument("--model", default=None,
+                    help="model file (default: MODEL_PATH, or the exported file of the backend)")
+parser.add_argument("--seq-length", type=int, default=SEQ_LENGTH,
+                    help="frames per window, must match the model's training (see training/sweep.py)")
+parser.add_argument("--mode", choices=["window", "streaming"], default="window")
+parser.add_argument("--stride", type=int, default=1,
+                    help="frames between predictions in streaming mode")
+parser.add_argument("--smoothing", choices=["ema", "vote", "none"], default="ema",
+                    help="smoothing of predictions before they become sign events")
+parser.add_argument("--alpha", type=float, default=0.5, help="EMA weight of the newest prediction")
+parser.add_argument("--vote-k", type=int, default=5, help="predictions in the majority vote")
+parser.add_argument("--off-threshold", type=float, default=0.6,
+                    help="an event ends when its smoothed confidence drops below this (starts at CONF_THRESHOLD)")
+parser.add_argument("--min-frames", type=int, default=2,
+                    help="events shorter than this many predictions are not logged")
+parser.add_argument("--adaptive", action="store_true",
+                    help="skip MediaPipe on static empty scenes, downscale and lower model complexity to fit the frame budget")
+parser.add_argument("--roi", action="store_true",
+                    help="run MediaPipe only on a box around the hands found in the previous frame")
+parser.add_argument("--display", choices=["window", "mjpeg", "none"], default="window",
+                    help="'none' runs headless (as a service), 'mjpeg' streams annotated frames over HTTP")
+parser.add_argument("--preview-fps", type=float, default=15.0,
+                    help="max frames per second drawn for the window / MJPEG preview (0 = every frame in a window)")
+parser.add_argument("--mjpeg-port", type=int, default=8080, help="port of the MJPEG preview")
+parser.add_argument("--queue-size", type=int, default=2,
+                    help="max items waiting between pipeline stages (oldest dropped)")
+parser.add_argument("--log-max-bytes", type=int, default=10 * 1024 * 1024,
+                    help="rotate the prediction log when it grows past this size")
+parser.add_argument("--log-rotate-interval", type=float, default=None,
+                    help="rotate the prediction log every N seconds")
+parser.add_argument("--stats-interval", type=float, default=0,
+                    help="print pipeline queue depths / drops every N seconds (0 = only on exit)")
+parser.add_argument("--metrics", action="store_true",
+                    help="time every stage from the start (toggle at runtime with 'm' or the /enable endpoint)")
+parser.add_argument("--metrics-port", type=int, default=None,
+                    help="serve Prometheus-style metrics on http://127.0.0.1:PORT/metrics")
+parser.add_argument("--metrics-file", default=None, help="also write the metrics to this file periodically")
+parser.add_argument("--metrics-interval", type=float, default=5.0, help="seconds between metrics file writes")
+args = parser.parse_args()
 
 with open("label_map.json", "r") as f:
     label_map = json.load(f)
 LABEL_MAP = {int(v): k for k, v in label_map.items()}
 
-#---------------------------------------------#
-# DEFINE SignLSTM MODEL                       #
-#---------------------------------------------#
-class SignLSTM(nn.Module):
-    def __init__(self, input_size=135, hidden_size=64, num_layers=2, num_classes=3):
-        super(SignLSTM, self).__init__()
-        self.lstm = nn.LSTM(input_size, hidden_size, num_layers, batch_first=True)
-        self.fc = nn.Linear(hidden_size, num_classes)
-
-    def forward(self, x):
-        _, (hn, _) = self.lstm(x)
-        out = self.fc(hn[-1])
-        return out
-
 #---------------------------------------------#
 # INITIALIZE MODEL                            #
 #---------------------------------------------#
 device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-model = SignLSTM(input_size=135, hidden_size=64, num_layers=2, num_classes=len(LABEL_MAP))
-model.load_state_dict(torch.load(MODEL_PATH, map_location=device))
-model.to(device)
-model.eval()
+if args.backend != "eager":
+    device = torch.device("cpu")  # exported backends are CPU-only
+
+# Streaming needs the LSTM itself: fp32 weights, int8-quantized in memory if asked
+if args.mode == "streaming":
+    if args.backend not in ("eager", "int8"):
+        parser.error("--mode streaming supports --backend eager or int8")
+    model = load_sign_lstm(args.model or MODEL_PATH, len(LABEL_MAP), device)
+    if args.backend == "int8":
+        model = quantize_sign_lstm(model)
+elif args.backend == "eager":
+    model = load_sign_lstm(args.model or MODEL_PATH, len(LABEL_MAP), device)
+else:
+    model = load_backend(args.backend, args.model or DEFAULT_PATHS[args.backend])
+
+decoder = SignEventDecoder(smoothing=args.smoothing, alpha=args.alpha, vote_k=args.vote_k,
+                           on_threshold=CONF_THRESHOLD, off_threshold=args.off_threshold,
+                           min_frames=args.min_frames)
+
+if args.mode == "streaming":
+    streamer = StreamingSignLSTM(model, seq_length=args.seq_length, stride=args.stride, device=device, rate=MODEL_RATE)
 
 #---------------------------------------------#
 # INITIALIZE COMPONENTS                       #
 #---------------------------------------------#
-window = deque(maxlen=SEQ_LENGTH)
-hand_tracker = HandTracker()
-cap = cv2.VideoCapture(0)
-
-# Prepare JSON log
-log_file = "prediction_log.json"
-if os.path.exists(log_file):
-    with open(log_file, "r") as f:
-        prediction_log = json.load(f)
+window = LandmarkWindow(args.seq_length)
+resampler = LandmarkResampler(MODEL_RATE)
+if args.adaptive:
+    hand_tracker = AdaptiveHandTracker(roi_tracking=args.roi)
 else:
-    prediction_log = []
+    hand_tracker = HandTracker(roi_tracking=args.roi)
+rows_without_hands = 0  # resampled rows since a hand was last seen
+# Camera frames stay unflipped, HandTracker then has nothing to flip back
+source = open_source(args.source, realtime=args.realtime, prefetch=args.prefetch, mirror=False)
 
-print("[INFO] Starting real-time sign detection...")
-start_time = time.time()
-prev_time = time.time()
+# Append-only JSON Lines log, written on a background thread
+log_file = "prediction_log.jsonl"
+prediction_log = PredictionLogWriter(log_file, max_bytes=args.log_max_bytes,
+                                     rotate_interval=args.log_rotate_interval)
+
+label = "Detecting..."
+stream_start = None  # timestamp of the first frame, event times in the log are relative to it
 
 #---------------------------------------------#
-# MAIN LOOP                                   #
+# PIPELINE STAGES                             #
+# each one runs on its own thread             #
 #---------------------------------------------#
-while True:
-    now = time.time()
-    ret, frame = cap.read()
-    if not ret:
-        print("[ERROR] Frame capture failed.")
-        break
+def capture_frame():
+    start = METRICS.clock()
+    frame = source.read()
+    METRICS.observe("capture", start)
+    if frame is None:
+        print("[INFO] End of frame source.")
+    return frame
 
-    frame = cv2.flip(frame, 1)
-    processed_frame, results = hand_tracker.process_frame(frame)
-    hand_tracker.draw_landmarks(processed_frame, results)
 
-    feature_vector = hand_tracker.create_landmark_array(results)
-    
-    if np.count_nonzero(feature_vector) > 0:
-        window.append(feature_vector)
+def extract_landmarks(frame):
+    # Recorded landmarks skip MediaPipe, draw on a blank canvas
+    if frame.features is not None:
+        canvas = np.zeros((480, 640, 3), dtype=np.uint8)
+        return canvas, None, frame.features, frame.timestamp
+
+    processed_frame, results = hand_tracker.process_frame(frame.image, mirrored=source.mirrored)
+    feature_vector = hand_tracker.write_landmark_array(results, np.empty(135, dtype=np.float32),
+                                                       timestamp=frame.timestamp)
+    return processed_frame, results, feature_vector, frame.timestamp
+
+
+def run_inference(item):
+    global label, rows_without_hands, stream_start
+    processed_frame, results, feature_vector, timestamp = item
+    if stream_start is None:
+        stream_start = timestamp
+
+    # Zero, one or several MODEL_RATE rows per captured frame, depending on the camera rate
+    outputs = []
+    start = METRICS.clock()
+    rows = resampler.push(feature_vector, timestamp)
+    METRICS.observe("resample", start)
+    for row in rows:
+        has_hands = row[63] > 0 or row[130] > 0  # Right / Left handedness confidence
+        rows_without_hands = 0 if has_hands else rows_without_hands + 1
+        if args.mode == "streaming":
+            # Adaptive: no hand in the last seq_length rows, no LSTM step. The
+            # slots restart from a zero state when hands come back.
+            if args.adaptive and rows_without_hands >= args.seq_length:
+                if rows_without_hands == args.seq_length:
+                    streamer.reset()
+                continue
+            start = METRICS.clock()
+            output = streamer.step(row)
+            METRICS.observe("forward", start)
+            if output is not None:
+                outputs.append((output, float(row[-1])))
+        else:
+            window.append(row)
 
-    label = "Detecting..."
-    if len(window) == SEQ_LENGTH:
+    # Adaptive: a window without any hand in it is not worth a forward pass
+    idle = args.adaptive and rows_without_hands >= args.seq_length
+    if args.mode == "window" and len(rows) and window.is_full() and not idle:
         with torch.no_grad():
-            input_tensor = torch.tensor(window, dtype=torch.float32).unsqueeze(0).to(device)
-            output = model(input_tensor)
-            probs = torch.softmax(output, dim=1)
-            confidence, pred_idx = torch.max(probs, dim=1)
-            confidence = confidence.item()
-
-            if confidence > CONF_THRESHOLD:
-                label = LABEL_MAP[pred_idx.item()]
-                log_entry = {
-                    "timestamp": round(time.time() - start_time, 2),
-                    "label": label,
-                    "confidence": round(confidence, 3)
-                }
-                prediction_log.append(log_entry)
-                print(f"[PREDICTED] {label} ({confidence:.2f})")
-            else:
-                label = "No sign detected"
-
-    # FPS calculation
-    now = time.time()
-    fps = 1 / (now - prev_time + 1e-6)  # avoid divide-by-zero
-    prev_time = now  # update for next frame
-
-    # Optional: smooth or clamp FPS for visual clarity
-    fps = min(fps, 60)  # Cap displayed FPS to 60
-    fps_text = f"FPS: {int(fps)}"
+            start = METRICS.clock()
+            input_tensor = window.model_input().unsqueeze(0).to(device)
+            METRICS.observe("tensor", start)
+            start = METRICS.clock()
+            # Stamped with the grid time of the window's last row
+            outputs.append((model(input_tensor), float(rows[-1][-1])))
+            METRICS.observe("forward", start)
+
+    # Events are timed on the frames, not on when they were processed, so
+    # recorded sources played at full speed get the same events as in real time
+    for output, output_time in outputs:
+        probs = torch.softmax(output, dim=1)[0].cpu().numpy()
+        pred_idx, confidence, event = decoder.update(probs, output_time)
+
+        if event is not None:
+            log_event(event)
+
+        if pred_idx is not None:
+            label = LABEL_MAP[pred_idx]
+        else:
+            label = "No sign detected"
+            METRICS.count("low_confidence_windows")
+        METRICS.count("predictions")
+
+    return processed_frame, results, label
+
+
+# One log record per sign event, not per frame
+def log_event(event):
+    event_label = LABEL_MAP[event["label"]]
+    log_entry = {
+        "timestamp": round(event["start"] - stream_start, 2),  # seconds since the first frame
+        "end": round(event["end"] - stream_start, 2),
+        "time": round(event["start"], 3),
+        "label": event_label,
+        "confidence": round(event["peak_confidence"], 3),
+        "frames": event["frames"]
+    }
+    prediction_log.write(log_entry)
+    print(f"[PREDICTED] {event_label} ({event['peak_confidence']:.2f}, "
+          f"{event['end'] - event['start']:.2f}s)")
+
+
+pipeline = DetectionPipeline([
+    ("capture", capture_frame),
+    ("landmarks", extract_landmarks),
+    ("inference", run_inference),
+], queue_size=args.queue_size)
+
+#---------------------------------------------#
+# METRICS                                     #
+# off unless --metrics, toggled with 'm'      #
+#---------------------------------------------#
+# Queue depths and drops are read from the pipeline when metrics are exported
+def collect_pipeline_stats(metrics):
+    for name, s in pipeline.stats().items():
+        metrics.set_gauge(f"{name}_queue_depth", s["queue_depth"])
+        metrics.set_gauge(f"{name}_dropped", s["dropped"])
+
+
+if args.metrics:
+    METRICS.enable()
+METRICS.add_collector(collect_pipeline_stats)
+metrics_server = MetricsServer(port=args.metrics_port).start() if args.metrics_port else None
+metrics_dumper = MetricsDumper(args.metrics_file, interval=args.metrics_interval) if args.metrics_file else None
+if metrics_dumper is not None:
+    metrics_dumper.start()
+
+print(f"[INFO] Starting real-time sign detection ({args.mode} mode)...")
+prev_time = time.time()
+last_stats_time = time.time()
+pipeline.start()
+
+#---------------------------------------------#
+# RENDERING                                   #
+# only for the frames that are actually shown #
+#---------------------------------------------#
+def render_frame(item, fps):
+    processed_frame, results, frame_label = item
+    start = METRICS.clock()
+    hand_tracker.draw_landmarks(processed_frame, results)
 
     # Label text
-    cv2.putText(processed_frame, label, (10, 50),
+    cv2.putText(processed_frame, frame_label, (10, 50),
                 cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 255, 0), 3, cv2.LINE_AA)
 
     # FPS text (lower on screen)
-    cv2.putText(processed_frame, fps_text, (10, 90),
+    cv2.putText(processed_frame, f"FPS: {int(min(fps, 60))}", (10, 90),
                 cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 0), 2, cv2.LINE_AA)
+    METRICS.observe("draw", start)
+    return processed_frame
 
 
-    cv2.imshow("Real-Time Sign Detection", processed_frame)
+preview = None
+if args.display == "mjpeg":
+    from inference.preview import MjpegPreview
+    preview = MjpegPreview(lambda entry: render_frame(*entry), port=args.mjpeg_port,
+                           fps=args.preview_fps).start()
+    print(f"[INFO] Preview on http://127.0.0.1:{args.mjpeg_port}/")
 
-    if cv2.waitKey(1) & 0xFF == ord('q'):
-        break
+# A service is stopped with SIGTERM, handled like Ctrl+C
+def request_stop(signum, frame):
+    raise KeyboardInterrupt
 
-    time_elapsed = time.time() - now
-    if time_elapsed < FRAME_DURATION:
-        time.sleep(FRAME_DURATION - time_elapsed)
+signal.signal(signal.SIGTERM, request_stop)
+
+#---------------------------------------------#
+# MAIN LOOP                                   #
+# results are consumed here as fast as they   #
+# come, whether or not anything is shown      #
+#---------------------------------------------#
+fps = 0.0
+preview_period = 1.0 / args.preview_fps if args.preview_fps > 0 else 0.0
+last_render_time = 0.0
+try:
+    while True:
+        item = pipeline.get(timeout=0.1)
+        if item is None:
+            if pipeline.is_finished():
+                break
+            continue
+        METRICS.count("frames_out")
+
+        # FPS of the detection output (smoothed), not of the preview
+        now = time.time()
+        fps += 0.1 * (1 / (now - prev_time + 1e-6) - fps)  # avoid divide-by-zero
+        prev_time = now
+
+        if args.display == "window" and now - last_render_time >= preview_period:
+            last_render_time = now
+            processed_frame = render_frame(item, fps)
+
+            start = METRICS.clock()
+            cv2.imshow("Real-Time Sign Detection", processed_frame)
+            key = cv2.waitKey(1) & 0xFF
+            METRICS.observe("display", start)
+
+            if key == ord('q'):
+                break
+            if key == ord('m'):
+                print(f"[INFO] Metrics {'on' if METRICS.toggle() else 'off'}")
+        elif preview is not None:
+            preview.submit((item, fps))
+
+        if args.stats_interval > 0 and now - last_stats_time >= args.stats_interval:
+            print(f"[STATS] {pipeline.format_stats()} | output {fps:.1f} fps")
+            if args.adaptive:
+                print(f"[STATS] {hand_tracker.status()}")
+            if METRICS.stages:
+                print(f"[STATS] {METRICS.format_summary()}")
+            last_stats_time = now
+except KeyboardInterrupt:
+    print("[INFO] Stopping...")
 
 #---------------------------------------------#
 # CLEANUP                                     #
 #---------------------------------------------#
-with open(log_file, "w") as f:
-    json.dump(prediction_log, f, indent=2)
+pipeline.stop()
+event = decoder.flush()
+if event is not None:
+    log_event(event)
+print(f"[STATS] {pipeline.format_stats()}")
+if args.adaptive:
+    print(f"[STATS] {hand_tracker.status()}")
+if args.roi:
+    roi = hand_tracker.roi
+    print(f"[STATS] ROI: {roi.roi_frames} cropped / {roi.full_frames} full frames, "
+          f"{100 * roi.pixel_fraction():.0f}% of the pixels processed")
+if METRICS.stages:
+    print(f"[STATS] {METRICS.format_summary()}")
+    print(f"[STATS] {METRICS.format_counters()}")
+if metrics_dumper is not None:
+    metrics_dumper.stop()
+if metrics_server is not None:
+    metrics_server.stop()
+if preview is not None:
+    preview.stop()
+
+prediction_log.close()
 
-cap.release()
-cv2.destroyAllWindows()
+source.release()
+if args.display == "window":
+    cv2.destroyAllWindows()
 print(f"[INFO] Log saved to {log_file}")
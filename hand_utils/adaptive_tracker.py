@@ -0,0 +1,197 @@
+#
+#
+# Adaptive hand tracking for always-on use.
+#   MotionGate           cheap motion check on a tiny grayscale copy of the frame
+#   AdaptiveHandTracker  HandTracker that
+#     - skips MediaPipe while the scene is static and no hand has been seen
+#       for a while (still checking every `idle_check_interval` frames),
+#     - runs MediaPipe on a downscaled copy of the frame (landmarks are
+#       normalized, so the features do not change),
+#     - steps resolution / model_complexity down when MediaPipe takes longer
+#       than the frame budget, and back up when there is room,
+#     - drops to max_num_hands=1 after a long run of single-hand frames.
+#
+#
+
+from types import SimpleNamespace
+import time
+import cv2
+import numpy as np
+from hand_utils.hand_tracker import HandTracker
+from hand_utils.metrics import METRICS
+
+# Returned for gated frames, works everywhere real results do
+NO_HANDS = SimpleNamespace(multi_hand_landmarks=None, multi_handedness=None)
+
+# (model_complexity, input scale) from best to cheapest
+LEVELS = [(1, 1.0), (1, 0.75), (1, 0.5), (0, 0.5)]
+
+
+#---------------------------------------------#
+# MOTION GATE                                 #
+#                                             #
+#---------------------------------------------#
+class MotionGate:
+    # pixel_threshold: gray level change that counts as a changed pixel
+    # min_changed:     fraction of changed pixels that counts as motion
+    def __init__(self, size=(64, 48), pixel_threshold=15, min_changed=0.005):
+        self.size = size
+        self.pixel_threshold = pixel_threshold
+        self.min_changed = min_changed
+        self.previous = None
+
+    def update(self, frame):
+        small = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        if self.previous is None:
+            self.previous = gray
+            return True
+        changed = np.count_nonzero(cv2.absdiff(gray, self.previous) > self.pixel_threshold)
+        self.previous = gray
+        return changed >= self.min_changed * gray.size
+
+
+class AdaptiveHandTracker(HandTracker):
+
+#---------------------------------------------#
+# INITIALISE ATTRIBUTES                       #
+#                                             #
+#---------------------------------------------#
+    # max_width:           MediaPipe input width at scale 1.0
+    # frame_budget:        seconds MediaPipe may take per frame
+    # idle_frames:         frames without hands before gating starts
+    # idle_check_interval: while gated, still run MediaPipe every N frames
+    # single_hand_frames:  frames with exactly one hand before max_num_hands=1
+    # two_hand_recheck:    seconds after which two hands are searched for again
+    # cooldown:            min seconds between MediaPipe rebuilds
+    def __init__(self, max_num_hands=2, model_complexity=1,
+                 min_detection_confidence=0.6, min_tracking_confidence=0.6,
+                 max_width=640, frame_budget=1 / 30, idle_frames=30, idle_check_interval=15,
+                 single_hand_frames=90, two_hand_recheck=5.0, cooldown=2.0, roi_tracking=False):
+        super(AdaptiveHandTracker, self).__init__(max_num_hands, model_complexity,
+                                                  min_detection_confidence, min_tracking_confidence,
+                                                  roi_tracking)
+        self.max_num_hands = max_num_hands
+        self.min_detection_confidence = min_detection_confidence
+        self.min_tracking_confidence = min_tracking_confidence
+        self.max_width = max_width
+        self.frame_budget = frame_budget
+        self.idle_frames = idle_frames
+        self.idle_check_interval = idle_check_interval
+        self.single_hand_frames = single_hand_frames
+        self.two_hand_recheck = two_hand_recheck
+        self.cooldown = cooldown
+
+        self.gate = MotionGate()
+        self.level = 0 if model_complexity == 1 else len(LEVELS) - 1
+        self.num_hands = max_num_hands
+        self.process_time = 0.0        # EMA of MediaPipe time per frame
+        self.frames_without_hands = 0
+        self.frames_since_check = 0
+        self.single_hand_run = 0
+        self.last_rebuild = time.perf_counter()
+
+        self.gated_frames = 0
+        self.processed_frames = 0
+        self.rebuilds = 0
+
+
+#---------------------------------------------#
+# PROCESS INDIVIDUAL FRAMES                   #
+#                                             #
+#---------------------------------------------#
+    def process_frame(self, frame, mirrored=True):
+        if mirrored:
+            start = METRICS.clock()
+            frame = cv2.flip(frame, 1)
+            METRICS.observe("flip", start)
+
+        # Gate: static scene and no hands lately -> no MediaPipe
+        start = METRICS.clock()
+        motion = self.gate.update(frame)
+        METRICS.observe("motion_gate", start)
+        idle = self.frames_without_hands >= self.idle_frames
+        if idle and not motion and self.frames_since_check < self.idle_check_interval:
+            self.frames_since_check += 1
+            self.gated_frames += 1
+            METRICS.count("frames_gated")
+            return frame, NO_HANDS
+        self.frames_since_check = 0
+
+        # Downscale the MediaPipe input only, the returned frame stays full size
+        scale = LEVELS[self.level][1] * min(1.0, self.max_width / frame.shape[1])
+        start = METRICS.clock()
+        small = frame if scale >= 1.0 else cv2.resize(frame, None, fx=scale, fy=scale,
+                                                       interpolation=cv2.INTER_AREA)
+        METRICS.observe("downscale", start)
+
+        start = time.perf_counter()
+        results = self.process_hands(small)
+        self.process_time += 0.1 * (time.perf_counter() - start - self.process_time)
+        self.processed_frames += 1
+
+        hands = len(results.multi_hand_landmarks) if results.multi_hand_landmarks else 0
+        if hands == 0:
+            self.skipped_frames += 1
+            self.frames_without_hands += 1
+            METRICS.count("frames_without_hands")
+        else:
+            self.frames_without_hands = 0
+        self.single_hand_run = self.single_hand_run + 1 if hands == 1 else 0
+
+        self._adapt(hands)
+        return frame, results
+
+
+#---------------------------------------------#
+# ADAPT THE MEDIAPIPE SETTINGS                #
+#                                             #
+#---------------------------------------------#
+    def _adapt(self, hands):
+        now = time.perf_counter()
+        if now - self.last_rebuild < self.cooldown:
+            return
+
+        level = self.level
+        if self.process_time > self.frame_budget and level < len(LEVELS) - 1:
+            level += 1
+        elif self.process_time < 0.5 * self.frame_budget and level > 0:
+            level -= 1
+
+        num_hands = self.num_hands
+        if self.max_num_hands > 1:
+            if num_hands > 1 and self.single_hand_run >= self.single_hand_frames:
+                num_hands = 1
+            elif num_hands == 1 and (hands == 0 or now - self.last_rebuild >= self.two_hand_recheck):
+                num_hands = self.max_num_hands
+
+        if LEVELS[level][0] != LEVELS[self.level][0] or num_hands != self.num_hands:
+            self._rebuild(LEVELS[level][0], num_hands)
+        if level != self.level:
+            if self.roi is not None:
+                self.roi.reset()  # the box is in pixels of the old input size
+            self.level = level
+            self.process_time = self.frame_budget * 0.75  # re-measure at the new level
+            self.last_rebuild = now
+
+    def _rebuild(self, model_complexity, num_hands):
+        self.hands.close()
+        if self.roi is not None:
+            self.roi.reset()
+        self.hands = self.mp_hands.Hands(
+            max_num_hands=num_hands,
+            model_complexity=model_complexity,
+            min_detection_confidence=self.min_detection_confidence,
+            min_tracking_confidence=self.min_tracking_confidence,
+        )
+        self.num_hands = num_hands
+        self.single_hand_run = 0
+        self.rebuilds += 1
+        METRICS.count("mediapipe_rebuilds")
+        self.last_rebuild = time.perf_counter()
+
+    def status(self):
+        complexity, scale = LEVELS[self.level]
+        return (f"complexity {complexity}, scale {scale:.2f}, hands {self.num_hands}, "
+                f"mediapipe {1000 * self.process_time:.1f} ms, gated {self.gated_frames}/"
+                f"{self.gated_frames + self.processed_frames}, rebuilds {self.rebuilds}")
@@ -1,8 +1,19 @@
 import cv2
 import os
+import sys
 import numpy as np
-import time
 from hand_tracker import HandTracker
+from frame_sources import OpenCVCameraSource
+from resampling import resample_sequence
+from features import MODEL_RATE, SEQUENCE_LENGTH
+
+# Add project root to the system path so you can import training.*
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from training.packed_dataset import append_clips
 
 #---------------------------------------------#
 # DIRECTORY AND FILE SET-UP                   #
@@ -10,6 +21,7 @@ from hand_tracker import HandTracker
 label = "thanks"  # change this for other words
 video_dir = f"recorded_videos/{label}"
 landmark_dir = f"landmark_data/{label}"
+packed_dir = "landmark_data_packed"  # new recordings are appended here if it exists
 os.makedirs(video_dir, exist_ok=True)
 os.makedirs(landmark_dir, exist_ok=True)
 
@@ -17,11 +29,11 @@ os.makedirs(landmark_dir, exist_ok=True)
 # INITIALISE CAMERA                           #
 #---------------------------------------------#
 def initialize_camera():
-    cap = cv2.VideoCapture(0)  # 1 for iPhone, 0 for default webcam
-    if not cap.isOpened():
+    try:
+        return OpenCVCameraSource(0)  # 1 for iPhone, 0 for default webcam
+    except IOError:
         print("Error: Could not open the camera.")
         exit()
-    return cap
 
 #---------------------------------------------#
 # SAVE LANDMARKS PER VIDEO                    #
@@ -41,15 +53,15 @@ def get_next_index(directory, prefix, suffix):
 # MAIN                                        #
 #---------------------------------------------#
 def main():
-    cap = initialize_camera()
+    source = initialize_camera()
     hand_tracker = HandTracker()
 
-    width = int(cap.get(3))
-    height = int(cap.get(4))
+    width = source.width
+    height = source.height
 
-    fps = 30
-    video_duration = 1.5
-    frame_number = int(fps * video_duration)
+    fps = MODEL_RATE  # landmark rate of the saved .npy (the model's rate), whatever the camera delivers
+    frame_number = SEQUENCE_LENGTH
+    video_duration = frame_number / fps  # seconds of capture time, one model window
 
     recording = False
     frame_counter = 0
@@ -59,21 +71,19 @@ def main():
     fourcc = cv2.VideoWriter_fourcc(*'mp4v')
 
     while True:
-        success, frame = cap.read()
-        if not success:
+        source_frame = source.read()
+        if source_frame is None:
             print("Error: Frame capture failed.")
             break
 
-        frame = cv2.flip(frame, 1)
+        frame = source_frame.image  # already flipped for a selfie view
 
         processed_frame, results = hand_tracker.process_frame(frame)
-        if processed_frame is None:
-            continue
 
         hand_tracker.draw_landmarks(processed_frame, results)
         hand_tracker.draw_handedness(processed_frame, results)
 
-        frame_array = hand_tracker.create_landmark_array(results)
+        frame_array = hand_tracker.create_landmark_array(results, timestamp=source_frame.timestamp)
         print(frame_array)
 
         cv2.imshow("Hand Tracking", processed_frame)
@@ -89,11 +99,11 @@ def main():
 
             # Countdown overlay with filename
             for i in range(3, 0, -1):
-                ret, countdown_frame = cap.read()
-                if not ret:
+                countdown_source_frame = source.read()
+                if countdown_source_frame is None:
                     print("Error: Frame capture failed during countdown.")
                     break
-                countdown_frame = cv2.flip(countdown_frame, 1)
+                countdown_frame = countdown_source_frame.image
                 cv2.putText(countdown_frame, f'Starting in {i}', (200, 200),
                             cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 0, 255), 4)
                 cv2.putText(countdown_frame, f'Recording: video_{label}_{index}.mp4', (50, 400),
@@ -101,11 +111,14 @@ def main():
                 cv2.imshow("Hand Tracking", countdown_frame)
                 cv2.waitKey(1000)
 
-            video_writer = cv2.VideoWriter(video_filename, fourcc, fps, (width, height))
+            video_writer = cv2.VideoWriter(video_filename, fourcc, source.fps, (width, height))
             recording = True
             frame_counter = 0
+            record_start = None
             landmark_list = []
             print(f"Recording started: {video_filename}")
+            # `frame` was captured before the countdown, recording starts with the next capture
+            continue
 
         #
         # Record video + landmarks
@@ -114,11 +127,17 @@ def main():
             video_writer.write(frame)
             landmark_list.append(frame_array)
             frame_counter += 1
+            if record_start is None:
+                record_start = source_frame.timestamp
 
-            if frame_counter >= frame_number:
+            # Record for video_duration seconds of capture time, then resample to fps
+            if source_frame.timestamp - record_start >= video_duration:
                 recording = False
                 video_writer.release()
+                landmark_list = resample_sequence(np.array(landmark_list, dtype=np.float64), fps)[:frame_number]
                 save_landmarks(landmark_list, landmark_filename)
+                if os.path.isdir(packed_dir):
+                    append_clips(packed_dir, [(landmark_filename, label)])
 
                 print(f"Recording saved: {video_filename}")
                 print(f"Landmarks saved: {landmark_filename}")
@@ -126,10 +145,10 @@ def main():
 
                 # Show "Recording Saved" message on screen
                 for _ in range(30):  # show for ~1 second (30 frames at 30 FPS)
-                    ret, end_frame = cap.read()
-                    if not ret:
+                    end_source_frame = source.read()
+                    if end_source_frame is None:
                         break
-                    end_frame = cv2.flip(end_frame, 1)
+                    end_frame = end_source_frame.image
                     cv2.putText(end_frame, "✅ Recording Saved!", (100, 200),
                                 cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 255, 0), 4)
                     cv2.imshow("Hand Tracking", end_frame)
@@ -138,7 +157,7 @@ def main():
         if key == ord('q'):
             break
 
-    cap.release()
+    source.release()
     cv2.destroyAllWindows()
 
 if __name__ == "__main__":
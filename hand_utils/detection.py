@@ -7,20 +7,25 @@
 
 import cv2
 import os
+import sys
 import numpy as np
 from hand_tracker import HandTracker
+from frame_sources import open_source
 
 
 #---------------------------------------------#
 # INITIALISE CAMERA                           #
 # first function called                       #
 #---------------------------------------------#
+# Optional first argument: any frame source (see frame_sources.open_source),
+# defaults to camera 0
 def initialize_camera():
-    cap = cv2.VideoCapture(0)                 # 1 for when iPhone is close, 0 normally
-    if not cap.isOpened():
-        print("Error: Could not open the camera.")
+    spec = sys.argv[1] if len(sys.argv) > 1 else "0"   # "1" for when iPhone is close, "0" normally
+    try:
+        return open_source(spec)
+    except (IOError, ValueError) as e:
+        print(f"Error: Could not open the frame source. {e}")
         exit()
-    return cap
 
 
 #---------------------------------------------#
@@ -29,18 +34,18 @@ def initialize_camera():
 #---------------------------------------------#
 def main():
     # Initialising
-    cap = initialize_camera()
+    source = initialize_camera()
     hand_tracker = HandTracker()
 
 
     while True:
-        success, frame = cap.read()
-        if not success:
+        source_frame = source.read()
+        if source_frame is None or source_frame.image is None:
             print("Error: Frame capture failed.")
             break
 
-        # Flip the image horizontally for a selfie-view display
-        frame = cv2.flip(frame, 1)
+        # Camera sources are already flipped horizontally for a selfie-view display
+        frame = source_frame.image
 
         # Process the frame and get hand landmarks
         processed_frame, results = hand_tracker.process_frame(frame)
@@ -66,7 +71,7 @@ def main():
             break
 
     # Release resources
-    cap.release()
+    source.release()
     cv2.destroyAllWindows()
 
 if __name__ == "__main__":
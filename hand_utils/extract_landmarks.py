@@ -0,0 +1,193 @@
+#
+#
+# Batch landmark extraction for recorded videos (e.g. the .h264 clips that
+# start.py records into videos/). Clips are spread over a process pool with
+# one MediaPipe HandTracker per worker, and every clip is saved as
+#   landmark_data/<label>/landmark_<clip name>.npy
+# the same layout data_recorder.py writes. Clips whose .npy already exists are
+# skipped, so an interrupted run just continues where it stopped.
+#
+# Raw MediaPipe landmarks are kept in a content-addressed cache (see
+# landmark_cache.py). After a change to the features, '--overwrite' rebuilds
+# every .npy from the cache in seconds, without running MediaPipe again.
+#
+# The label is the sub-folder name (videos/<label>/clip.h264), or for a flat
+# folder the file name without its repeat number (videos/hello_2.h264 -> hello).
+#
+# Usage:  python hand_utils/extract_landmarks.py videos/ landmark_data/ --workers 4
+#         python hand_utils/extract_landmarks.py videos/ landmark_data/ --packed landmark_data_packed/
+#         python hand_utils/extract_landmarks.py videos/ landmark_data/ --overwrite
+#
+#
+
+import os
+import sys
+
+# Add project root to the system path so you can import hand_utils.* and training.*
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import argparse
+import multiprocessing
+import time
+import numpy as np
+from hand_utils.frame_sources import VIDEO_EXTENSIONS
+from hand_utils.landmark_cache import DEFAULT_CACHE_DIR, extractor_config
+
+_hand_tracker = None  # one per worker process, created on its first clip
+_cache = None
+_config = None
+
+
+#---------------------------------------------#
+# FIND CLIPS                                  #
+#                                             #
+#---------------------------------------------#
+def clip_label(video_path, input_dir):
+    parent = os.path.relpath(os.path.dirname(video_path), input_dir)
+    if parent != ".":
+        return parent.split(os.sep)[0]
+    stem = os.path.splitext(os.path.basename(video_path))[0]
+    label, _, number = stem.rpartition("_")
+    return label if label and number.isdigit() else stem
+
+
+def output_path(video_path, label, landmark_dir):
+    stem = os.path.splitext(os.path.basename(video_path))[0]
+    return os.path.join(landmark_dir, label, f"landmark_{stem}.npy")
+
+
+# Returns two lists of (video_path, label, npy_path): clips still to extract, and clips already done
+# (with overwrite, every clip is still to extract)
+def find_clips(input_dir, landmark_dir, overwrite=False):
+    clips = []
+    done = []
+    for dirpath, _, files in os.walk(input_dir):
+        for file in sorted(files):
+            if not file.lower().endswith(VIDEO_EXTENSIONS):
+                continue
+            video_path = os.path.join(dirpath, file)
+            label = clip_label(video_path, input_dir)
+            npy_path = output_path(video_path, label, landmark_dir)
+            if os.path.exists(npy_path) and not overwrite:
+                done.append((video_path, label, npy_path))
+            else:
+                clips.append((video_path, label, npy_path))
+    return sorted(clips), sorted(done)
+
+
+#---------------------------------------------#
+# WORKER                                      #
+#                                             #
+#---------------------------------------------#
+def _init_worker(config, cache_dir):
+    global _config, _cache
+    import cv2
+    from hand_utils.landmark_cache import LandmarkCache
+
+    cv2.setNumThreads(1)  # the pool is the parallelism, avoid oversubscribing cores
+    _config = config
+    _cache = LandmarkCache(cache_dir, config) if cache_dir else None
+
+
+def _extract_raw(video_path):
+    global _hand_tracker
+    from hand_utils.video_landmarks import extract_video_raw_landmarks
+
+    # Created here rather than in _init_worker: a failing initializer makes the pool respawn workers forever
+    if _hand_tracker is None:
+        from hand_utils.hand_tracker import HandTracker
+        _hand_tracker = HandTracker(max_num_hands=_config["max_num_hands"],
+                                    model_complexity=_config["model_complexity"],
+                                    min_detection_confidence=_config["min_detection_confidence"],
+                                    min_tracking_confidence=_config["min_tracking_confidence"])
+    return extract_video_raw_landmarks(video_path, _hand_tracker, fps=_config["fps"])
+
+
+def _extract(task):
+    from hand_utils.features import derive_features
+
+    video_path, label, npy_path = task
+    start = time.perf_counter()
+    try:
+        if _cache is not None:
+            raw, timestamps = _cache.get_or_extract(video_path, _extract_raw)
+        else:
+            raw, timestamps = _extract_raw(video_path)
+        landmarks = derive_features(raw, timestamps)
+    except Exception as e:
+        return video_path, label, None, 0, str(e)
+    if len(landmarks) == 0:
+        return video_path, label, None, 0, "no frames decoded"
+
+    # Write to a temporary name first, a killed run never leaves a partial .npy behind
+    os.makedirs(os.path.dirname(npy_path), exist_ok=True)
+    tmp_path = npy_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, landmarks)
+    os.replace(tmp_path, npy_path)
+    return video_path, label, npy_path, len(landmarks), time.perf_counter() - start
+
+
+#---------------------------------------------#
+# MAIN                                        #
+#                                             #
+#---------------------------------------------#
+def main():
+    parser = argparse.ArgumentParser(description="Extract MediaPipe landmarks from recorded videos in parallel")
+    parser.add_argument("input_dir", help="folder of recorded videos (.h264, .mp4, ...)")
+    parser.add_argument("landmark_dir", nargs="?", default="landmark_data/")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="processes, one MediaPipe each")
+    parser.add_argument("--fps", type=float, default=None,
+                        help="frame rate of the recordings (raw .h264 has none, default 30)")
+    parser.add_argument("--model-complexity", type=int, default=1)
+    parser.add_argument("--packed", help="also append the new clips to this packed dataset directory")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_DIR, help="raw landmark cache ('' to disable)")
+    parser.add_argument("--overwrite", action="store_true",
+                        help="rebuild existing .npy files too (e.g. after a feature change)")
+    args = parser.parse_args()
+
+    config = extractor_config(model_complexity=args.model_complexity, fps=args.fps)
+
+    clips, already_done = find_clips(args.input_dir, args.landmark_dir, args.overwrite)
+    print(f"[INFO] {len(clips)} clips to extract, {len(already_done)} already done.")
+
+    if args.packed:
+        from training.packed_dataset import append_clips
+        if args.overwrite:
+            print(f"[INFO] Packed clips are append-only and keep their old features, "
+                  f"delete {args.packed} to rebuild it.")
+        # Catches up on clips extracted by a run that stopped before packing them
+        append_clips(args.packed, [(npy_path, label) for _, label, npy_path in already_done])
+    if not clips:
+        return
+
+    done = 0
+    failed = 0
+    frames = 0
+    start = time.perf_counter()
+
+    with multiprocessing.Pool(args.workers, initializer=_init_worker, initargs=(config, args.cache)) as pool:
+        for video_path, label, npy_path, num_frames, info in pool.imap_unordered(_extract, clips):
+            if npy_path is None:
+                failed += 1
+                print(f"[ERROR] {video_path}: {info}")
+                continue
+
+            done += 1
+            frames += num_frames
+            # Only the main process writes to the packed files
+            if args.packed:
+                append_clips(args.packed, [(npy_path, label)])
+
+            elapsed = time.perf_counter() - start
+            print(f"[INFO] {done + failed}/{len(clips)} {os.path.basename(video_path)} -> {label} "
+                  f"({num_frames} frames, {num_frames / info:.0f} fps) | total {frames / elapsed:.0f} fps")
+
+    print(f"[STATS] Extracted {done} clips ({frames} frames) in {time.perf_counter() - start:.1f}s, {failed} failed.")
+
+
+if __name__ == "__main__":
+    main()
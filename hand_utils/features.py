@@ -0,0 +1,144 @@
+#
+#
+# Raw landmarks and the features derived from them.
+# Raw landmarks are what MediaPipe gives, before any normalization:
+#   raw        (frames, 2, 64) float32, hand slot 0 = Right, 1 = Left,
+#              21 x (x, y, z) in normalized image coordinates + handedness score
+#              (an all-zero slot = hand not found)
+#   timestamps (frames,) float64 capture times
+# derive_features() turns them into the (frames, 135) create_landmark_array
+# layout with array operations over the whole recording, so a change to the
+# feature definition only re-runs this, never MediaPipe.
+#
+# The model-input transforms below are shared by training (preprocessing.py,
+# packed_dataset.py, batch_inference.py) and live inference (LandmarkWindow,
+# StreamingSignLSTM), so both feed the model the same tensors. They work on a
+# single sequence (frames, 135) or a batch (batch, frames, 135), NumPy or torch.
+# training/feature_parity.py checks both paths against each other.
+#
+#
+
+import numpy as np
+
+RAW_SHAPE = (2, 64)
+HAND_SLOTS = {"Right": 0, "Left": 1}
+NUM_FEATURES = 135
+TIMESTAMP = 134         # column of the timestamp
+SEQUENCE_LENGTH = 45    # frames per model input, 3 s at MODEL_RATE (the length of a recording)
+
+# Rate (Hz) the model was trained at, every live stream and new recording is
+# resampled to it. Measured on landmark_data/: the clips were captured at a
+# median 15.0 Hz (14.5 - 17.1). Their first row is a frame from before the
+# recording countdown, about 3 s earlier, so the mean rate over whole clips
+# (about 7.3 Hz) is not the capture rate. Packed datasets store the measured
+# rate of their clips in meta.json ("rate"), train_LSTM.py checks it.
+MODEL_RATE = 15.0
+
+
+#---------------------------------------------#
+# MEDIAPIPE RESULTS -> RAW                    #
+#                                             #
+#---------------------------------------------#
+# out: float32 (2, 64) array, filled in place
+def write_raw_landmarks(results, out):
+    out[:] = 0
+    if results and results.multi_hand_landmarks:
+        for hand_landmarks, hand_handedness in zip(results.multi_hand_landmarks, results.multi_handedness):
+            slot = HAND_SLOTS.get(hand_handedness.classification[0].label)
+            if slot is None:
+                continue
+            hand = out[slot]
+            for i, lm in enumerate(hand_landmarks.landmark):
+                hand[3 * i] = lm.x
+                hand[3 * i + 1] = lm.y
+                hand[3 * i + 2] = lm.z
+            hand[63] = hand_handedness.classification[0].score
+    return out
+
+
+#---------------------------------------------#
+# RAW -> FEATURES                             #
+# same layout as create_landmark_array        #
+#---------------------------------------------#
+# Per hand: 21 wrist-relative (x, y, z), confidence, wrist (x, y, z) = 67,
+# Right then Left, then the timestamp = 135. Missing hands are all zero.
+def derive_features(raw, timestamps):
+    frames = len(raw)
+    features = np.zeros((frames, 135), dtype=np.float64)
+
+    landmarks = raw[:, :, :63].astype(np.float64).reshape(frames, 2, 21, 3)
+    wrist = landmarks[:, :, 0:1, :]
+    present = raw[:, :, :63].any(axis=2) | (raw[:, :, 63] != 0)
+
+    hands = np.concatenate([
+        (landmarks - wrist).reshape(frames, 2, 63),
+        raw[:, :, 63:64].astype(np.float64),
+        wrist.reshape(frames, 2, 3),
+    ], axis=2)
+    hands *= present[:, :, None]
+
+    features[:, :134] = hands.reshape(frames, 134)
+    features[:, 134] = timestamps
+    return features
+
+
+#---------------------------------------------#
+# TIMESTAMP NORMALIZATION                     #
+#                                             #
+#---------------------------------------------#
+# timestamps: (..., frames) float64. Returns them scaled to [0, 1] over the
+# last axis, so the model sees the timing inside the window, not epoch times.
+def timestamp_column(timestamps):
+    if isinstance(timestamps, np.ndarray):
+        low = timestamps.min(axis=-1, keepdims=True)
+        span = np.ptp(timestamps, axis=-1, keepdims=True)
+    else:
+        low = timestamps.amin(dim=-1, keepdim=True)
+        span = timestamps.amax(dim=-1, keepdim=True) - low
+    return (timestamps - low) / (span + 1e-6)
+
+
+# Normalizes the timestamp column of a (frames, features) sequence, or of each
+# sequence in a (batch, frames, features) batch, in place. Call it before any
+# float32 cast: float32 cannot hold epoch times.
+def normalize_timestamps(sequence):
+    sequence[..., -1] = timestamp_column(sequence[..., -1])
+    return sequence
+
+
+# Capture rate (Hz) of a recording from its raw timestamps: the median frame
+# interval, so a single long gap (the countdown frame) does not skew it.
+# None for fewer than 2 frames.
+def capture_rate(timestamps):
+    intervals = np.diff(np.asarray(timestamps, dtype=np.float64))
+    intervals = intervals[intervals > 0]
+    if len(intervals) == 0:
+        return None
+    return float(1.0 / np.median(intervals))
+
+
+#---------------------------------------------#
+# PADDING AND MASKING                         #
+#                                             #
+#---------------------------------------------#
+# Zero-pads (at the end) or trims a sequence to `length` frames.
+# Returns (padded float32, number of real frames).
+def pad_sequence(sequence, length=SEQUENCE_LENGTH):
+    valid = min(len(sequence), length)
+    padded = np.zeros((length, sequence.shape[1]), dtype=np.float32)
+    padded[:valid] = sequence[:valid]
+    return padded, valid
+
+
+# The training / offline path for one recorded clip: normalized timestamps
+# over the frames the model sees, then padded / trimmed to `length`
+def prepare_sequence(sequence, length=SEQUENCE_LENGTH):
+    sequence = np.array(sequence[:length], dtype=np.float64)
+    if len(sequence):
+        normalize_timestamps(sequence)
+    return pad_sequence(sequence, length)
+
+
+# lengths: (batch,) real frame counts. True for real frames, (batch, length)
+def padding_mask(lengths, length=SEQUENCE_LENGTH):
+    return np.arange(length)[None, :] < np.asarray(lengths)[:, None]
@@ -0,0 +1,384 @@
+#
+#
+# Frame sources: one interface for everything that produces frames.
+#   OpenCVCameraSource    webcam / USB camera through cv2.VideoCapture
+#   Picamera2Source       Raspberry Pi camera
+#   VideoFileSource       recorded .mp4 / .h264 / ... files
+#   ImageDirectorySource  a folder of images
+#   LandmarkReplaySource  recorded landmark_data .npy files (no MediaPipe needed)
+#   SyntheticSource       generated frames, for throughput tests
+#
+# Every read() returns a SourceFrame, or None at the end of the stream.
+# Use open_source() to build one from a command-line string.
+#
+#
+
+import os
+import queue
+import threading
+import time
+from collections import namedtuple
+import cv2
+import numpy as np
+
+# image:     BGR frame, or None for landmark replay
+# features:  135-value feature vector for landmark replay, otherwise None
+# timestamp: capture time in seconds (wall clock for cameras, media time for files)
+SourceFrame = namedtuple("SourceFrame", ["image", "timestamp", "index", "features"])
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".h264")
+
+
+#---------------------------------------------#
+# BASE CLASS                                  #
+#                                             #
+#---------------------------------------------#
+class FrameSource:
+    live = False      # True for cameras, frames are not replayable
+    mirrored = True   # selfie view, as recorded by data_recorder.py / start.py
+
+    # realtime: for recorded sources, wait so frames come out at their
+    # original rate instead of as fast as possible
+    def __init__(self, realtime=False):
+        self.realtime = realtime
+        self.index = 0
+        self.start_wall = None
+        self.start_timestamp = None
+
+    def read(self):
+        raise NotImplementedError
+
+    def release(self):
+        pass
+
+    def _pace(self, timestamp):
+        if not self.realtime:
+            return
+        if self.start_wall is None:
+            self.start_wall = time.perf_counter()
+            self.start_timestamp = timestamp
+            return
+        delay = (timestamp - self.start_timestamp) - (time.perf_counter() - self.start_wall)
+        if delay > 0:
+            time.sleep(delay)
+
+    def __iter__(self):
+        while True:
+            frame = self.read()
+            if frame is None:
+                return
+            yield frame
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+#---------------------------------------------#
+# CAMERAS                                     #
+#                                             #
+#---------------------------------------------#
+class OpenCVCameraSource(FrameSource):
+    live = True
+
+    def __init__(self, device=0, flip=True):
+        super(OpenCVCameraSource, self).__init__()
+        self.cap = cv2.VideoCapture(device)  # 1 for iPhone, 0 for default webcam
+        if not self.cap.isOpened():
+            raise IOError(f"Could not open camera {device}")
+        self.flip = flip  # selfie view, like the original scripts
+        self.mirrored = flip
+        self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30
+
+    def read(self):
+        # Timestamp right after the grab, before decoding
+        if not self.cap.grab():
+            return None
+        timestamp = time.time()
+        success, image = self.cap.retrieve()
+        if not success:
+            return None
+        if self.flip:
+            image = cv2.flip(image, 1)
+        frame = SourceFrame(image, timestamp, self.index, None)
+        self.index += 1
+        return frame
+
+    def release(self):
+        self.cap.release()
+
+
+class Picamera2Source(FrameSource):
+    live = True
+
+    def __init__(self, resolution=(1296, 972), framerate=30, vflip=True, hflip=True):
+        super(Picamera2Source, self).__init__()
+        from picamera2 import Picamera2
+        from libcamera import Transform
+
+        self.picam2 = Picamera2()
+        config = self.picam2.create_video_configuration(
+            main={"size": resolution, "format": "RGB888"},
+            transform=Transform(vflip=vflip, hflip=hflip))
+        self.picam2.configure(config)
+        frame_duration = int(1e6 / framerate)  # Frame duration in microseconds
+        self.picam2.set_controls({"FrameDurationLimits": (frame_duration, frame_duration)})
+        self.picam2.start()
+        self.mirrored = hflip
+        self.width, self.height = resolution
+        self.fps = framerate
+
+    def read(self):
+        image = self.picam2.capture_array()  # RGB888 is BGR in memory, like OpenCV
+        frame = SourceFrame(image, time.time(), self.index, None)
+        self.index += 1
+        return frame
+
+    def release(self):
+        self.picam2.close()
+
+
+#---------------------------------------------#
+# RECORDED VIDEO / IMAGES                     #
+#                                             #
+#---------------------------------------------#
+class VideoFileSource(FrameSource):
+    def __init__(self, path, fps=None, realtime=False, loop=False):
+        super(VideoFileSource, self).__init__(realtime)
+        self.path = path
+        self.loop = loop
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise IOError(f"Could not open video: {path}")
+        # Raw .h264 streams carry no frame rate, fall back to the recording rate
+        self.fps = fps or self.cap.get(cv2.CAP_PROP_FPS) or 30
+        self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+    def read(self):
+        success, image = self.cap.read()
+        if not success and self.loop and self.index > 0:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            success, image = self.cap.read()
+        if not success:
+            return None
+
+        timestamp = self.index / self.fps
+        self._pace(timestamp)
+        frame = SourceFrame(image, timestamp, self.index, None)
+        self.index += 1
+        return frame
+
+    def release(self):
+        self.cap.release()
+
+
+class ImageDirectorySource(FrameSource):
+    def __init__(self, directory, fps=30, realtime=False):
+        super(ImageDirectorySource, self).__init__(realtime)
+        self.paths = sorted(os.path.join(directory, f) for f in os.listdir(directory)
+                            if f.lower().endswith(IMAGE_EXTENSIONS))
+        self.fps = fps
+
+    def read(self):
+        while self.index < len(self.paths):
+            image = cv2.imread(self.paths[self.index])
+            timestamp = self.index / self.fps
+            index = self.index
+            self.index += 1
+            if image is not None:
+                self._pace(timestamp)
+                return SourceFrame(image, timestamp, index, None)
+        return None
+
+
+#---------------------------------------------#
+# RECORDED LANDMARKS (BYPASSES MEDIAPIPE)     #
+#                                             #
+#---------------------------------------------#
+# Replays landmark_data .npy files frame by frame, in file order. Timestamps
+# are the ones recorded in the last feature column, made continuous across
+# files so a directory plays back as one stream.
+class LandmarkReplaySource(FrameSource):
+    def __init__(self, path, fps=30, realtime=False):
+        super(LandmarkReplaySource, self).__init__(realtime)
+        if os.path.isdir(path):
+            self.paths = sorted(os.path.join(dirpath, f)
+                                for dirpath, _, files in os.walk(path)
+                                for f in files if f.endswith(".npy"))
+        else:
+            self.paths = [path]
+        self.fps = fps
+        self.file_index = -1
+        self.sequence = None
+        self.row = 0
+        self.offset = 0.0       # maps the current file's timestamps onto the stream
+        self.last_timestamp = None
+
+    def _next_file(self):
+        self.file_index += 1
+        if self.file_index >= len(self.paths):
+            return False
+        self.sequence = np.load(self.paths[self.file_index])
+        self.row = 0
+        if len(self.sequence):
+            start = 0.0 if self.last_timestamp is None else self.last_timestamp + 1 / self.fps
+            self.offset = start - self.sequence[0, -1]
+        return True
+
+    def read(self):
+        while self.sequence is None or self.row >= len(self.sequence):
+            if not self._next_file():
+                return None
+
+        features = self.sequence[self.row]
+        timestamp = float(features[-1] + self.offset)
+        self.last_timestamp = timestamp
+        self.row += 1
+
+        self._pace(timestamp)
+        frame = SourceFrame(None, timestamp, self.index, features)
+        self.index += 1
+        return frame
+
+
+#---------------------------------------------#
+# SYNTHETIC FRAMES                            #
+#                                             #
+#---------------------------------------------#
+# A moving gradient with a bright square, deterministic for a given seed.
+class SyntheticSource(FrameSource):
+    def __init__(self, width=640, height=480, fps=30, num_frames=None, seed=0, realtime=False):
+        super(SyntheticSource, self).__init__(realtime)
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.num_frames = num_frames
+        rng = np.random.default_rng(seed)
+        self.background = rng.integers(0, 255, size=(height, width, 3), dtype=np.uint8)
+
+    def read(self):
+        if self.num_frames is not None and self.index >= self.num_frames:
+            return None
+
+        image = np.roll(self.background, self.index * 4, axis=1)
+        size = min(self.width, self.height) // 4
+        x = (self.index * 8) % (self.width - size)
+        y = (self.height - size) // 2
+        image[y:y + size, x:x + size] = 255
+
+        timestamp = self.index / self.fps
+        self._pace(timestamp)
+        frame = SourceFrame(image, timestamp, self.index, None)
+        self.index += 1
+        return frame
+
+
+#---------------------------------------------#
+# PREFETCHING                                 #
+#                                             #
+#---------------------------------------------#
+# Reads ahead on a background thread so decoding overlaps with processing.
+# The queue blocks when full, so no recorded frame is ever skipped.
+class PrefetchSource(FrameSource):
+    def __init__(self, source, queue_size=8):
+        super(PrefetchSource, self).__init__()
+        self.source = source
+        self.live = source.live
+        self.mirrored = source.mirrored
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.stop_event = threading.Event()
+        self.error = None  # exception raised by the wrapped source's read()
+        self.thread = threading.Thread(target=self._worker, daemon=True)
+        self.thread.start()
+
+    def _put(self, frame):
+        while not self.stop_event.is_set():
+            try:
+                self.queue.put(frame, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    # A failing read (corrupt video, camera error) ends the stream too, the
+    # error is raised again by read() instead of leaving it waiting forever
+    def _worker(self):
+        try:
+            while not self.stop_event.is_set():
+                frame = self.source.read()
+                if frame is None:
+                    return
+                self._put(frame)
+        except Exception as e:
+            self.error = e
+        finally:
+            self._put(None)
+
+    # Waits in short steps: after release() the worker may stop without
+    # queueing its None, a plain get() would then wait forever
+    def read(self):
+        while not self.stop_event.is_set():
+            try:
+                frame = self.queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if frame is None:
+                self.stop_event.set()
+                if self.error is not None:
+                    raise self.error
+            return frame
+        return None
+
+    def release(self):
+        self.stop_event.set()
+        self.thread.join(timeout=1.0)
+        self.source.release()
+
+    def __getattr__(self, name):
+        # width, height, fps, ... of the wrapped source
+        if name == "source":
+            raise AttributeError(name)
+        return getattr(self.source, name)
+
+
+#---------------------------------------------#
+# BUILD A SOURCE FROM A STRING                #
+#                                             #
+#---------------------------------------------#
+#   "0", "1"        camera index
+#   "picamera"      Raspberry Pi camera
+#   "synthetic"     generated frames
+#   path/to/video   video file
+#   path/to/dir     images, or .npy landmark files
+#   path/to/x.npy   one landmark file
+# mirror=False gives the camera image without the selfie flip, for callers
+# that pass source.mirrored on to HandTracker.process_frame
+def open_source(spec, realtime=False, prefetch=0, mirror=True):
+    spec = str(spec)
+    if spec.isdigit():
+        source = OpenCVCameraSource(int(spec), flip=mirror)
+    elif spec == "picamera":
+        source = Picamera2Source()
+    elif spec == "synthetic":
+        source = SyntheticSource(realtime=realtime)
+    elif spec.endswith(".npy"):
+        source = LandmarkReplaySource(spec, realtime=realtime)
+    elif os.path.isdir(spec):
+        files = [f for _, _, fs in os.walk(spec) for f in fs]
+        if any(f.endswith(".npy") for f in files):
+            source = LandmarkReplaySource(spec, realtime=realtime)
+        else:
+            source = ImageDirectorySource(spec, realtime=realtime)
+    elif spec.lower().endswith(VIDEO_EXTENSIONS):
+        source = VideoFileSource(spec, realtime=realtime)
+    else:
+        raise ValueError(f"Unknown frame source: {spec}")
+
+    if prefetch > 0:
+        source = PrefetchSource(source, queue_size=prefetch)
+    return source
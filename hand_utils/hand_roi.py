@@ -0,0 +1,115 @@
+#
+#
+# Region-of-interest tracking for HandTracker.
+# Hands move little between frames, so MediaPipe only needs to see a padded
+# box around where they were last frame. The box stays put while the hands are
+# well inside it (MediaPipe's own tracking keeps working on a steady crop) and
+# is recomputed when they get close to its edge. A full frame is processed
+# every `full_frame_interval` frames, when no hand was found, and at the start,
+# so new hands entering elsewhere are still picked up.
+#
+# Landmarks found in the crop are mapped back to full-frame normalized
+# coordinates, so features are the same as with full-frame processing.
+#
+#
+
+import numpy as np
+
+
+class HandRoi:
+
+#---------------------------------------------#
+# INITIALISE ATTRIBUTES                       #
+#                                             #
+#---------------------------------------------#
+    # padding:  added around the hands' bounding box, as a fraction of its larger side
+    # min_size: smallest box side, as a fraction of the frame
+    # margin:   the box is moved when a landmark comes within this fraction of its edge
+    def __init__(self, padding=0.6, min_size=0.3, margin=0.1, full_frame_interval=30):
+        self.padding = padding
+        self.min_size = min_size
+        self.margin = margin
+        self.full_frame_interval = full_frame_interval
+
+        self.box = None          # (x0, y0, x1, y1) in pixels, None = full frame
+        self.frames_since_full = 0
+
+        self.roi_frames = 0
+        self.full_frames = 0
+        self.pixels = 0          # pixels given to MediaPipe
+        self.frame_pixels = 0    # pixels of the full frames
+
+
+#---------------------------------------------#
+# WHICH PART OF THE FRAME TO PROCESS          #
+#                                             #
+#---------------------------------------------#
+    # Returns (crop, box), box is None for the full frame
+    def crop(self, frame):
+        height, width = frame.shape[:2]
+        self.frame_pixels += height * width
+
+        if self.box is None or self.frames_since_full >= self.full_frame_interval:
+            self.frames_since_full = 0
+            self.full_frames += 1
+            self.pixels += height * width
+            return frame, None
+
+        self.frames_since_full += 1
+        self.roi_frames += 1
+        x0, y0, x1, y1 = self.box
+        self.pixels += (x1 - x0) * (y1 - y0)
+        return frame[y0:y1, x0:x1], self.box
+
+
+#---------------------------------------------#
+# MAP RESULTS BACK AND MOVE THE BOX           #
+#                                             #
+#---------------------------------------------#
+    # results: MediaPipe results for the crop at `box`, modified in place to
+    # full-frame coordinates
+    def update(self, results, box, frame_shape):
+        height, width = frame_shape[:2]
+        if not results.multi_hand_landmarks:
+            self.box = None  # lost: full frame next time
+            return results
+
+        if box is not None:
+            x0, y0, x1, y1 = box
+            sx, sy = (x1 - x0) / width, (y1 - y0) / height
+            ox, oy = x0 / width, y0 / height
+            for hand_landmarks in results.multi_hand_landmarks:
+                for lm in hand_landmarks.landmark:
+                    lm.x = ox + lm.x * sx
+                    lm.y = oy + lm.y * sy
+                    lm.z = lm.z * sx  # z has the same scale as x
+
+        points = np.array([(lm.x * width, lm.y * height)
+                           for hand_landmarks in results.multi_hand_landmarks
+                           for lm in hand_landmarks.landmark])
+        low = points.min(axis=0)
+        high = points.max(axis=0)
+
+        # Keep the box while every landmark is well inside it
+        if self.box is not None:
+            x0, y0, x1, y1 = self.box
+            mx, my = self.margin * (x1 - x0), self.margin * (y1 - y0)
+            if low[0] >= x0 + mx and low[1] >= y0 + my and high[0] <= x1 - mx and high[1] <= y1 - my:
+                return results
+
+        side = max(high - low) * (1 + 2 * self.padding)
+        side = max(side, self.min_size * min(width, height))
+        center = (low + high) / 2
+        x0, y0 = np.maximum(center - side / 2, 0).astype(int)
+        x1, y1 = np.minimum(center + side / 2, (width, height)).astype(int)
+        if (x1 - x0) * (y1 - y0) >= 0.8 * width * height:
+            self.box = None  # hardly smaller than the frame, not worth cropping
+        else:
+            self.box = (int(x0), int(y0), int(x1), int(y1))
+        return results
+
+    def reset(self):
+        self.box = None
+
+    def pixel_fraction(self):
+        return self.pixels / max(self.frame_pixels, 1)
@@ -6,10 +6,18 @@
 
 
 import cv2
-import hand_utils as mp
+import mediapipe as mp
 import numpy as np
 import time
 
+# Imported as hand_utils.hand_tracker, or as hand_tracker by the scripts in this folder
+try:
+    from hand_utils.hand_roi import HandRoi
+    from hand_utils.metrics import METRICS
+except ImportError:
+    from hand_roi import HandRoi
+    from metrics import METRICS
+
 class HandTracker:
 
 #---------------------------------------------#
@@ -19,7 +27,8 @@ class HandTracker:
     def __init__(self, max_num_hands = 2, 
                  model_complexity = 1, 
                  min_detection_confidence = 0.6, 
-                 min_tracking_confidence = 0.6): 
+                 min_tracking_confidence = 0.6,
+                 roi_tracking = False): 
         
         self.mp_hands = mp.solutions.hands
         self.mp_drawing = mp.solutions.drawing_utils
@@ -31,31 +40,49 @@ class HandTracker:
             min_tracking_confidence=min_tracking_confidence,
         )
         self.skipped_frames = 0
-        self.last_sample_time = time.time()
-        self.sample_interval = 1 / 30
+        self.roi = HandRoi() if roi_tracking else None  # process only a crop around the hands
 
 
 #---------------------------------------------#
 # PROCESS INDIVIDUAL FRAMES                   #
 #                                             #
 #---------------------------------------------#
-    def process_frame(self, frame):
-        current_time = time.time()
-        if current_time - self.last_sample_time < self.sample_interval:
-            return None, None  # Wait to maintain consistent sampling rate
-        self.last_sample_time = current_time
-
-        frame = cv2.flip(frame, 1)
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        rgb_frame.flags.writeable = False
-        results = self.hands.process(rgb_frame)
-        rgb_frame.flags.writeable = True
-        processed_frame = cv2.cvtColor(rgb_frame, cv2.COLOR_RGB2BGR)
+    # Every frame is processed. Rate conversion to the model's rate happens
+    # later, on capture timestamps (see resampling.py).
+    # mirrored: the frame is a selfie view (flipped camera image or recorded
+    # video), MediaPipe gets it flipped back like the training data. Sources
+    # that deliver the camera image as is (mirrored=False) skip the flip.
+    # Returns the BGR frame MediaPipe saw, and its results.
+    def process_frame(self, frame, mirrored=True):
+        if mirrored:
+            start = METRICS.clock()
+            frame = cv2.flip(frame, 1)
+            METRICS.observe("flip", start)
+        results = self.process_hands(frame)
 
         if results.multi_hand_landmarks is None:
             self.skipped_frames += 1
+            METRICS.count("frames_without_hands")
+
+        return frame, results
 
-        return processed_frame, results
+    # MediaPipe on a BGR frame, or only on the region around the hands
+    def process_hands(self, frame):
+        if self.roi is None:
+            return self._run_mediapipe(frame)
+        crop, box = self.roi.crop(frame)
+        return self.roi.update(self._run_mediapipe(crop), box, frame.shape)
+
+    def _run_mediapipe(self, frame):
+        start = METRICS.clock()
+        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        rgb_frame.flags.writeable = False
+        METRICS.observe("color_convert", start)
+
+        start = METRICS.clock()
+        results = self.hands.process(rgb_frame)
+        METRICS.observe("mediapipe", start)
+        return results
 
 
 #---------------------------------------------#
@@ -118,7 +145,7 @@ class HandTracker:
 # CREATE LANDMARK ARRAY IN PROCESSABLE FORMAT #
 #                                             #
 #---------------------------------------------#
-    def create_landmark_array(self, results): 
+    def create_landmark_array(self, results, timestamp=None): 
         feature_array = [None, None]  # [Right hand, Left hand]
 
         if results and results.multi_hand_landmarks: 
@@ -145,10 +172,49 @@ class HandTracker:
                 feature_array[i] = [0] * 67  # 63 landmarks + 1 confidence + 3 wrist
 
         final_array = feature_array[0] + feature_array[1]  # 67 + 67 = 134
-        final_array.append(time.time())                   # +1 = 135
+        final_array.append(time.time() if timestamp is None else timestamp)  # +1 = 135
 
         # Final check
         if len(final_array) != 135:
             raise ValueError(f"Feature vector size mismatch: expected 135, got {len(final_array)}")
 
         return final_array
+
+
+#---------------------------------------------#
+# WRITE LANDMARK ARRAY INTO A BUFFER          #
+# same layout as create_landmark_array        #
+#---------------------------------------------#
+    # Fills `out` (a float32 array of 135 values, e.g. a row of
+    # LandmarkWindow) in place, without building per-frame Python lists.
+    def write_landmark_array(self, results, out, timestamp=None):
+        start = METRICS.clock()
+        out[:] = 0  # missing hands stay zero-padded
+
+        if results and results.multi_hand_landmarks:
+            values = memoryview(out)
+            for hand_landmarks, hand_handedness in zip(results.multi_hand_landmarks, results.multi_handedness):
+                handedness_label = hand_handedness.classification[0].label
+                if handedness_label == 'Right':
+                    base = 0
+                elif handedness_label == 'Left':
+                    base = 67
+                else:
+                    continue
+
+                i = base
+                for lm in hand_landmarks.landmark:
+                    values[i] = lm.x
+                    values[i + 1] = lm.y
+                    values[i + 2] = lm.z
+                    i += 3
+
+                landmarks = out[base:base + 63].reshape(21, 3)
+                wrist = out[base + 64:base + 67]
+                wrist[:] = landmarks[0]                                  # Save original wrist
+                landmarks -= wrist                                       # Normalize to wrist
+                values[base + 63] = hand_handedness.classification[0].score
+
+        out[134] = time.time() if timestamp is None else timestamp
+        METRICS.observe("features", start)
+        return out
@@ -0,0 +1,160 @@
+#
+#
+# Content-addressed cache of raw MediaPipe landmarks per video.
+#   <cache_dir>/<extractor key>/<sha256 of the video file>.npz
+# The extractor key hashes everything that changes MediaPipe's output
+# (EXTRACTOR_VERSION, mediapipe version, HandTracker settings, frame rate), so
+# changing any of them starts a fresh cache instead of serving stale landmarks.
+# Renaming or moving a video keeps its cache entry, and the feature definition
+# is not part of the key: features are derived from the cached raw landmarks
+# (features.derive_features), so a feature change never re-runs MediaPipe.
+#
+# Usage:  python hand_utils/landmark_cache.py info
+#         python hand_utils/landmark_cache.py prune     (delete entries of old extractor / mediapipe versions)
+#
+#
+
+import os
+import sys
+
+# Add project root to the system path so you can import hand_utils.*
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import argparse
+import hashlib
+import json
+import shutil
+import numpy as np
+
+# Bump when the raw extraction itself changes (e.g. how frames are fed to MediaPipe)
+EXTRACTOR_VERSION = 1
+DEFAULT_CACHE_DIR = ".landmark_cache"
+
+
+#---------------------------------------------#
+# KEYS                                        #
+#                                             #
+#---------------------------------------------#
+def file_digest(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def mediapipe_version():
+    try:
+        import mediapipe
+        return getattr(mediapipe, "__version__", "unknown")
+    except ImportError:
+        return "none"
+
+
+# config: HandTracker settings and anything else that changes the raw output
+def extractor_config(model_complexity=1, min_detection_confidence=0.6, min_tracking_confidence=0.6,
+                     max_num_hands=2, fps=None):
+    return {
+        "extractor_version": EXTRACTOR_VERSION,
+        "mediapipe": mediapipe_version(),
+        "model_complexity": model_complexity,
+        "min_detection_confidence": min_detection_confidence,
+        "min_tracking_confidence": min_tracking_confidence,
+        "max_num_hands": max_num_hands,
+        "fps": fps,
+    }
+
+
+def config_key(config):
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()[:16]
+
+
+#---------------------------------------------#
+# CACHE                                       #
+#                                             #
+#---------------------------------------------#
+class LandmarkCache:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, config=None):
+        self.config = config or extractor_config()
+        self.dir = os.path.join(cache_dir, config_key(self.config))
+        os.makedirs(self.dir, exist_ok=True)
+
+        config_path = os.path.join(self.dir, "config.json")
+        if not os.path.exists(config_path):
+            with open(config_path, "w") as f:
+                json.dump(self.config, f, indent=2)
+
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, digest):
+        return os.path.join(self.dir, digest + ".npz")
+
+    # Returns (raw, timestamps) or None
+    def get(self, video_path, digest=None):
+        path = self._path(digest or file_digest(video_path))
+        if not os.path.exists(path):
+            self.misses += 1
+            return None
+        with np.load(path) as data:
+            self.hits += 1
+            return data["raw"], data["timestamps"]
+
+    def put(self, video_path, raw, timestamps, digest=None):
+        path = self._path(digest or file_digest(video_path))
+        # Written under a temporary name, so readers never see a partial entry
+        tmp_path = path + f".{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, raw=raw, timestamps=timestamps, source=os.path.basename(video_path))
+        os.replace(tmp_path, path)
+
+    # Cached raw landmarks of a video, running `extract(video_path)` only on a miss
+    def get_or_extract(self, video_path, extract):
+        digest = file_digest(video_path)
+        cached = self.get(video_path, digest)
+        if cached is not None:
+            return cached
+        raw, timestamps = extract(video_path)
+        self.put(video_path, raw, timestamps, digest)
+        return raw, timestamps
+
+
+#---------------------------------------------#
+# MAIN                                        #
+#                                             #
+#---------------------------------------------#
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or prune the raw landmark cache")
+    parser.add_argument("command", choices=["info", "prune"])
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.cache_dir):
+        print(f"[INFO] No cache at {args.cache_dir}")
+        return
+
+    current = extractor_config()
+    for key in sorted(os.listdir(args.cache_dir)):
+        key_dir = os.path.join(args.cache_dir, key)
+        config_path = os.path.join(key_dir, "config.json")
+        if not os.path.exists(config_path):
+            continue
+        with open(config_path, "r") as f:
+            config = json.load(f)
+        entries = [f for f in os.listdir(key_dir) if f.endswith(".npz")]
+        size = sum(os.path.getsize(os.path.join(key_dir, f)) for f in entries)
+        stale = (config.get("extractor_version") != current["extractor_version"]
+                 or config.get("mediapipe") != current["mediapipe"])
+        settings = ", ".join(f"{k}={v}" for k, v in sorted(config.items()))
+        print(f"[INFO] {key}: {len(entries)} videos, {size / 1e6:.1f} MB{' (stale)' if stale else ''}  {settings}")
+
+        if args.command == "prune" and stale:
+            shutil.rmtree(key_dir)
+            print(f"[INFO] Deleted {key}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+#
+#
+# Hot-path metrics: per-stage timers, counters and gauges, with fixed-bucket
+# histograms so recording a sample is a bisect and an increment.
+#   METRICS          the process-wide registry HandTracker and detection.py use
+#   MetricsServer    Prometheus-style text endpoint (GET /metrics), plus
+#                    /enable, /disable and /reset to toggle it at runtime
+#   MetricsDumper    writes the same text to a file every few seconds
+#
+# Disabled (the default), timing a stage costs one attribute check:
+#     start = METRICS.clock()      # None while disabled
+#     ...
+#     METRICS.observe("mediapipe", start)
+# Each stage is recorded from one thread, so there is no lock on the hot path.
+#
+#
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Stage timing bucket bounds in seconds: 10 us to ~1.3 s, doubling
+STAGE_BUCKETS = tuple(0.00001 * 2 ** i for i in range(18))
+
+
+#---------------------------------------------#
+# HISTOGRAM                                   #
+#                                             #
+#---------------------------------------------#
+class Histogram:
+    def __init__(self, bounds=STAGE_BUCKETS):
+        self.bounds = bounds
+        self.reset()
+
+    def reset(self):
+        self.counts = [0] * (len(self.bounds) + 1)  # last bucket = +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    # Estimated from the buckets, interpolating linearly inside one
+    def percentile(self, q):
+        if self.count == 0:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                low = self.bounds[i - 1] if i > 0 else 0.0
+                high = self.bounds[i] if i < len(self.bounds) else self.bounds[-1]
+                return low + (high - low) * (rank - seen) / n
+            seen += n
+        return self.bounds[-1]
+
+
+#---------------------------------------------#
+# REGISTRY                                    #
+#                                             #
+#---------------------------------------------#
+class Metrics:
+    def __init__(self, prefix="signlang", enabled=False):
+        self.prefix = prefix
+        self.enabled = enabled
+        self.stages = {}
+        self.counters = {}
+        self.gauges = {}
+        self.collectors = []  # called before each export, e.g. to set gauges from queue stats
+
+    def clock(self):
+        return time.perf_counter() if self.enabled else None
+
+    # start: value of clock() when the stage began (None = not timed)
+    def observe(self, stage, start):
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages.setdefault(stage, Histogram())
+        histogram.observe(elapsed)
+
+    def count(self, name, n=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def set_gauge(self, name, value):
+        if self.enabled:
+            self.gauges[name] = value
+
+    def add_collector(self, collect):
+        self.collectors.append(collect)
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        return self.enabled
+
+    def reset(self):
+        for histogram in list(self.stages.values()):
+            histogram.reset()
+        self.counters.clear()
+        self.gauges.clear()
+
+    # Per stage: count, mean and estimated percentiles in ms
+    def summary(self):
+        summary = {}
+        for stage, h in sorted(self.stages.items()):
+            summary[stage] = {
+                "count": h.count,
+                "mean_ms": round(1000 * h.sum / max(h.count, 1), 3),
+                "p50_ms": round(1000 * h.percentile(50), 3),
+                "p95_ms": round(1000 * h.percentile(95), 3),
+                "p99_ms": round(1000 * h.percentile(99), 3),
+            }
+        return summary
+
+    def format_summary(self):
+        return " | ".join(f"{stage}: {s['mean_ms']}ms (p95 {s['p95_ms']}ms)"
+                          for stage, s in self.summary().items())
+
+    def format_counters(self):
+        return ", ".join(f"{name}={value}" for name, value in sorted(self.counters.items()))
+
+
+#---------------------------------------------#
+# PROMETHEUS TEXT FORMAT                      #
+#                                             #
+#---------------------------------------------#
+    def render(self):
+        for collect in self.collectors:
+            collect(self)
+        p = self.prefix
+        lines = [f"# TYPE {p}_metrics_enabled gauge", f"{p}_metrics_enabled {int(self.enabled)}"]
+
+        lines.append(f"# TYPE {p}_stage_seconds histogram")
+        for stage, h in sorted(self.stages.items()):
+            cumulative = 0
+            for bound, n in zip(h.bounds, h.counts):
+                cumulative += n
+                lines.append(f'{p}_stage_seconds_bucket{{stage="{stage}",le="{bound:g}"}} {cumulative}')
+            lines.append(f'{p}_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {h.count}')
+            lines.append(f'{p}_stage_seconds_sum{{stage="{stage}"}} {h.sum:.6f}')
+            lines.append(f'{p}_stage_seconds_count{{stage="{stage}"}} {h.count}')
+
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"# TYPE {p}_{name}_total counter")
+            lines.append(f"{p}_{name}_total {value}")
+        for name, value in sorted(self.gauges.items()):
+            lines.append(f"# TYPE {p}_{name} gauge")
+            lines.append(f"{p}_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()
+
+
+#---------------------------------------------#
+# HTTP ENDPOINT                               #
+#                                             #
+#---------------------------------------------#
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        metrics = self.server.metrics
+        path = self.path.split("?")[0]
+        if path == "/metrics":
+            body = metrics.render()
+        elif path == "/enable":
+            metrics.enable()
+            body = "enabled\n"
+        elif path == "/disable":
+            metrics.disable()
+            body = "disabled\n"
+        elif path == "/reset":
+            metrics.reset()
+            body = "reset\n"
+        else:
+            self.send_error(404)
+            return
+
+        data = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass  # no line per scrape
+
+
+class MetricsServer:
+    def __init__(self, metrics=METRICS, port=9100, host="127.0.0.1"):
+        self.httpd = ThreadingHTTPServer((host, port), _MetricsHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.metrics = metrics
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="metrics-http", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+#---------------------------------------------#
+# PERIODIC FILE DUMP                          #
+#                                             #
+#---------------------------------------------#
+class MetricsDumper(threading.Thread):
+    def __init__(self, path, metrics=METRICS, interval=5.0):
+        super(MetricsDumper, self).__init__(name="metrics-dump", daemon=True)
+        self.path = path
+        self.metrics = metrics
+        self.interval = interval
+        self.stop_event = threading.Event()
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            self.dump()
+
+    # Written under a temporary name, so readers never see a partial file
+    def dump(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.metrics.render())
+        os.replace(tmp_path, self.path)
+
+    def stop(self):
+        self.stop_event.set()
+        self.join(timeout=1.0)
+        self.dump()
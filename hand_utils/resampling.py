@@ -0,0 +1,120 @@
+#
+#
+# Resampling of landmark streams to the fixed rate the model was trained at.
+# HandTracker processes every frame it gets, at whatever rate the camera
+# delivers. LandmarkResampler turns those frames, using their capture
+# timestamps, into feature vectors on a regular 1 / rate grid by linear
+# interpolation, so nothing has to sleep or drop frames to "stay congruent"
+# with the model rate.
+#
+#
+
+import numpy as np
+
+try:
+    from hand_utils.features import MODEL_RATE
+except ImportError:
+    from features import MODEL_RATE
+
+HAND_BLOCKS = (0, 67)   # Right hand, Left hand in the create_landmark_array layout
+CONFIDENCE = 63         # offset of the handedness score inside a hand block
+
+
+class LandmarkResampler:
+
+#---------------------------------------------#
+# INITIALISE ATTRIBUTES                       #
+#                                             #
+#---------------------------------------------#
+    # rate:    output rate in Hz (the model's training rate)
+    # max_gap: longer gaps between frames (camera stall, no frames) restart the
+    #          grid instead of interpolating across them
+    # Works in float64 so epoch timestamps keep their precision.
+    def __init__(self, rate=MODEL_RATE, num_features=135, max_gap=0.5):
+        self.period = 1.0 / rate
+        self.max_gap = max_gap
+        self.previous = np.zeros(num_features, dtype=np.float64)
+        self.out = np.zeros((8, num_features), dtype=np.float64)
+        self.reset()
+
+        self.frames_in = 0
+        self.frames_out = 0
+        self.restarts = 0
+
+    def reset(self):
+        self.previous_time = None
+        self.grid_start = None
+        self.grid_index = 0    # next output is at grid_start + grid_index * period
+
+
+#---------------------------------------------#
+# FEED ONE FRAME                              #
+#                                             #
+#---------------------------------------------#
+    # Returns the output rows due up to `timestamp` (zero, one or several),
+    # as a view into an internal buffer that is reused on the next call.
+    # Column -1 of each row is its grid time.
+    def push(self, feature_vector, timestamp):
+        self.frames_in += 1
+        timestamp = float(timestamp)
+
+        gap = None if self.previous_time is None else timestamp - self.previous_time
+        if gap is None or gap <= 0 or gap > self.max_gap:
+            if gap is not None:
+                self.restarts += 1
+            self.previous[:] = feature_vector
+            self.previous_time = timestamp
+            self.grid_start = timestamp
+            self.grid_index = 1
+            self.out[0] = feature_vector
+            self.out[0, -1] = timestamp
+            self.frames_out += 1
+            return self.out[:1]
+
+        next_time = self.grid_start + self.grid_index * self.period
+        count = int(np.floor((timestamp - next_time) / self.period + 1e-9)) + 1 if timestamp >= next_time else 0
+        if count > 0:
+            if count > len(self.out):
+                self.out = np.zeros((count, self.out.shape[1]), dtype=np.float64)
+            times = next_time + np.arange(count) * self.period
+            self._interpolate(self.previous, feature_vector, (times - self.previous_time) / gap, self.out[:count])
+            self.out[:count, -1] = times
+            self.grid_index += count
+            self.frames_out += count
+
+        self.previous[:] = feature_vector
+        self.previous_time = timestamp
+        return self.out[:count]
+
+
+#---------------------------------------------#
+# INTERPOLATION                               #
+#                                             #
+#---------------------------------------------#
+    # Linear between the two frames. A hand missing in either frame is not
+    # faded in or out (that would shrink it towards the wrist), the block is
+    # taken from the nearest frame instead.
+    @staticmethod
+    def _interpolate(before, after, weights, out):
+        weights = weights[:, None]
+        np.subtract(after, before, out=out)
+        out *= weights
+        out += before
+
+        for start in HAND_BLOCKS:
+            if before[start + CONFIDENCE] == 0 or after[start + CONFIDENCE] == 0:
+                block = slice(start, start + 67)
+                out[:, block] = np.where(weights < 0.5, before[block], after[block])
+
+
+#---------------------------------------------#
+# RESAMPLE A WHOLE RECORDING                  #
+#                                             #
+#---------------------------------------------#
+# sequence: (frames, num_features) with capture timestamps in the last column
+def resample_sequence(sequence, rate=MODEL_RATE, max_gap=float("inf")):
+    resampler = LandmarkResampler(rate, sequence.shape[1], max_gap)
+    rows = []
+    for row in sequence:
+        rows.extend(resampler.push(row, row[-1]).copy())
+    return np.array(rows, dtype=np.float64).reshape(-1, sequence.shape[1])
@@ -0,0 +1,41 @@
+#
+#
+# Extract the landmark sequence of a recorded video, offline. 
+# Frames are processed as fast as they can be decoded, timestamps come from
+# the video's frame rate instead of the wall clock.
+#
+#
+
+import numpy as np
+from hand_utils.frame_sources import VideoFileSource
+from hand_utils.features import RAW_SHAPE, write_raw_landmarks, derive_features
+
+
+#---------------------------------------------#
+# VIDEO -> RAW MEDIAPIPE LANDMARKS            #
+#                                             #
+#---------------------------------------------#
+# Returns (raw (frames, 2, 64) float32, timestamps (frames,) float64),
+# see features.py
+def extract_video_raw_landmarks(video_path, hand_tracker, fps=None):
+    # Raw .h264 streams carry no frame rate, the source falls back to the recording rate
+    source = VideoFileSource(video_path, fps=fps)
+
+    raw_list = []
+    timestamps = []
+    for frame in source:
+        _, results = hand_tracker.process_frame(frame.image, mirrored=source.mirrored)
+        raw_list.append(write_raw_landmarks(results, np.empty(RAW_SHAPE, dtype=np.float32)))
+        timestamps.append(frame.timestamp)
+
+    source.release()
+    raw = np.array(raw_list, dtype=np.float32).reshape((-1,) + RAW_SHAPE)
+    return raw, np.array(timestamps, dtype=np.float64)
+
+
+#---------------------------------------------#
+# VIDEO -> (frames, 135) LANDMARK ARRAY       #
+#                                             #
+#---------------------------------------------#
+def extract_video_landmarks(video_path, hand_tracker, fps=None):
+    return derive_features(*extract_video_raw_landmarks(video_path, hand_tracker, fps))
@@ -0,0 +1,238 @@
+#
+#
+# Inference backends for SignLSTM on CPU.
+#   eager        the fp32 nn.Module from sign_lstm.pth (needs training/model.py)
+#   torchscript  fp32 traced TorchScript, loads without the Python class
+#   int8         dynamically quantized (int8 LSTM + Linear weights) TorchScript
+#   onnx         ONNX model run with onnxruntime
+#
+# Every backend is called like the model: logits = backend(x), with x a
+# float32 (batch, frames, 135) tensor.
+#
+# Usage:  python inference/backends.py export
+#         python inference/backends.py compare --data landmark_data/
+#
+#
+
+import os
+import sys
+
+# Add project root to the system path so you can import training.* and inference.*
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import argparse
+import copy
+import json
+import platform
+import time
+import numpy as np
+import torch
+import torch.nn as nn
+from training.model import load_sign_lstm
+from hand_utils.features import SEQUENCE_LENGTH
+
+BACKENDS = ("eager", "torchscript", "int8", "onnx")
+DEFAULT_PATHS = {
+    "eager": "sign_lstm.pth",
+    "torchscript": "sign_lstm_ts.pt",
+    "int8": "sign_lstm_int8.pt",
+    "onnx": "sign_lstm.onnx",
+}
+
+# ARM boards (Raspberry Pi) only have the qnnpack quantized kernels
+if platform.machine().lower() in ("aarch64", "arm64", "armv7l") and \
+        "qnnpack" in torch.backends.quantized.supported_engines:
+    torch.backends.quantized.engine = "qnnpack"
+
+
+#---------------------------------------------#
+# INT8 DYNAMIC QUANTIZATION                   #
+#                                             #
+#---------------------------------------------#
+# Weights are stored as int8, activations are quantized on the fly.
+# The result is still a SignLSTM, so it also works for streaming inference.
+def quantize_sign_lstm(model):
+    return torch.ao.quantization.quantize_dynamic(
+        copy.deepcopy(model).cpu(), {nn.LSTM, nn.Linear}, dtype=torch.qint8)
+
+
+#---------------------------------------------#
+# EXPORT                                      #
+#                                             #
+#---------------------------------------------#
+def export_models(model, out_dir=".", seq_length=SEQUENCE_LENGTH):
+    model = copy.deepcopy(model).cpu().eval()
+    example = torch.zeros(1, seq_length, 135)
+    paths = {name: os.path.join(out_dir, os.path.basename(path)) for name, path in DEFAULT_PATHS.items()}
+
+    with torch.no_grad():
+        torch.jit.save(torch.jit.trace(model, example), paths["torchscript"])
+        torch.jit.save(torch.jit.trace(quantize_sign_lstm(model), example), paths["int8"])
+
+    torch.onnx.export(
+        model, example, paths["onnx"],
+        input_names=["landmarks"], output_names=["logits"],
+        dynamic_axes={"landmarks": {0: "batch", 1: "frames"}, "logits": {0: "batch"}},
+        dynamo=False,
+    )
+    return paths
+
+
+#---------------------------------------------#
+# ONNX RUNTIME BACKEND                        #
+#                                             #
+#---------------------------------------------#
+class OnnxBackend:
+    def __init__(self, path, num_threads=None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, x):
+        x = x.detach().cpu().numpy().astype(np.float32, copy=False)
+        return torch.from_numpy(self.session.run(None, {self.input_name: x})[0])
+
+    def eval(self):
+        return self
+
+
+#---------------------------------------------#
+# LOAD A BACKEND                              #
+#                                             #
+#---------------------------------------------#
+# num_classes is only needed for the eager backend
+def load_backend(name, path=None, num_classes=None, device="cpu"):
+    path = path or DEFAULT_PATHS[name]
+    if name == "eager":
+        return load_sign_lstm(path, num_classes, device)
+    if name in ("torchscript", "int8"):
+        model = torch.jit.load(path, map_location="cpu")
+        model.eval()
+        return model
+    if name == "onnx":
+        return OnnxBackend(path)
+    raise ValueError(f"Unknown backend: {name}")
+
+
+#---------------------------------------------#
+# PARITY AND LATENCY                          #
+#                                             #
+#---------------------------------------------#
+def load_labelled_clips(data_dir, label_map, sequence_length=SEQUENCE_LENGTH):
+    from inference.batch_inference import find_inputs, RecordedClipDataset
+
+    paths = [p for p in find_inputs(data_dir) if p.endswith(".npy")]
+    dataset = RecordedClipDataset(paths, sequence_length)
+    clips = torch.stack([dataset[i][0] for i in range(len(dataset))])
+    labels = np.array([label_map.get(os.path.basename(os.path.dirname(p)), -1) for p in paths])
+    return clips, labels
+
+
+def time_backend(backend, x, repeats=200):
+    with torch.no_grad():
+        for _ in range(10):
+            backend(x)
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            backend(x)
+            times.append(time.perf_counter() - start)
+    return 1000 * np.median(times)
+
+
+def compare_backends(backends, clips, labels, seq_length=SEQUENCE_LENGTH):
+    results = {}
+    with torch.no_grad():
+        reference = torch.softmax(backends["eager"](clips), dim=1).numpy()
+        for name, backend in backends.items():
+            probs = torch.softmax(backend(clips), dim=1).numpy()
+            known = labels >= 0
+            results[name] = {
+                "accuracy": float((probs.argmax(1)[known] == labels[known]).mean()) if known.any() else None,
+                "agreement_with_fp32": float((probs.argmax(1) == reference.argmax(1)).mean()),
+                "max_prob_diff": float(np.abs(probs - reference).max()),
+                "latency_ms_window": time_backend(backend, clips[:1, :seq_length]),
+                "latency_ms_batch": time_backend(backend, clips[:256], repeats=20),
+            }
+    return results
+
+
+#---------------------------------------------#
+# MAIN                                        #
+#                                             #
+#---------------------------------------------#
+def main():
+    parser = argparse.ArgumentParser(description="Export SignLSTM backends and check their parity / latency")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export = subparsers.add_parser("export", help="write TorchScript, int8 and ONNX models")
+    export.add_argument("--model", default=DEFAULT_PATHS["eager"])
+    export.add_argument("--label-map", default="label_map.json")
+    export.add_argument("--out-dir", default=".")
+
+    compare = subparsers.add_parser("compare", help="accuracy parity and latency against the fp32 model")
+    compare.add_argument("--data", default="landmark_data/")
+    compare.add_argument("--model", default=DEFAULT_PATHS["eager"], help="fp32 reference weights")
+    compare.add_argument("--model-dir", default=".", help="where the exported models are")
+    compare.add_argument("--label-map", default="label_map.json")
+    compare.add_argument("--threads", type=int, default=None, help="torch.set_num_threads")
+    compare.add_argument("--tolerance", type=float, default=0.01,
+                         help="max allowed accuracy drop against fp32")
+    compare.add_argument("-o", "--output", help="write results as JSON")
+
+    args = parser.parse_args()
+
+    with open(args.label_map, "r") as f:
+        label_map = json.load(f)
+
+    if args.command == "export":
+        model = load_sign_lstm(args.model, len(label_map))
+        for name, path in export_models(model, args.out_dir).items():
+            if name != "eager":
+                print(f"[INFO] {name:12s} -> {path}")
+        return
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    backends = {}
+    for name in BACKENDS:
+        if name == "eager":
+            path = args.model
+        else:
+            path = os.path.join(args.model_dir, os.path.basename(DEFAULT_PATHS[name]))
+        start = time.perf_counter()
+        backends[name] = load_backend(name, path, num_classes=len(label_map))
+        print(f"[INFO] Loaded {name:12s} in {1000 * (time.perf_counter() - start):7.1f} ms")
+
+    clips, labels = load_labelled_clips(args.data, label_map)
+    results = compare_backends(backends, clips, labels)
+
+    print(f"{'backend':12s} {'accuracy':>9s} {'agree':>7s} {'max dp':>8s} {'window ms':>10s} {'batch ms':>9s}")
+    for name, r in results.items():
+        accuracy = f"{100 * r['accuracy']:.2f}%" if r["accuracy"] is not None else "-"
+        print(f"{name:12s} {accuracy:>9s} {100 * r['agreement_with_fp32']:6.2f}% "
+              f"{r['max_prob_diff']:8.4f} {r['latency_ms_window']:10.3f} {r['latency_ms_batch']:9.3f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    reference = results["eager"]["accuracy"]
+    if reference is not None:
+        failed = [n for n, r in results.items() if r["accuracy"] < reference - args.tolerance]
+        if failed:
+            print(f"[ERROR] Accuracy parity failed for: {', '.join(failed)}")
+            sys.exit(1)
+        print("[INFO] All backends within tolerance of the fp32 model.")
+
+
+if __name__ == "__main__":
+    main()
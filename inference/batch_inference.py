@@ -0,0 +1,180 @@
+#
+#
+# Offline batch inference over recorded data.
+# Scores a directory of .npy landmark sequences (landmark_data/<label>/ layout)
+# and/or recorded videos with SignLSTM in large padded batches.
+#
+# Usage:  python inference/batch_inference.py landmark_data/ -o predictions.npz
+#
+#
+
+import os
+import sys
+
+# Add project root to the system path so you can import training.* and hand_utils.*
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import argparse
+import csv
+import json
+import time
+import numpy as np
+import torch
+from torch.utils.data import Dataset, DataLoader
+from training.model import load_sign_lstm
+from hand_utils.features import SEQUENCE_LENGTH, prepare_sequence
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".h264")
+
+
+#---------------------------------------------#
+# FIND INPUT FILES                            #
+#                                             #
+#---------------------------------------------#
+def find_inputs(input_dir):
+    paths = []
+    for dirpath, _, files in os.walk(input_dir):
+        for file in files:
+            if file.endswith(".npy") or file.lower().endswith(VIDEO_EXTENSIONS):
+                paths.append(os.path.join(dirpath, file))
+    return sorted(paths)
+
+
+#---------------------------------------------#
+# DATASET OF RECORDED CLIPS                   #
+#                                             #
+#---------------------------------------------#
+# Loads and preprocesses each clip the same way LandmarkDataset does
+# (normalized timestamps, padded / trimmed to sequence_length).
+class RecordedClipDataset(Dataset):
+    def __init__(self, paths, sequence_length=SEQUENCE_LENGTH):
+        self.paths = paths
+        self.sequence_length = sequence_length
+        self.hand_tracker = None  # created lazily, one per DataLoader worker
+
+    def __len__(self):
+        return len(self.paths)
+
+    def load_sequence(self, path):
+        if path.endswith(".npy"):
+            return np.load(path)
+
+        from hand_utils.hand_tracker import HandTracker
+        from hand_utils.video_landmarks import extract_video_landmarks
+        if self.hand_tracker is None:
+            self.hand_tracker = HandTracker()
+        return extract_video_landmarks(path, self.hand_tracker)
+
+    def __getitem__(self, idx):
+        padded, length = prepare_sequence(self.load_sequence(self.paths[idx]), self.sequence_length)
+        return torch.from_numpy(padded), length
+
+    # Frames the model will see per clip, read from the .npy headers only
+    # (videos are not decoded up front and count as full length)
+    def lengths(self):
+        lengths = np.full(len(self.paths), self.sequence_length)
+        for i, path in enumerate(self.paths):
+            if path.endswith(".npy"):
+                lengths[i] = min(len(np.load(path, mmap_mode="r")), self.sequence_length)
+        return lengths
+
+
+#---------------------------------------------#
+# RUN THE MODEL OVER ALL CLIPS                #
+#                                             #
+#---------------------------------------------#
+# Clips are batched in order of length, so each batch is trimmed to nearly
+# its clips' own length and the packed LSTM has little padding to skip.
+# Results are returned in dataset order.
+def run_batch_inference(model, dataset, device, batch_size=256, num_workers=0):
+    order = np.argsort(dataset.lengths(), kind="stable")
+    loader = DataLoader(dataset, batch_size=batch_size, sampler=order.tolist(),
+                        num_workers=num_workers, pin_memory=device.type == "cuda")
+
+    all_probs = []
+    all_lengths = []
+    with torch.no_grad():
+        for sequences, lengths in loader:
+            outputs = model(sequences.to(device, non_blocking=True), lengths)
+            all_probs.append(torch.softmax(outputs, dim=1).cpu())
+            all_lengths.append(lengths)
+
+    probs = np.empty((len(order), all_probs[0].shape[1]), dtype=np.float32)
+    lengths = np.empty(len(order), dtype=np.int64)
+    probs[order] = torch.cat(all_probs).numpy()
+    lengths[order] = torch.cat(all_lengths).numpy()
+    return probs, lengths
+
+
+#---------------------------------------------#
+# WRITE RESULTS                               #
+#                                             #
+#---------------------------------------------#
+# .npz (compact, default) or .csv, one row per input file
+def save_predictions(output_path, paths, probs, lengths, label_map):
+    pred_idx = probs.argmax(axis=1)
+    confidence = probs.max(axis=1)
+    labels = np.array([label_map[int(i)] for i in pred_idx])
+
+    if output_path.endswith(".csv"):
+        # csv.writer quotes paths and labels that contain commas or quotes
+        with open(output_path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["path", "label", "confidence", "frames"])
+            for path, label, conf, length in zip(paths, labels, confidence, lengths):
+                writer.writerow([path, label, f"{conf:.4f}", int(length)])
+    else:
+        np.savez_compressed(
+            output_path,
+            paths=np.array(paths),
+            labels=labels,
+            pred_idx=pred_idx.astype(np.int16),
+            confidence=confidence.astype(np.float32),
+            probs=probs.astype(np.float16),
+            frames=lengths.astype(np.int32),
+            class_names=np.array([label_map[i] for i in sorted(label_map)]),
+        )
+
+
+#---------------------------------------------#
+# MAIN                                        #
+#                                             #
+#---------------------------------------------#
+def main():
+    parser = argparse.ArgumentParser(description="Batch SignLSTM inference over recorded landmark files and videos")
+    parser.add_argument("input_dir", help="directory of .npy landmark sequences and/or videos")
+    parser.add_argument("-o", "--output", default="predictions.npz", help=".npz or .csv")
+    parser.add_argument("--model", default="sign_lstm.pth")
+    parser.add_argument("--label-map", default="label_map.json")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--workers", type=int, default=0, help="DataLoader worker processes")
+    parser.add_argument("--sequence-length", type=int, default=SEQUENCE_LENGTH)
+    args = parser.parse_args()
+
+    with open(args.label_map, "r") as f:
+        label_map = {int(v): k for k, v in json.load(f).items()}
+
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    model = load_sign_lstm(args.model, len(label_map), device)
+
+    paths = find_inputs(args.input_dir)
+    if not paths:
+        print(f"[ERROR] No .npy or video files found in {args.input_dir}")
+        return
+    print(f"[INFO] Scoring {len(paths)} files...")
+
+    start_time = time.time()
+    dataset = RecordedClipDataset(paths, sequence_length=args.sequence_length)
+    probs, lengths = run_batch_inference(model, dataset, device, args.batch_size, args.workers)
+    elapsed = time.time() - start_time
+
+    save_predictions(args.output, paths, probs, lengths, label_map)
+    print(f"[INFO] {len(paths)} files in {elapsed:.2f}s ({len(paths) / elapsed:.1f} files/s)")
+    print(f"[INFO] Predictions saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#
+#
+# Temporal decoding between the softmax and the log.
+# Per-prediction probabilities are smoothed (EMA or majority vote over the
+# last k predictions), passed through hysteresis thresholds, and runs of the
+# same sign are collapsed into one event with start / end time and peak
+# confidence. The log gets one record per sign instead of one per frame.
+#
+#
+
+from collections import deque
+import numpy as np
+
+
+class SignEventDecoder:
+
+#---------------------------------------------#
+# INITIALISE ATTRIBUTES                       #
+#                                             #
+#---------------------------------------------#
+    # smoothing:     "ema", "vote" or "none"
+    # alpha:         EMA weight of the newest prediction
+    # vote_k:        predictions in the majority vote
+    # on_threshold:  smoothed confidence needed to start an event
+    # off_threshold: an event ends when its sign drops below this
+    # min_frames:    shorter events are dropped as blips
+    def __init__(self, smoothing="ema", alpha=0.5, vote_k=5,
+                 on_threshold=0.8, off_threshold=0.6, min_frames=1):
+        if smoothing not in ("ema", "vote", "none"):
+            raise ValueError(f"Unknown smoothing: {smoothing}")
+        if off_threshold > on_threshold:
+            raise ValueError("off_threshold must not be above on_threshold")
+
+        self.smoothing = smoothing
+        self.alpha = alpha
+        self.on_threshold = on_threshold
+        self.off_threshold = off_threshold
+        self.min_frames = min_frames
+
+        self.smoothed = None
+        self.history = deque(maxlen=vote_k)
+        self.event = None
+
+
+#---------------------------------------------#
+# SMOOTHING                                   #
+#                                             #
+#---------------------------------------------#
+    def _smooth(self, probs):
+        if self.smoothing == "ema":
+            if self.smoothed is None:
+                self.smoothed = probs.copy()
+            else:
+                self.smoothed += self.alpha * (probs - self.smoothed)
+            return self.smoothed
+
+        if self.smoothing == "vote":
+            # Each class scores its mean probability over the predictions it won
+            self.history.append(probs)
+            history = np.array(self.history)
+            winners = history.argmax(axis=1)
+            votes = np.bincount(winners, minlength=len(probs))
+            smoothed = np.zeros_like(probs)
+            best = votes.argmax()
+            smoothed[best] = history[winners == best, best].sum() / len(history)
+            return smoothed
+
+        return probs
+
+
+#---------------------------------------------#
+# FEED ONE PREDICTION                         #
+#                                             #
+#---------------------------------------------#
+    # probs: softmax output for one prediction (num_classes,)
+    # Returns (current label index or None, smoothed confidence, finished
+    # event or None). An event is a dict with label, start, end,
+    # peak_confidence and frames.
+    def update(self, probs, timestamp):
+        smoothed = self._smooth(np.asarray(probs, dtype=np.float32))
+        best = int(smoothed.argmax())
+        confidence = float(smoothed[best])
+        finished = None
+
+        if self.event is not None:
+            label = self.event["label"]
+            if smoothed[label] >= self.off_threshold:
+                self.event["end"] = timestamp
+                self.event["frames"] += 1
+                self.event["peak_confidence"] = max(self.event["peak_confidence"], float(probs[label]))
+                return label, float(smoothed[label]), None
+            finished = self._close()
+
+        if confidence >= self.on_threshold:
+            self.event = {
+                "label": best,
+                "start": timestamp,
+                "end": timestamp,
+                "peak_confidence": float(probs[best]),
+                "frames": 1,
+            }
+            return best, confidence, finished
+
+        return None, confidence, finished
+
+    # End of stream: returns the open event, if any
+    def flush(self):
+        return self._close()
+
+    def _close(self):
+        event, self.event = self.event, None
+        if event is not None and event["frames"] >= self.min_frames:
+            return event
+        return None
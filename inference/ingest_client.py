@@ -0,0 +1,117 @@
+#
+#
+# Edge client for inference/ingest_server.py: reads frames from any frame
+# source, runs MediaPipe locally and sends only the feature vectors.
+# With recorded .npy landmark files it needs no camera and no MediaPipe, so it
+# doubles as the local stand-in client for testing the server.
+#
+# Usage:  python inference/ingest_client.py --source landmark_data/ --realtime
+#         python inference/ingest_client.py --source picamera --host 192.168.0.10
+#
+#
+
+import os
+import sys
+
+# Add project root to the system path so you can import hand_utils.* and inference.*
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import argparse
+import socket
+import threading
+import time
+import numpy as np
+from inference import ingest_protocol as protocol
+from hand_utils.frame_sources import open_source
+
+
+#---------------------------------------------#
+# RECEIVE PREDICTIONS / EVENTS                #
+#                                             #
+#---------------------------------------------#
+def receive(sock, verbose, counts):
+    label_map = {}
+    with sock.makefile("rb") as f:
+        while True:
+            kind, value = protocol.read_message(f)
+            if kind is None:
+                return
+            if kind == protocol.LABELS:
+                label_map = value
+            elif kind == protocol.PREDICTION:
+                counts["predictions"] += 1
+                label, confidence, _ = value
+                if verbose and label is not None:
+                    print(f"[INFO] {label_map.get(label, label)} ({confidence:.2f})")
+            elif kind == protocol.EVENT:
+                counts["events"] += 1
+                print(f"[PREDICTED] {label_map.get(value['label'], value['label'])} "
+                      f"{value['start']:.2f}-{value['end']:.2f}s ({value['peak_confidence']:.2f})")
+
+
+def connect(host, port, unix_path=None):
+    if unix_path:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(unix_path)
+    else:
+        sock = socket.create_connection((host, port))
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)  # one small message per frame
+    return sock
+
+
+#---------------------------------------------#
+# MAIN                                        #
+#                                             #
+#---------------------------------------------#
+def main():
+    parser = argparse.ArgumentParser(description="Send landmark features to the ingestion server")
+    parser.add_argument("--source", default="landmark_data/",
+                        help="camera index, 'picamera', video, image folder or .npy landmark files")
+    parser.add_argument("--realtime", action="store_true", help="send recorded sources at their original rate")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="connect to a unix socket instead of TCP")
+    parser.add_argument("--verbose", action="store_true", help="print every prediction, not only events")
+    args = parser.parse_args()
+
+    source = open_source(args.source, realtime=args.realtime, mirror=False)
+    hand_tracker = None
+    feature_vector = np.empty(protocol.NUM_FEATURES, dtype=np.float32)
+
+    sock = connect(args.host, args.port, args.unix)
+    counts = {"predictions": 0, "events": 0}
+    receiver = threading.Thread(target=receive, args=(sock, args.verbose, counts), daemon=True)
+    receiver.start()
+
+    sent = 0
+    start = time.perf_counter()
+    try:
+        for frame in source:
+            if frame.features is not None:
+                features = frame.features
+            else:
+                if hand_tracker is None:
+                    from hand_utils.hand_tracker import HandTracker
+                    hand_tracker = HandTracker()
+                _, results = hand_tracker.process_frame(frame.image, mirrored=source.mirrored)
+                features = hand_tracker.write_landmark_array(results, feature_vector, timestamp=frame.timestamp)
+            sock.sendall(protocol.encode_frame(features, frame.timestamp))
+            sent += 1
+    except KeyboardInterrupt:
+        pass
+
+    # Half-close: the server flushes the open event, then closes
+    elapsed = time.perf_counter() - start
+    sock.shutdown(socket.SHUT_WR)
+    receiver.join(timeout=5.0)
+    sock.close()
+    source.release()
+    print(f"[STATS] Sent {sent} frames ({sent * (protocol.FRAME_SIZE + 1) / 1024:.0f} KB) in {elapsed:.1f}s, "
+          f"received {counts['predictions']} predictions and {counts['events']} events")
+
+
+if __name__ == "__main__":
+    main()
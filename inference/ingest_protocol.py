@@ -0,0 +1,104 @@
+#
+#
+# Binary framing between edge devices and the ingestion server.
+# Every message is a 1-byte type followed by a fixed-size little-endian
+# payload (or a 2-byte length and a JSON body for LABELS).
+#
+# Client -> server
+#   FRAME   'F'  float64 timestamp + 134 float32 features      (545 bytes)
+#   RESET   'R'  clear this client's window and events         (1 byte)
+#
+# Server -> client
+#   LABELS      'L'  uint16 length + JSON {index: label}, sent on connect
+#   PREDICTION  'P'  int16 label (-1 = no sign), float32 confidence, float64 timestamp
+#   EVENT       'E'  int16 label, float32 peak confidence, float64 start, float64 end, uint32 frames
+#
+# The 134 features are the create_landmark_array layout without the
+# timestamp column; the server puts the timestamp back as column 134.
+# Only needs numpy, so it runs on the edge devices.
+#
+#
+
+import json
+import struct
+import numpy as np
+
+NUM_FEATURES = 135
+
+FRAME = b"F"
+RESET = b"R"
+LABELS = b"L"
+PREDICTION = b"P"
+EVENT = b"E"
+
+FRAME_HEADER = struct.Struct("<d")
+FRAME_SIZE = FRAME_HEADER.size + 4 * (NUM_FEATURES - 1)
+LENGTH = struct.Struct("<H")
+PREDICTION_BODY = struct.Struct("<hfd")
+EVENT_BODY = struct.Struct("<hfddI")
+
+FEATURES_DTYPE = np.dtype("<f4")
+
+
+#---------------------------------------------#
+# CLIENT -> SERVER                            #
+#                                             #
+#---------------------------------------------#
+# feature_vector: 135 values, the last one is the timestamp
+def encode_frame(feature_vector, timestamp=None):
+    feature_vector = np.asarray(feature_vector)
+    if timestamp is None:
+        timestamp = float(feature_vector[-1])
+    features = feature_vector[:NUM_FEATURES - 1].astype(FEATURES_DTYPE, copy=False)
+    return FRAME + FRAME_HEADER.pack(timestamp) + features.tobytes()
+
+
+# payload: the FRAME_SIZE bytes after the type byte
+# out: optional float32 (135,) buffer to fill in place
+def decode_frame(payload, out=None):
+    timestamp, = FRAME_HEADER.unpack_from(payload)
+    if out is None:
+        out = np.empty(NUM_FEATURES, dtype=np.float32)
+    out[:NUM_FEATURES - 1] = np.frombuffer(payload, dtype=FEATURES_DTYPE, offset=FRAME_HEADER.size)
+    out[NUM_FEATURES - 1] = timestamp
+    return out, timestamp
+
+
+#---------------------------------------------#
+# SERVER -> CLIENT                            #
+#                                             #
+#---------------------------------------------#
+def encode_labels(label_map):
+    body = json.dumps({str(k): v for k, v in label_map.items()}).encode()
+    return LABELS + LENGTH.pack(len(body)) + body
+
+
+def encode_prediction(label, confidence, timestamp):
+    return PREDICTION + PREDICTION_BODY.pack(-1 if label is None else label, confidence, timestamp)
+
+
+def encode_event(event):
+    return EVENT + EVENT_BODY.pack(event["label"], event["peak_confidence"],
+                                   event["start"], event["end"], event["frames"])
+
+
+# Reads one server message from a blocking file-like object (socket.makefile("rb")).
+# Returns (type, value) or (None, None) when the connection is closed.
+def read_message(f):
+    kind = f.read(1)
+    if not kind:
+        return None, None
+
+    if kind == LABELS:
+        length, = LENGTH.unpack(f.read(LENGTH.size))
+        return kind, {int(k): v for k, v in json.loads(f.read(length)).items()}
+
+    if kind == PREDICTION:
+        label, confidence, timestamp = PREDICTION_BODY.unpack(f.read(PREDICTION_BODY.size))
+        return kind, (None if label < 0 else label, confidence, timestamp)
+
+    if kind == EVENT:
+        label, confidence, start, end, frames = EVENT_BODY.unpack(f.read(EVENT_BODY.size))
+        return kind, {"label": label, "peak_confidence": confidence, "start": start, "end": end, "frames": frames}
+
+    raise ValueError(f"Unknown message type: {kind!r}")
@@ -0,0 +1,188 @@
+#
+#
+# Landmark ingestion server: edge devices run MediaPipe themselves and send
+# 135-value feature vectors (~545 bytes per frame, see ingest_protocol.py)
+# instead of video. Every connection gets its own window and event decoder in
+# a MultiStreamDetector, so frames from all clients are batched together, and
+# predictions / events are streamed back on the same connection.
+#
+# Usage:  python inference/ingest_server.py --port 8765
+#         python inference/ingest_server.py --unix /tmp/signs.sock
+#
+#
+
+import os
+import sys
+
+# Add project root to the system path so you can import training.* and inference.*
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import argparse
+import asyncio
+import itertools
+import json
+import numpy as np
+from inference import ingest_protocol as protocol
+from inference.stream_server import MultiStreamDetector
+from hand_utils.features import MODEL_RATE, SEQUENCE_LENGTH
+
+MAX_WRITE_BUFFER = 64 * 1024  # per client; predictions are dropped above this, events never are
+
+
+#---------------------------------------------#
+# SERVER                                      #
+#                                             #
+#---------------------------------------------#
+class IngestServer:
+    # send_predictions: also send every prediction, not only finished events
+    def __init__(self, model, label_map, send_predictions=True, prediction_log=None, **detector_args):
+        self.label_map = label_map
+        self.send_predictions = send_predictions
+        self.prediction_log = prediction_log
+        self.detector = MultiStreamDetector(model, on_event=self._on_event,
+                                            on_prediction=self._on_prediction if send_predictions else None,
+                                            **detector_args)
+        self.clients = {}  # stream id -> StreamWriter
+        self.ids = itertools.count()
+        self.loop = None
+
+        self.frames = 0
+        self.dropped_messages = 0
+
+    async def start(self, host="0.0.0.0", port=8765, unix_path=None):
+        self.loop = asyncio.get_running_loop()
+        self.detector.start()
+        if unix_path:
+            return await asyncio.start_unix_server(self._handle, path=unix_path)
+        return await asyncio.start_server(self._handle, host, port)
+
+    def stop(self):
+        self.detector.stop()
+
+
+#---------------------------------------------#
+# ONE CLIENT                                  #
+#                                             #
+#---------------------------------------------#
+    async def _handle(self, reader, writer):
+        peer = writer.get_extra_info("peername") or "unix"
+        stream_id = f"{peer}#{next(self.ids)}"
+        self.clients[stream_id] = writer
+        self.detector.add_stream(stream_id)
+        writer.write(protocol.encode_labels(self.label_map))
+        print(f"[INFO] Client connected: {stream_id}")
+
+        feature_vector = np.empty(protocol.NUM_FEATURES, dtype=np.float32)
+        try:
+            while True:
+                kind = await reader.readexactly(1)
+                if kind == protocol.FRAME:
+                    payload = await reader.readexactly(protocol.FRAME_SIZE)
+                    _, timestamp = protocol.decode_frame(payload, out=feature_vector)
+                    self.detector.push(stream_id, feature_vector, timestamp)  # copied into the window
+                    self.frames += 1
+                elif kind == protocol.RESET:
+                    self.detector.remove_stream(stream_id)
+                    self.detector.add_stream(stream_id)
+                else:
+                    print(f"[ERROR] {stream_id}: unknown message type {kind!r}, closing")
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.detector.remove_stream(stream_id)
+            await asyncio.sleep(0)  # lets the open event go out before closing
+            del self.clients[stream_id]
+            writer.close()
+            print(f"[INFO] Client disconnected: {stream_id}")
+
+
+#---------------------------------------------#
+# RESULTS BACK TO THE CLIENTS                 #
+# called on the batching thread               #
+#---------------------------------------------#
+    def _send(self, stream_id, message, droppable):
+        writer = self.clients.get(stream_id)
+        if writer is None or writer.is_closing():
+            return
+        if droppable and writer.transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+            self.dropped_messages += 1  # slow client, don't queue up stale predictions
+            return
+        writer.write(message)
+
+    def _on_prediction(self, stream_id, label, confidence, timestamp):
+        self.loop.call_soon_threadsafe(self._send, stream_id,
+                                       protocol.encode_prediction(label, confidence, timestamp), True)
+
+    def _on_event(self, stream_id, event):
+        if self.prediction_log is not None:
+            self.prediction_log.write({
+                "stream": stream_id,
+                "timestamp": round(event["start"], 3),
+                "end": round(event["end"], 3),
+                "label": self.label_map[event["label"]],
+                "confidence": round(event["peak_confidence"], 3),
+                "frames": event["frames"],
+            })
+        self.loop.call_soon_threadsafe(self._send, stream_id, protocol.encode_event(event), False)
+
+
+#---------------------------------------------#
+# MAIN                                        #
+#                                             #
+#---------------------------------------------#
+async def serve(server, args):
+    listener = await server.start(args.host, args.port, args.unix)
+    where = args.unix or f"{args.host}:{args.port}"
+    print(f"[INFO] Listening on {where}, Ctrl+C to stop.")
+    async with listener:
+        while True:
+            await asyncio.sleep(args.stats_interval)
+            stats = server.detector.stats()
+            stats["clients"] = len(server.clients)
+            stats["dropped_messages"] = server.dropped_messages
+            print(f"[STATS] {stats}")
+
+
+def main():
+    from training.model import load_sign_lstm
+    from inference.prediction_log import PredictionLogWriter
+
+    parser = argparse.ArgumentParser(description="Receive landmark features from edge devices and return signs")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="listen on a unix socket instead of TCP")
+    parser.add_argument("--model", default="sign_lstm.pth")
+    parser.add_argument("--label-map", default="label_map.json")
+    parser.add_argument("--seq-length", type=int, default=SEQUENCE_LENGTH)
+    parser.add_argument("--stride", type=int, default=1, help="frames between predictions per client")
+    parser.add_argument("--rate", type=float, default=MODEL_RATE, help="resample clients to this rate (0 = off)")
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--events-only", action="store_true", help="don't send per-prediction messages")
+    parser.add_argument("--log", default="prediction_log.jsonl", help="event log ('' to disable)")
+    parser.add_argument("--stats-interval", type=float, default=10.0)
+    args = parser.parse_args()
+
+    with open(args.label_map, "r") as f:
+        label_map = {int(v): k for k, v in json.load(f).items()}
+    model = load_sign_lstm(args.model, len(label_map))
+    prediction_log = PredictionLogWriter(args.log) if args.log else None
+
+    server = IngestServer(model, label_map, send_predictions=not args.events_only,
+                          prediction_log=prediction_log, seq_length=args.seq_length, stride=args.stride,
+                          rate=args.rate or None, max_batch_size=args.max_batch_size, max_wait=args.max_wait_ms / 1000)
+    try:
+        asyncio.run(serve(server, args))
+    except KeyboardInterrupt:
+        pass
+    server.stop()
+    if prediction_log is not None:
+        prediction_log.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#
+#
+# Preallocated float32 window of the last `seq_length` feature vectors.
+# Frames are written straight into the buffer and the model input is a
+# zero-copy view over it, instead of converting a deque of lists every frame.
+# Timestamps are also kept in float64 (float32 cannot hold epoch times), so
+# model_input() normalizes them exactly like training does.
+#
+#
+
+import numpy as np
+import torch
+from hand_utils.features import NUM_FEATURES, SEQUENCE_LENGTH, timestamp_column
+
+
+class LandmarkWindow:
+
+#---------------------------------------------#
+# INITIALISE ATTRIBUTES                       #
+#                                             #
+#---------------------------------------------#
+    # Each frame is stored twice, at slot i and i + seq_length, so the last
+    # seq_length frames are always one contiguous, time-ordered slice.
+    def __init__(self, seq_length=SEQUENCE_LENGTH, num_features=NUM_FEATURES):
+        self.seq_length = seq_length
+        self.buffer = np.zeros((2 * seq_length, num_features), dtype=np.float32)
+        self.buffer_tensor = torch.from_numpy(self.buffer)
+        self.timestamps = np.zeros(2 * seq_length, dtype=np.float64)
+        self.input = np.zeros((seq_length, num_features), dtype=np.float32)
+        self.input_tensor = torch.from_numpy(self.input)
+        self.pos = 0      # slot the next frame goes into (= oldest frame)
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def is_full(self):
+        return self.count == self.seq_length
+
+    def clear(self):
+        self.pos = 0
+        self.count = 0
+
+
+#---------------------------------------------#
+# ADD A FRAME                                 #
+#                                             #
+#---------------------------------------------#
+    # Row to fill in place (e.g. with HandTracker.write_landmark_array),
+    # followed by commit(timestamp)
+    def next_row(self):
+        return self.buffer[self.pos]
+
+    # timestamp: float64 capture time of the row (default: its own, float32, last column)
+    def commit(self, timestamp=None):
+        row = self.buffer[self.pos]
+        timestamp = row[-1] if timestamp is None else timestamp
+        self.timestamps[self.pos] = self.timestamps[self.pos + self.seq_length] = timestamp
+        self.buffer[self.pos + self.seq_length] = row
+        self.pos = (self.pos + 1) % self.seq_length
+        self.count = min(self.count + 1, self.seq_length)
+
+    # feature_vector: float64 rows (e.g. from LandmarkResampler) keep their exact timestamp
+    def append(self, feature_vector, timestamp=None):
+        self.buffer[self.pos] = feature_vector
+        self.commit(feature_vector[-1] if timestamp is None else timestamp)
+
+
+#---------------------------------------------#
+# VIEWS OF THE CURRENT WINDOW                 #
+#                                             #
+#---------------------------------------------#
+    # Oldest to newest, (count, num_features), no copy
+    def array(self):
+        end = self.pos + self.seq_length
+        return self.buffer[end - self.count:end]
+
+    def tensor(self):
+        end = self.pos + self.seq_length
+        return self.buffer_tensor[end - self.count:end]
+
+    # The model input: the window with its timestamps normalized to [0, 1]
+    # (features.normalize_timestamps). (count, num_features), written into a
+    # reused buffer, so it is only valid until the next call.
+    def model_input(self):
+        end = self.pos + self.seq_length
+        start = end - self.count
+        self.input[:self.count] = self.buffer[start:end]
+        if self.count:
+            self.input[:self.count, -1] = timestamp_column(self.timestamps[start:end])
+        return self.input_tensor[:self.count]
@@ -0,0 +1,161 @@
+#
+#
+# A small threaded pipeline: a capture thread followed by worker stages,
+# connected by bounded queues that drop the oldest item when full.
+# Throughput is bounded by the slowest stage instead of the sum of all stages.
+#
+#
+
+import threading
+import time
+from collections import deque
+
+
+#---------------------------------------------#
+# BOUNDED QUEUE, DROPS OLDEST WHEN FULL       #
+#                                             #
+#---------------------------------------------#
+class DropOldestQueue:
+    def __init__(self, maxsize=2):
+        self.maxsize = maxsize
+        self.items = deque()
+        self.cond = threading.Condition()
+        self.closed = False
+        self.dropped = 0
+        self.max_depth = 0
+
+    def put(self, item):
+        with self.cond:
+            if len(self.items) >= self.maxsize:
+                self.items.popleft()
+                self.dropped += 1
+            self.items.append(item)
+            self.max_depth = max(self.max_depth, len(self.items))
+            self.cond.notify()
+
+    # Returns None on timeout, or once the queue is closed and empty
+    def get(self, timeout=None):
+        with self.cond:
+            if not self.items and not self.closed:
+                self.cond.wait(timeout)
+            if not self.items:
+                return None
+            return self.items.popleft()
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def is_finished(self):
+        with self.cond:
+            return self.closed and not self.items
+
+    def depth(self):
+        with self.cond:
+            return len(self.items)
+
+
+#---------------------------------------------#
+# ONE STAGE = ONE THREAD                      #
+#                                             #
+#---------------------------------------------#
+# `func` maps an item from `in_queue` to an item for `out_queue`; returning
+# None drops the item. With no `in_queue` the stage is a source: `func` is
+# called with no argument and returning None ends the stream.
+class PipelineStage(threading.Thread):
+    def __init__(self, name, func, in_queue, out_queue, stop_event):
+        super(PipelineStage, self).__init__(name=name, daemon=True)
+        self.func = func
+        self.in_queue = in_queue
+        self.out_queue = out_queue
+        self.stop_event = stop_event
+        self.processed = 0
+        self.skipped = 0
+        self.busy_time = 0.0
+
+    def run(self):
+        try:
+            while not self.stop_event.is_set():
+                if self.in_queue is None:
+                    start = time.perf_counter()
+                    result = self.func()
+                else:
+                    item = self.in_queue.get()
+                    if item is None:
+                        break
+                    start = time.perf_counter()
+                    result = self.func(item)
+                self.busy_time += time.perf_counter() - start
+
+                if result is not None:
+                    self.processed += 1
+                    self.out_queue.put(result)
+                elif self.in_queue is None:
+                    break   # end of stream
+                else:
+                    self.skipped += 1
+        finally:
+            self.out_queue.close()
+
+
+#---------------------------------------------#
+# THE PIPELINE                                #
+#                                             #
+#---------------------------------------------#
+# stages: list of (name, func), the first one being the source.
+# Results of the last stage are read on the calling thread with get(), so
+# rendering (cv2.imshow must run on the main thread) stays out of the workers.
+class DetectionPipeline:
+    def __init__(self, stages, queue_size=2):
+        self.stop_event = threading.Event()
+        self.queues = []
+        self.stages = []
+
+        in_queue = None
+        for name, func in stages:
+            out_queue = DropOldestQueue(queue_size)
+            self.stages.append(PipelineStage(name, func, in_queue, out_queue, self.stop_event))
+            self.queues.append(out_queue)
+            in_queue = out_queue
+
+        self.output = in_queue
+
+    def start(self):
+        for stage in self.stages:
+            stage.start()
+
+    def stop(self):
+        self.stop_event.set()
+        for q in self.queues:
+            q.close()
+        for stage in self.stages:
+            stage.join(timeout=1.0)
+
+    def get(self, timeout=0.1):
+        return self.output.get(timeout)
+
+    def is_finished(self):
+        return self.output.is_finished()
+
+    # Per-stage counters: items produced, items the stage dropped itself,
+    # mean time per call and the depth / drops of its output queue
+    def stats(self):
+        stats = {}
+        for stage, q in zip(self.stages, self.queues):
+            calls = stage.processed + stage.skipped
+            stats[stage.name] = {
+                "processed": stage.processed,
+                "skipped": stage.skipped,
+                "mean_ms": round(1000 * stage.busy_time / max(calls, 1), 2),
+                "queue_depth": q.depth(),
+                "max_queue_depth": q.max_depth,
+                "dropped": q.dropped,
+            }
+        return stats
+
+    def format_stats(self):
+        return " | ".join(
+            f"{name}: {s['processed']} ok, {s['mean_ms']}ms, q={s['queue_depth']}/{s['max_queue_depth']}, dropped={s['dropped']}"
+            for name, s in self.stats().items()
+        )
@@ -0,0 +1,206 @@
+#
+#
+# Append-only prediction log.
+# PredictionLogWriter appends one JSON record per line (JSON Lines) from a
+# background thread, in batches, and rotates the file by size and/or age.
+# write() only puts the record on a queue, so it never blocks the frame loop,
+# and a crash loses at most the last flush interval.
+#
+# Also a small offline tool for old and new logs:
+#   python inference/prediction_log.py convert prediction_log.json prediction_log.jsonl
+#   python inference/prediction_log.py query prediction_log*.jsonl --label thanks --min-confidence 0.9
+#   python inference/prediction_log.py summary prediction_log*.jsonl
+#
+#
+
+import argparse
+import csv
+import json
+import os
+import queue
+import threading
+import time
+from collections import Counter
+
+_STOP = object()
+
+
+#---------------------------------------------#
+# BACKGROUND WRITER                           #
+#                                             #
+#---------------------------------------------#
+class PredictionLogWriter:
+    # max_bytes:       rotate when the file grows past this size (None = never)
+    # rotate_interval: rotate after this many seconds (None = never)
+    def __init__(self, path="prediction_log.jsonl", flush_interval=1.0, batch_size=256,
+                 max_bytes=10 * 1024 * 1024, rotate_interval=None):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+
+        self.written = 0
+        self.rotations = 0
+        self.queue = queue.SimpleQueue()
+        self._open()
+        self.thread = threading.Thread(target=self._run, name="prediction-log", daemon=True)
+        self.thread.start()
+
+    def write(self, record):
+        self.queue.put(record)
+
+    def close(self):
+        self.queue.put(_STOP)
+        self.thread.join()
+        self.file.close()
+
+    def _open(self):
+        self.file = open(self.path, "a")
+        self.opened_at = time.time()
+
+    def _rotate(self):
+        self.file.close()
+        # prediction_log.20250101-120000-000.jsonl, names sort in rotation order
+        base, ext = os.path.splitext(self.path)
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        suffix = 0
+        while os.path.exists(f"{base}.{stamp}-{suffix:03d}{ext}"):
+            suffix += 1
+        rotated = f"{base}.{stamp}-{suffix:03d}{ext}"
+        os.replace(self.path, rotated)
+        self.rotations += 1
+        self._open()
+
+    def _flush(self, batch):
+        if batch:
+            self.file.write("".join(json.dumps(r, separators=(",", ":")) + "\n" for r in batch))
+            self.file.flush()
+            self.written += len(batch)
+
+        too_big = self.max_bytes is not None and self.file.tell() >= self.max_bytes
+        too_old = self.rotate_interval is not None and time.time() - self.opened_at >= self.rotate_interval
+        if (too_big or too_old) and self.file.tell() > 0:
+            self._rotate()
+
+    def _run(self):
+        batch = []
+        last_flush = time.monotonic()
+        while True:
+            timeout = max(0.0, self.flush_interval - (time.monotonic() - last_flush))
+            try:
+                record = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                record = None
+
+            if record is _STOP:
+                self._flush(batch)
+                return
+            if record is not None:
+                batch.append(record)
+
+            if len(batch) >= self.batch_size or time.monotonic() - last_flush >= self.flush_interval:
+                self._flush(batch)
+                batch = []
+                last_flush = time.monotonic()
+
+
+#---------------------------------------------#
+# READ LOGS                                   #
+# .jsonl, or the old .json array format       #
+#---------------------------------------------#
+def read_log(path):
+    with open(path, "r") as f:
+        if path.endswith(".json"):
+            for record in json.load(f):
+                yield record
+            return
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # truncated last line after a crash
+
+
+def read_logs(paths):
+    for path in sorted(paths):
+        for record in read_log(path):
+            yield record
+
+
+def filter_records(records, label=None, min_confidence=None, since=None, until=None):
+    for record in records:
+        if label is not None and record.get("label") != label:
+            continue
+        if min_confidence is not None and record.get("confidence", 0) < min_confidence:
+            continue
+        if since is not None and record.get("timestamp", 0) < since:
+            continue
+        if until is not None and record.get("timestamp", 0) > until:
+            continue
+        yield record
+
+
+#---------------------------------------------#
+# WRITE LOGS                                  #
+#                                             #
+#---------------------------------------------#
+def write_records(records, path):
+    records = list(records)
+    if path.endswith(".csv"):
+        columns = sorted({key for record in records for key in record})
+        # Labels and paths can contain commas or quotes, csv quotes them
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=columns, restval="")
+            writer.writeheader()
+            writer.writerows(records)
+    else:
+        with open(path, "w") as f:
+            for record in records:
+                f.write(json.dumps(record, separators=(",", ":")) + "\n")
+    return len(records)
+
+
+#---------------------------------------------#
+# MAIN                                        #
+#                                             #
+#---------------------------------------------#
+def main():
+    parser = argparse.ArgumentParser(description="Convert and query prediction logs")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    convert = subparsers.add_parser("convert", help="convert .json/.jsonl logs to .jsonl or .csv")
+    convert.add_argument("inputs", nargs="+")
+    convert.add_argument("output")
+
+    for name in ("query", "summary"):
+        sub = subparsers.add_parser(name)
+        sub.add_argument("inputs", nargs="+")
+        sub.add_argument("--label")
+        sub.add_argument("--min-confidence", type=float)
+        sub.add_argument("--since", type=float, help="timestamp (s)")
+        sub.add_argument("--until", type=float, help="timestamp (s)")
+
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        count = write_records(read_logs(args.inputs), args.output)
+        print(f"[INFO] Wrote {count} records to {args.output}")
+        return
+
+    records = filter_records(read_logs(args.inputs), args.label, args.min_confidence, args.since, args.until)
+    if args.command == "query":
+        for record in records:
+            print(json.dumps(record))
+    else:
+        counts = Counter()
+        for record in records:
+            counts[record.get("label")] += 1
+        for label, count in counts.most_common():
+            print(f"{label}: {count}")
+
+
+if __name__ == "__main__":
+    main()
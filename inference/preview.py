@@ -0,0 +1,139 @@
+#
+#
+# Optional preview for headless detection: annotated frames streamed as
+# MJPEG over HTTP (open http://127.0.0.1:8080/ in a browser).
+# The detection loop only hands its latest result over with submit(), which
+# never blocks. Drawing and JPEG encoding run on a separate thread, at most
+# `fps` times per second and only while someone is watching, so detection
+# throughput is the same with or without viewers.
+#
+#
+
+import threading
+import time
+import cv2
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BOUNDARY = "frame"
+
+
+#---------------------------------------------#
+# HTTP HANDLER                                #
+#                                             #
+#---------------------------------------------#
+class _MjpegHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        preview = self.server.preview
+        if self.path.split("?")[0] not in ("/", "/stream.mjpg"):
+            self.send_error(404)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY}")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        preview.add_viewer()
+        try:
+            sequence = -1
+            while not preview.stopped:
+                jpeg, sequence = preview.wait_jpeg(sequence, timeout=1.0)
+                if jpeg is None:
+                    continue
+                self.wfile.write(f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                                 f"Content-Length: {len(jpeg)}\r\n\r\n".encode())
+                self.wfile.write(jpeg)
+                self.wfile.write(b"\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # viewer closed the page
+        finally:
+            preview.remove_viewer()
+
+    def log_message(self, format, *args):
+        pass
+
+
+#---------------------------------------------#
+# MJPEG PREVIEW                               #
+#                                             #
+#---------------------------------------------#
+# render(item) draws on the item's frame and returns it (BGR)
+class MjpegPreview:
+    def __init__(self, render, port=8080, host="127.0.0.1", fps=10.0, quality=70):
+        self.render = render
+        self.period = 1.0 / fps if fps > 0 else 0.0
+        self.quality = quality
+
+        self.cond = threading.Condition()
+        self.latest = None       # newest submitted item, older ones are simply replaced
+        self.jpeg = None
+        self.sequence = 0        # bumped for every encoded frame
+        self.viewers = 0
+        self.stopped = False
+        self.encoded = 0
+
+        self.httpd = ThreadingHTTPServer((host, port), _MjpegHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.preview = self
+        self.server_thread = threading.Thread(target=self.httpd.serve_forever, name="mjpeg-http", daemon=True)
+        self.render_thread = threading.Thread(target=self._run, name="mjpeg-render", daemon=True)
+
+    def start(self):
+        self.server_thread.start()
+        self.render_thread.start()
+        return self
+
+    # Called by the detection loop for every result, O(1) and never blocks on viewers
+    def submit(self, item):
+        with self.cond:
+            self.latest = item
+            self.cond.notify_all()
+
+    def add_viewer(self):
+        with self.cond:
+            self.viewers += 1
+            self.cond.notify_all()
+
+    def remove_viewer(self):
+        with self.cond:
+            self.viewers -= 1
+
+    # Returns (jpeg, sequence) once a frame newer than `sequence` exists, (None, sequence) on timeout
+    def wait_jpeg(self, sequence, timeout):
+        with self.cond:
+            if self.sequence == sequence and not self.stopped:
+                self.cond.wait(timeout)
+            if self.sequence == sequence:
+                return None, sequence
+            return self.jpeg, self.sequence
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not self.stopped and (self.viewers == 0 or self.latest is None):
+                    self.cond.wait()
+                if self.stopped:
+                    return
+                item = self.latest
+                self.latest = None
+
+            start = time.perf_counter()
+            frame = self.render(item)
+            ok, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+            if ok:
+                with self.cond:
+                    self.jpeg = jpeg.tobytes()
+                    self.sequence += 1
+                    self.encoded += 1
+                    self.cond.notify_all()
+
+            # Decimate to `fps`, frames submitted meanwhile are replaced by newer ones
+            time.sleep(max(0.0, start + self.period - time.perf_counter()))
+
+    def stop(self):
+        with self.cond:
+            self.stopped = True
+            self.cond.notify_all()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.render_thread.join(timeout=1.0)
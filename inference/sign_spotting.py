@@ -0,0 +1,218 @@
+#
+#
+# Sign spotting over long recordings (hour-long sessions, not 3 s clips).
+# The SignLSTM window slides over the whole landmark stream with a given
+# stride, and the predictions go through SignEventDecoder, so the output is a
+# list of sign events with start / end times.
+#
+#   - Landmark files are read lazily in chunks (np.load with mmap_mode, or the
+#     packed dataset's memory map), so memory does not grow with the length of
+#     the recording.
+#   - Frames are resampled to the model rate on their timestamps, like live
+#     detection does.
+#   - Overlapping windows share their frames: every frame is read, resampled
+#     and stored once in a block buffer, and the windows are strided views
+#     over it, run through the model in large batches. (The LSTM state itself
+#     cannot be shared: each window starts from a zero state and its own
+#     normalized timestamps, as in training.)
+#   - spot_signs() is a generator: events come out while the stream is read.
+#
+# Usage:  python inference/sign_spotting.py session.npy --stride 5 -o events.jsonl
+#         python inference/sign_spotting.py landmark_data_packed/ --packed
+#
+#
+
+import os
+import sys
+
+# Add project root to the system path so you can import hand_utils.*, inference.* and training.*
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import argparse
+import json
+import time
+import numpy as np
+import torch
+from numpy.lib.stride_tricks import sliding_window_view
+from hand_utils.features import MODEL_RATE, SEQUENCE_LENGTH, timestamp_column
+from hand_utils.resampling import LandmarkResampler
+from inference.event_decoder import SignEventDecoder
+
+
+#---------------------------------------------#
+# LAZY LANDMARK READERS                       #
+# yield (frames, 135) float64 chunks          #
+#---------------------------------------------#
+def read_npy_chunks(path, chunk_frames=4096):
+    sequence = np.load(path, mmap_mode="r")
+    for start in range(0, len(sequence), chunk_frames):
+        yield np.array(sequence[start:start + chunk_frames], dtype=np.float64)
+
+
+# The packed dataset stores timestamps normalized per clip, so its frames get
+# synthetic timestamps on the 1 / rate grid instead (clip after clip).
+# Yields (source name, chunks).
+def read_packed_clips(packed_dir, rate=MODEL_RATE, chunk_frames=4096):
+    from training.packed_dataset import PackedLandmarkDataset, SOURCES_FILE
+
+    dataset = PackedLandmarkDataset(packed_dir, label_map_path=None)
+    with open(os.path.join(packed_dir, SOURCES_FILE), "r") as f:
+        sources = [line.strip() for line in f if line.strip()]
+
+    def chunks(offset, length):
+        for start in range(0, length, chunk_frames):
+            end = min(start + chunk_frames, length)
+            chunk = np.array(dataset.data[offset + start:offset + end], dtype=np.float64)
+            chunk[:, -1] = np.arange(start, end) / rate
+            yield chunk
+
+    for (offset, length, _), source in zip(dataset.index, sources):
+        yield source, chunks(int(offset), int(length))
+
+
+#---------------------------------------------#
+# SLIDING-WINDOW PREDICTIONS                  #
+#                                             #
+#---------------------------------------------#
+# Runs every complete window in block[:count] (window ends next_end,
+# next_end + stride, ...) through the model, batch_size windows at a time.
+# The windows are strided views over the block, each frame is stored once.
+# Yields (timestamp of the window's last frame, probs).
+def _block_predictions(model, block, times, count, next_end, seq_length, stride, batch_size, device):
+    ends = np.arange(next_end, count, stride)
+    if len(ends) == 0:
+        return
+    frames = sliding_window_view(block[:count], seq_length, axis=0)       # (windows, features, frames)
+    window_times = sliding_window_view(times[:count], seq_length)          # (windows, frames)
+
+    for i in range(0, len(ends), batch_size):
+        starts = ends[i:i + batch_size] - (seq_length - 1)
+        windows = np.ascontiguousarray(frames[starts].transpose(0, 2, 1))
+        # Same normalization as LandmarkWindow.model_input, on the float64 timestamps
+        windows[:, :, -1] = timestamp_column(window_times[starts])
+        with torch.no_grad():
+            probs = torch.softmax(model(torch.from_numpy(windows).to(device)), dim=1).cpu().numpy()
+        for end, p in zip(ends[i:i + batch_size], probs):
+            yield times[end], p
+
+
+# chunks: iterable of (frames, 135) float64 arrays with capture timestamps.
+# Yields (timestamp, probs) for every window, `stride` model-rate frames apart,
+# in order. Memory is bounded by block_frames, whatever the recording length.
+def window_predictions(chunks, model, seq_length=SEQUENCE_LENGTH, stride=5, rate=MODEL_RATE, device="cpu",
+                       batch_size=256, block_frames=4096):
+    num_features = model.lstm.input_size
+    resampler = LandmarkResampler(rate, num_features, max_gap=float("inf"))  # long pauses are part of the recording
+    block = np.zeros((block_frames + seq_length, num_features), dtype=np.float32)
+    times = np.zeros(block_frames + seq_length, dtype=np.float64)  # float32 cannot hold epoch times
+    count = 0
+    next_end = seq_length - 1  # block row the next window ends on
+
+    for chunk in chunks:
+        for frame in chunk:
+            for row in resampler.push(frame, frame[-1]):
+                block[count] = row
+                times[count] = row[-1]
+                count += 1
+                if count < len(block):
+                    continue
+
+                yield from _block_predictions(model, block, times, count, next_end,
+                                              seq_length, stride, batch_size, device)
+                # Keep only the frames later windows still need
+                next_end += -(-(count - next_end) // stride) * stride
+                keep_from = next_end - (seq_length - 1)
+                block[:count - keep_from] = block[keep_from:count]
+                times[:count - keep_from] = times[keep_from:count]
+                count -= keep_from
+                next_end -= keep_from
+
+    yield from _block_predictions(model, block, times, count, next_end, seq_length, stride, batch_size, device)
+
+
+#---------------------------------------------#
+# SIGN EVENTS                                 #
+#                                             #
+#---------------------------------------------#
+# Yields the decoder's events (label, start, end, peak_confidence, frames)
+# as soon as each one ends. decoder_args go to SignEventDecoder.
+def spot_signs(chunks, model, seq_length=SEQUENCE_LENGTH, stride=5, rate=MODEL_RATE, device="cpu", batch_size=256,
+               **decoder_args):
+    decoder = SignEventDecoder(**decoder_args)
+    for timestamp, probs in window_predictions(chunks, model, seq_length, stride, rate, device, batch_size):
+        _, _, event = decoder.update(probs, timestamp)
+        if event is not None:
+            yield event
+    event = decoder.flush()
+    if event is not None:
+        yield event
+
+
+#---------------------------------------------#
+# MAIN                                        #
+#                                             #
+#---------------------------------------------#
+def main():
+    from training.model import load_sign_lstm
+
+    parser = argparse.ArgumentParser(description="Find sign events in long landmark recordings")
+    parser.add_argument("inputs", nargs="+", help=".npy landmark recordings, or packed dataset directories with --packed")
+    parser.add_argument("--packed", action="store_true", help="inputs are packed datasets, every clip is one recording")
+    parser.add_argument("--model", default="sign_lstm.pth")
+    parser.add_argument("--label-map", default="label_map.json")
+    parser.add_argument("--seq-length", type=int, default=SEQUENCE_LENGTH)
+    parser.add_argument("--stride", type=int, default=5, help="model-rate frames between windows")
+    parser.add_argument("--batch-size", type=int, default=256, help="windows per forward pass")
+    parser.add_argument("--rate", type=float, default=MODEL_RATE, help="model rate the recordings are resampled to")
+    parser.add_argument("--on-threshold", type=float, default=0.8)
+    parser.add_argument("--off-threshold", type=float, default=0.6)
+    parser.add_argument("--min-frames", type=int, default=2, help="shortest event, in windows")
+    parser.add_argument("--smoothing", choices=["ema", "vote", "none"], default="ema")
+    parser.add_argument("-o", "--output", help="write the events as JSON Lines")
+    args = parser.parse_args()
+
+    with open(args.label_map, "r") as f:
+        label_map = {int(v): k for k, v in json.load(f).items()}
+    model = load_sign_lstm(args.model, len(label_map))
+
+    recordings = []
+    for path in args.inputs:
+        if args.packed:
+            recordings.extend(read_packed_clips(path, args.rate))
+        else:
+            recordings.append((path, read_npy_chunks(path)))
+
+    out = open(args.output, "w") if args.output else None
+    decoder_args = dict(smoothing=args.smoothing, on_threshold=args.on_threshold,
+                        off_threshold=args.off_threshold, min_frames=args.min_frames)
+    num_events = 0
+    start = time.perf_counter()
+
+    for source, chunks in recordings:
+        for event in spot_signs(chunks, model, args.seq_length, args.stride, args.rate,
+                                batch_size=args.batch_size, **decoder_args):
+            num_events += 1
+            # Predictions carry the time of their window's last frame, the sign started up to a window earlier
+            record = {
+                "source": source,
+                "label": label_map[event["label"]],
+                "start": round(event["start"] - (args.seq_length - 1) / args.rate, 3),
+                "end": round(event["end"], 3),
+                "confidence": round(event["peak_confidence"], 3),
+                "windows": event["frames"],
+            }
+            print(f"[PREDICTED] {source}: {record['label']} {record['start']:.2f}-{record['end']:.2f} "
+                  f"({record['confidence']:.2f})")
+            if out is not None:
+                out.write(json.dumps(record) + "\n")
+
+    if out is not None:
+        out.close()
+    print(f"[STATS] {num_events} events in {len(recordings)} recordings, {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,399 @@
+#
+#
+# Multi-stream detection: one process handles many camera feeds.
+# Each stream keeps its own window and event decoder; windows that are ready
+# are gathered across all streams and run through SignLSTM as one batched
+# forward pass, on a micro-batching schedule (max batch size / max wait).
+#
+# Usage:  python inference/stream_server.py --sources 0 1 recorded_videos/a.mp4
+#         python inference/stream_server.py --load-test 1,4,16,64
+#
+#
+
+import os
+import sys
+
+# Add project root to the system path so you can import hand_utils.*, training.* and inference.*
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import argparse
+import json
+import threading
+import time
+from collections import deque
+import numpy as np
+import torch
+from inference.landmark_window import LandmarkWindow
+from inference.event_decoder import SignEventDecoder
+from hand_utils.resampling import LandmarkResampler
+from hand_utils.features import MODEL_RATE, SEQUENCE_LENGTH
+
+
+#---------------------------------------------#
+# PER-STREAM STATE                            #
+#                                             #
+#---------------------------------------------#
+class StreamState:
+    def __init__(self, stream_id, seq_length, decoder, rate=None):
+        self.stream_id = stream_id
+        self.window = LandmarkWindow(seq_length)
+        self.resampler = LandmarkResampler(rate) if rate else None
+        self.decoder = decoder
+        self.frames_since_prediction = 0
+        self.pending = False       # waiting in the ready queue
+        self.ready_time = None
+        self.timestamp = None      # timestamp of the newest frame
+        self.label = None          # current label index (None = no sign)
+        self.confidence = 0.0
+        self.removed = False       # set (under decoder_lock) once the stream's final event was flushed
+
+
+#---------------------------------------------#
+# MICRO-BATCHING DETECTOR                     #
+#                                             #
+#---------------------------------------------#
+# push() is called from any thread (one per camera, socket client, ...).
+# A stream becomes ready when its window is full and `stride` new frames
+# arrived since its last prediction. The batching thread runs a batch as soon
+# as max_batch_size streams are ready, or max_wait seconds after the first
+# one became ready. Each stream is in a batch at most once, with its newest
+# window.
+class MultiStreamDetector:
+    # rate: resample every stream to this many frames per second (None = use frames as they come)
+    def __init__(self, model, seq_length=SEQUENCE_LENGTH, stride=1, max_batch_size=64, max_wait=0.005, rate=None,
+                 decoder_factory=SignEventDecoder, on_event=None, on_prediction=None, device="cpu"):
+        self.model = model
+        self.seq_length = seq_length
+        self.rate = rate
+        self.stride = stride
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.decoder_factory = decoder_factory
+        self.on_event = on_event
+        self.on_prediction = on_prediction  # called with (stream_id, label, confidence, timestamp)
+        self.device = device
+
+        self.cond = threading.Condition()
+        # Held while decoders are updated or flushed: a batch in flight never
+        # updates a decoder during or after its stream's final flush.
+        # Reentrant, on_event / on_prediction may remove streams.
+        self.decoder_lock = threading.RLock()
+        self.streams = {}
+        self.ready = deque()
+        self.stop_event = threading.Event()
+
+        self.frames = 0
+        self.batches = 0
+        self.predictions = 0
+        self.latencies = deque(maxlen=10000)  # ready -> result, seconds
+
+        self.thread = threading.Thread(target=self._run, name="batcher", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        with self.cond:
+            self.cond.notify_all()
+        self.thread.join(timeout=2.0)
+
+        # Open events end with the stream
+        with self.decoder_lock:
+            for state in list(self.streams.values()):
+                if not state.removed:
+                    state.removed = True
+                    self._emit(state, state.decoder.flush())
+
+
+#---------------------------------------------#
+# STREAMS                                     #
+#                                             #
+#---------------------------------------------#
+    def add_stream(self, stream_id):
+        with self.cond:
+            if stream_id not in self.streams:
+                self.streams[stream_id] = StreamState(stream_id, self.seq_length, self.decoder_factory(), self.rate)
+            return self.streams[stream_id]
+
+    def remove_stream(self, stream_id):
+        with self.decoder_lock:
+            with self.cond:
+                state = self.streams.pop(stream_id, None)
+                if state is not None and state.pending:
+                    self.ready.remove(state)
+            if state is not None and not state.removed:
+                state.removed = True
+                self._emit(state, state.decoder.flush())
+
+    def push(self, stream_id, feature_vector, timestamp=None):
+        timestamp = time.time() if timestamp is None else timestamp
+        with self.cond:
+            state = self.streams.get(stream_id)
+            if state is None:
+                state = self.streams[stream_id] = StreamState(stream_id, self.seq_length, self.decoder_factory(), self.rate)
+
+            if state.resampler is None:
+                rows = [feature_vector]
+                state.window.append(feature_vector, timestamp)
+            else:
+                rows = state.resampler.push(feature_vector, timestamp)
+                for row in rows:
+                    state.window.append(row)
+            state.timestamp = timestamp
+            state.frames_since_prediction += len(rows)
+            self.frames += 1
+
+            if state.window.is_full() and state.frames_since_prediction >= self.stride and not state.pending:
+                state.pending = True
+                state.ready_time = time.perf_counter()
+                state.frames_since_prediction = 0
+                self.ready.append(state)
+                if len(self.ready) == 1 or len(self.ready) >= self.max_batch_size:
+                    self.cond.notify()
+
+
+#---------------------------------------------#
+# BATCHING LOOP                               #
+#                                             #
+#---------------------------------------------#
+    def _next_batch(self):
+        with self.cond:
+            while True:
+                while not self.ready:
+                    if self.stop_event.is_set():
+                        return None
+                    self.cond.wait(0.1)
+
+                deadline = self.ready[0].ready_time + self.max_wait
+                while len(self.ready) < self.max_batch_size and not self.stop_event.is_set():
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self.cond.wait(remaining)
+
+                if self.ready:
+                    break  # otherwise the waiting streams were removed meanwhile
+
+            states = [self.ready.popleft() for _ in range(min(self.max_batch_size, len(self.ready)))]
+            # Copy the windows while no new frame can be written into them
+            batch = torch.stack([state.window.model_input() for state in states])
+            timestamps = [state.timestamp for state in states]
+            ready_times = [state.ready_time for state in states]
+            for state in states:
+                state.pending = False
+            return states, batch, timestamps, ready_times
+
+    def _run(self):
+        while True:
+            item = self._next_batch()
+            if item is None:
+                return
+            states, batch, timestamps, ready_times = item
+
+            with torch.no_grad():
+                probs = torch.softmax(self.model(batch.to(self.device)), dim=1).cpu().numpy()
+            done = time.perf_counter()
+
+            self.batches += 1
+            self.predictions += len(states)
+            with self.decoder_lock:
+                for state, p, timestamp, ready_time in zip(states, probs, timestamps, ready_times):
+                    self.latencies.append(done - ready_time)
+                    if state.removed:
+                        continue  # removed while its window was in the model, its events are flushed
+                    state.label, state.confidence, event = state.decoder.update(p, timestamp)
+                    if self.on_prediction is not None:
+                        self.on_prediction(state.stream_id, state.label, state.confidence, timestamp)
+                    self._emit(state, event)
+
+    def _emit(self, state, event):
+        if event is not None and self.on_event is not None:
+            self.on_event(state.stream_id, event)
+
+
+#---------------------------------------------#
+# STATS                                       #
+#                                             #
+#---------------------------------------------#
+    def stats(self):
+        latencies = 1000 * np.array(self.latencies) if self.latencies else np.zeros(1)
+        return {
+            "streams": len(self.streams),
+            "frames": self.frames,
+            "batches": self.batches,
+            "predictions": self.predictions,
+            "mean_batch_size": round(self.predictions / max(self.batches, 1), 2),
+            "latency_p50_ms": round(float(np.percentile(latencies, 50)), 3),
+            "latency_p95_ms": round(float(np.percentile(latencies, 95)), 3),
+            "latency_p99_ms": round(float(np.percentile(latencies, 99)), 3),
+        }
+
+
+#---------------------------------------------#
+# LIVE SOURCES                                #
+# one capture + MediaPipe thread per source   #
+#---------------------------------------------#
+def run_source(spec, detector, stop_event):
+    from hand_utils.frame_sources import open_source
+    from hand_utils.hand_tracker import HandTracker
+
+    source = open_source(spec, mirror=False)
+    hand_tracker = HandTracker()
+
+    while not stop_event.is_set():
+        frame = source.read()
+        if frame is None:
+            break
+        if frame.features is not None:
+            feature_vector = frame.features.astype(np.float32)
+        else:
+            _, results = hand_tracker.process_frame(frame.image, mirrored=source.mirrored)
+            feature_vector = hand_tracker.write_landmark_array(results, np.empty(135, dtype=np.float32),
+                                                               timestamp=frame.timestamp)
+        detector.push(spec, feature_vector, frame.timestamp)
+
+    source.release()
+    detector.remove_stream(spec)
+
+
+#---------------------------------------------#
+# LOAD GENERATOR                              #
+# replays landmark_data as N fake streams     #
+#---------------------------------------------#
+def load_recordings(data_dir):
+    sequences = []
+    for dirpath, _, files in os.walk(data_dir):
+        for file in sorted(files):
+            if file.endswith(".npy"):
+                sequences.append(np.load(os.path.join(dirpath, file)).astype(np.float32))
+    return np.concatenate(sequences)
+
+
+# Every 1 / fps seconds, each stream pushes its next frame (streams start at
+# different offsets in the recordings). With full_speed there is no waiting,
+# which measures the maximum throughput.
+def run_load_test(model, frames, num_streams, duration=5.0, fps=30, full_speed=False, **detector_args):
+    detector = MultiStreamDetector(model, **detector_args)
+    detector.start()
+
+    offsets = [(i * 97) % len(frames) for i in range(num_streams)]
+    ticks = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        for stream_id in range(num_streams):
+            detector.push(stream_id, frames[(offsets[stream_id] + ticks) % len(frames)], ticks / fps)
+        ticks += 1
+        if not full_speed:
+            delay = start + ticks / fps - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+    elapsed = time.perf_counter() - start
+    detector.stop()
+
+    stats = detector.stats()
+    stats["frames_per_s"] = round(stats["frames"] / elapsed, 1)
+    stats["predictions_per_s"] = round(stats["predictions"] / elapsed, 1)
+    stats["fps_per_stream"] = round(ticks / elapsed, 1)
+    stats["realtime"] = full_speed or ticks / elapsed >= 0.95 * fps
+    return stats
+
+
+#---------------------------------------------#
+# MAIN                                        #
+#                                             #
+#---------------------------------------------#
+def main():
+    from training.model import load_sign_lstm
+    from inference.prediction_log import PredictionLogWriter
+
+    parser = argparse.ArgumentParser(description="Multi-stream sign detection with batched inference")
+    parser.add_argument("--sources", nargs="*", default=[],
+                        help="frame sources, see hand_utils/frame_sources.open_source")
+    parser.add_argument("--load-test", help="comma-separated stream counts, e.g. 1,4,16,64")
+    parser.add_argument("--data", default="landmark_data/", help="recordings replayed by the load test")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per load test step")
+    parser.add_argument("--full-speed", action="store_true", help="load test: push frames as fast as possible")
+    parser.add_argument("--model", default="sign_lstm.pth")
+    parser.add_argument("--label-map", default="label_map.json")
+    parser.add_argument("--seq-length", type=int, default=SEQUENCE_LENGTH)
+    parser.add_argument("--stride", type=int, default=1, help="frames between predictions per stream")
+    parser.add_argument("--rate", type=float, default=MODEL_RATE, help="resample streams to this rate (0 = off)")
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--threads", type=int, default=None, help="torch.set_num_threads")
+    parser.add_argument("-o", "--output", help="load test: write results as JSON")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    with open(args.label_map, "r") as f:
+        label_map = {int(v): k for k, v in json.load(f).items()}
+    model = load_sign_lstm(args.model, len(label_map))
+    detector_args = dict(seq_length=args.seq_length, stride=args.stride, rate=args.rate or None,
+                         max_batch_size=args.max_batch_size, max_wait=args.max_wait_ms / 1000)
+
+    if args.load_test:
+        frames = load_recordings(args.data)
+        results = []
+        print(f"{'streams':>7s} {'frames/s':>9s} {'preds/s':>9s} {'batch':>6s} {'p50 ms':>8s} {'p95 ms':>8s} {'realtime':>8s}")
+        for num_streams in [int(n) for n in args.load_test.split(",")]:
+            stats = run_load_test(model, frames, num_streams, args.duration, full_speed=args.full_speed,
+                                  **detector_args)
+            results.append(stats)
+            print(f"{num_streams:7d} {stats['frames_per_s']:9.1f} {stats['predictions_per_s']:9.1f} "
+                  f"{stats['mean_batch_size']:6.1f} {stats['latency_p50_ms']:8.2f} {stats['latency_p95_ms']:8.2f} "
+                  f"{str(stats['realtime']):>8s}")
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(results, f, indent=2)
+        return
+
+    if not args.sources:
+        parser.error("give --sources or --load-test")
+
+    prediction_log = PredictionLogWriter("prediction_log.jsonl")
+
+    def on_event(stream_id, event):
+        prediction_log.write({
+            "stream": str(stream_id),
+            "timestamp": round(event["start"], 3),
+            "end": round(event["end"], 3),
+            "label": label_map[event["label"]],
+            "confidence": round(event["peak_confidence"], 3),
+            "frames": event["frames"],
+        })
+        print(f"[PREDICTED] {stream_id}: {label_map[event['label']]} ({event['peak_confidence']:.2f})")
+
+    detector = MultiStreamDetector(model, on_event=on_event, **detector_args)
+    detector.start()
+
+    stop_event = threading.Event()
+    threads = [threading.Thread(target=run_source, args=(spec, detector, stop_event), daemon=True)
+               for spec in args.sources]
+    for thread in threads:
+        thread.start()
+
+    print(f"[INFO] Serving {len(args.sources)} streams, Ctrl+C to stop.")
+    try:
+        while any(thread.is_alive() for thread in threads):
+            time.sleep(5)
+            print(f"[STATS] {detector.stats()}")
+    except KeyboardInterrupt:
+        pass
+
+    stop_event.set()
+    for thread in threads:
+        thread.join(timeout=2.0)
+    detector.stop()
+    prediction_log.close()
+    print(f"[STATS] {detector.stats()}")
+
+
+if __name__ == "__main__":
+    main()
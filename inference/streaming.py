@@ -0,0 +1,94 @@
+#
+#
+# Incremental (stateful) inference for SignLSTM.
+# Instead of re-running the whole window through the LSTM on every frame,
+# the (h, c) state is carried forward one frame at a time.
+#
+#
+
+import math
+import numpy as np
+import torch
+from hand_utils.features import MODEL_RATE, SEQUENCE_LENGTH, timestamp_column
+
+
+class StreamingSignLSTM:
+
+#---------------------------------------------#
+# INITIALISE ATTRIBUTES                       #
+#                                             #
+#---------------------------------------------#
+    # The LSTM state is kept for several "slots", each one a window that
+    # started `stride` frames after the previous one. A slot is read out and
+    # reset once it has seen `seq_length` frames, so every prediction is
+    # exactly what the model gives on the last `seq_length` frames.
+    #
+    #   stride == seq_length -> one slot, periodic reset (cheapest)
+    #   stride == 1          -> seq_length slots, a prediction every frame
+    #
+    # Every slot is at a different position of its window, so each gets its
+    # own normalized timestamp: frames are expected on a regular 1 / rate grid
+    # (LandmarkResampler), where frame i of a window is at timestamp_column(
+    # arange(seq_length) / rate)[i], the same value LandmarkWindow gives.
+    def __init__(self, model, seq_length=SEQUENCE_LENGTH, stride=1, device="cpu", rate=MODEL_RATE):
+        if stride < 1:
+            raise ValueError(f"stride must be >= 1, got {stride}")
+
+        self.model = model
+        self.seq_length = seq_length
+        self.stride = stride
+        self.device = device
+        self.num_slots = math.ceil(seq_length / stride)
+
+        # Count a slot restarts from after being read out, so slots stay
+        # `stride` frames apart
+        self.restart_count = seq_length - self.num_slots * stride
+
+        positions = timestamp_column(np.arange(seq_length) / rate)
+        self.positions = torch.tensor(positions, dtype=torch.float32, device=device)
+        self.reset()
+
+
+#---------------------------------------------#
+# RESET ALL WINDOWS                           #
+#                                             #
+#---------------------------------------------#
+    def reset(self):
+        lstm = self.model.lstm
+        shape = (lstm.num_layers, self.num_slots, lstm.hidden_size)
+        self.h = torch.zeros(shape, device=self.device)
+        self.c = torch.zeros(shape, device=self.device)
+
+        # Frames seen by each slot, slot k only starts after k * stride frames
+        self.counts = [-k * self.stride for k in range(self.num_slots)]
+
+
+#---------------------------------------------#
+# FEED ONE FRAME                              #
+#                                             #
+#---------------------------------------------#
+    # Returns the logits (1, num_classes) when a window completes on this
+    # frame, otherwise None.
+    @torch.no_grad()
+    def step(self, feature_vector):
+        x = torch.as_tensor(feature_vector, dtype=torch.float32, device=self.device)
+        x = x.view(1, 1, -1).expand(self.num_slots, 1, -1).contiguous()
+        index = torch.tensor(self.counts, device=self.device).clamp(0, self.seq_length - 1)
+        x[:, 0, -1] = self.positions[index]  # slots that have not started are zeroed below
+
+        _, (self.h, self.c) = self.model.lstm(x, (self.h, self.c))
+
+        output = None
+        for k in range(self.num_slots):
+            self.counts[k] += 1
+
+            if self.counts[k] == self.seq_length:
+                output = self.model.fc(self.h[-1, k:k + 1])
+                self.counts[k] = self.restart_count
+
+            # Slot has not started its window yet (or just finished it)
+            if self.counts[k] <= 0:
+                self.h[:, k].zero_()
+                self.c[:, k].zero_()
+
+        return output
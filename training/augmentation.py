@@ -0,0 +1,188 @@
+#
+#
+# On-the-fly augmentation of landmark sequences, done on whole batches with
+# tensor ops (no per-sample Python loops), and the DataLoader set-up that runs
+# it in worker processes with prefetching.
+#
+# Works on (batch, frames, 135) tensors in the create_landmark_array layout:
+#   0..66     Right hand: 21 wrist-relative (x, y, z), confidence, wrist (x, y, z)
+#   67..133   Left hand, same layout
+#   134       timestamp, normalized to [0, 1] over the clip
+# Zero rows at the end of a sequence are padding.
+#
+#
+
+import torch
+from torch.utils.data import DataLoader
+
+HAND_SIZE = 67
+HANDS = (0, HAND_SIZE)            # block start of the Right and Left hand
+CONFIDENCE = 63                   # offsets inside a hand block
+WRIST = slice(64, 67)
+RELATIVE = slice(0, 63)
+TIMESTAMP = 134
+
+
+#---------------------------------------------#
+# HELPERS                                     #
+#                                             #
+#---------------------------------------------#
+# Number of frames before the zero padding, per sequence
+def sequence_lengths(sequences):
+    frames = torch.arange(1, sequences.shape[1] + 1, device=sequences.device)
+    real = sequences.abs().sum(dim=2) > 0
+    return (real * frames).max(dim=1).values
+
+
+def _uniform(low, high, size, device):
+    return low + (high - low) * torch.rand(size, device=device)
+
+
+#---------------------------------------------#
+# BATCH AUGMENTER                             #
+#                                             #
+#---------------------------------------------#
+class BatchAugmenter:
+    # time_warp:   playback speed drawn from [1 - time_warp, 1 + time_warp]
+    # max_shift:   drop up to this many frames from the start (random crop)
+    # mirror_prob: chance to swap the hands and mirror x (left-handed signer)
+    # jitter_std:  gaussian noise on the landmark coordinates
+    # scale_range: hand size drawn from [1 - scale_range, 1 + scale_range]
+    # Set any of them to 0 to turn that augmentation off.
+    def __init__(self, time_warp=0.2, max_shift=5, mirror_prob=0.5, jitter_std=0.005, scale_range=0.1):
+        self.time_warp = time_warp
+        self.max_shift = max_shift
+        self.mirror_prob = mirror_prob
+        self.jitter_std = jitter_std
+        self.scale_range = scale_range
+
+    def __call__(self, sequences):
+        sequences = sequences.clone()
+        if self.time_warp or self.max_shift:
+            sequences = self.warp(sequences)
+        if self.mirror_prob:
+            sequences = self.mirror(sequences)
+        if self.scale_range or self.jitter_std:
+            sequences = self.scale_and_jitter(sequences)
+        return sequences
+
+
+#---------------------------------------------#
+# TIME WARP + RANDOM CROP                     #
+#                                             #
+#---------------------------------------------#
+    # Output frame t is read from source frame shift + speed * t, linearly
+    # interpolated. Frames that land past the end of the clip become padding,
+    # and the timestamps are renormalized to [0, 1] over the new clip.
+    def warp(self, sequences):
+        batch, frames, features = sequences.shape
+        device = sequences.device
+        lengths = sequence_lengths(sequences)
+
+        speed = _uniform(1 - self.time_warp, 1 + self.time_warp, (batch, 1), device)
+        shift = torch.floor(_uniform(0, self.max_shift + 1, (batch, 1), device))
+        shift = torch.minimum(shift, (lengths[:, None] - 2).clamp(min=0).float())
+        source = shift + speed * torch.arange(frames, device=device).float()
+
+        valid = source <= (lengths[:, None] - 1).float()
+        low = source.floor().long().clamp(0, frames - 1)
+        high = (low + 1).clamp(max=frames - 1)
+        weight = (source - low.float()).clamp(0, 1)[:, :, None]
+
+        low_rows = sequences.gather(1, low[:, :, None].expand(-1, -1, features))
+        high_rows = sequences.gather(1, high[:, :, None].expand(-1, -1, features))
+        warped = (low_rows + weight * (high_rows - low_rows)) * valid[:, :, None]
+
+        timestamps = warped[:, :, TIMESTAMP]
+        first = torch.where(valid, timestamps, torch.full_like(timestamps, float("inf"))).min(dim=1, keepdim=True).values
+        last = torch.where(valid, timestamps, torch.full_like(timestamps, -float("inf"))).max(dim=1, keepdim=True).values
+        warped[:, :, TIMESTAMP] = (timestamps - first) / (last - first + 1e-6) * valid
+        return warped
+
+
+#---------------------------------------------#
+# MIRROR HANDS                                #
+#                                             #
+#---------------------------------------------#
+    # Swaps the Right and Left blocks and mirrors x (relative x negated,
+    # wrist x -> 1 - x). Missing hands stay all zero.
+    def mirror(self, sequences):
+        flip = torch.rand(sequences.shape[0], device=sequences.device) < self.mirror_prob
+        if not flip.any():
+            return sequences
+
+        selected = sequences[flip]
+        right = selected[:, :, 0:HAND_SIZE].clone()
+        selected[:, :, 0:HAND_SIZE] = selected[:, :, HAND_SIZE:2 * HAND_SIZE]
+        selected[:, :, HAND_SIZE:2 * HAND_SIZE] = right
+
+        for start in HANDS:
+            hand = selected[:, :, start:start + HAND_SIZE]
+            present = (hand[:, :, CONFIDENCE] > 0)[:, :, None]
+            hand[:, :, 0:63:3] *= -1
+            hand[:, :, 64:65] = torch.where(present, 1 - hand[:, :, 64:65], hand[:, :, 64:65])
+
+        sequences[flip] = selected
+        return sequences
+
+
+#---------------------------------------------#
+# SCALE + JITTER                              #
+#                                             #
+#---------------------------------------------#
+    # Scales the wrist-relative coordinates (hand size / distance to camera)
+    # and adds noise to relative and wrist coordinates of present hands.
+    def scale_and_jitter(self, sequences):
+        batch, frames, _ = sequences.shape
+        device = sequences.device
+        scale = _uniform(1 - self.scale_range, 1 + self.scale_range, (batch, 1, 1), device)
+
+        for start in HANDS:
+            hand = sequences[:, :, start:start + HAND_SIZE]
+            present = (hand[:, :, CONFIDENCE] > 0)[:, :, None].float()
+            relative = hand[:, :, RELATIVE]
+            wrist = hand[:, :, WRIST]
+            relative *= scale
+            if self.jitter_std:
+                relative += self.jitter_std * torch.randn_like(relative) * present
+                wrist += self.jitter_std * torch.randn_like(wrist) * present
+        return sequences
+
+
+#---------------------------------------------#
+# DATA LOADER                                 #
+#                                             #
+#---------------------------------------------#
+# Collates a list of (sequence, label) and augments the whole batch, so the
+# augmentation runs inside the DataLoader workers. Returns (sequences, labels,
+# lengths), lengths measured after augmentation (time warp changes them) and
+# the batch trimmed to its longest sequence, for SignLSTM(sequences, lengths).
+class AugmentedCollate:
+    def __init__(self, augmenter=None):
+        self.augmenter = augmenter
+
+    def __call__(self, samples):
+        sequences = torch.stack([sequence for sequence, _ in samples])
+        labels = torch.stack([torch.as_tensor(label) for _, label in samples])
+        if self.augmenter is not None:
+            sequences = self.augmenter(sequences)
+        lengths = sequence_lengths(sequences).clamp(min=1)
+        return sequences[:, :int(lengths.max())], labels, lengths
+
+
+# num_workers:     worker processes building (and augmenting) batches
+# prefetch_factor: batches each worker keeps ready ahead of the training loop
+def make_train_loader(dataset, batch_size=16, augmenter=None, num_workers=2, prefetch_factor=4,
+                      shuffle=True, pin_memory=None):
+    if pin_memory is None:
+        pin_memory = torch.cuda.is_available()
+    return DataLoader(
+        dataset,
+        batch_size=batch_size,
+        shuffle=shuffle,
+        collate_fn=AugmentedCollate(augmenter),
+        num_workers=num_workers,
+        pin_memory=pin_memory,
+        persistent_workers=num_workers > 0,
+        prefetch_factor=prefetch_factor if num_workers > 0 else None,
+    )
@@ -0,0 +1,204 @@
+#
+#
+# Train/serve parity check: runs recorded landmark_data clips through the
+# training transform (features.prepare_sequence, as LandmarkDataset /
+# batch_inference use it) and through the live one (frame by frame into a
+# LandmarkWindow, as detection.py / stream_server.py do), and checks that the
+# model gets identical tensors. With --model it also checks that streaming
+# inference on the resampled clip gives the same logits as the window, and
+# compares accuracy on the raw clips with accuracy on the clips resampled to
+# MODEL_RATE by LandmarkResampler, as live inference sees them. The rate the
+# clips were captured at is checked against MODEL_RATE as well: a live window
+# at another rate covers a different number of seconds than training did.
+#
+# Usage:  python training/feature_parity.py landmark_data/
+#         python training/feature_parity.py landmark_data/ --model sign_lstm.pth --clips 50
+#
+#
+
+import os
+import sys
+
+# Add project root to the system path so you can import hand_utils.*, inference.* and training.*
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import argparse
+import json
+import numpy as np
+import torch
+from hand_utils.features import MODEL_RATE, SEQUENCE_LENGTH, capture_rate, normalize_timestamps, prepare_sequence, timestamp_column
+from hand_utils.resampling import LandmarkResampler, resample_sequence
+from inference.landmark_window import LandmarkWindow
+from inference.streaming import StreamingSignLSTM
+
+
+#---------------------------------------------#
+# THE TWO PATHS                               #
+#                                             #
+#---------------------------------------------#
+def training_input(sequence, length):
+    padded, valid = prepare_sequence(sequence, length)
+    return torch.from_numpy(padded), valid
+
+
+def live_input(sequence, length):
+    window = LandmarkWindow(length)
+    for row in sequence[:length]:
+        window.append(row)
+    return window.model_input().clone()
+
+
+#---------------------------------------------#
+# CHECKS                                      #
+#                                             #
+#---------------------------------------------#
+# Returns a list of failure messages, empty when both paths agree
+def check_clip(sequence, length=SEQUENCE_LENGTH, model=None, rate=MODEL_RATE):
+    failures = []
+
+    train, valid = training_input(sequence, length)
+    live = live_input(sequence, length)
+    if not torch.equal(train[:valid], live):
+        diff = (train[:valid] - live).abs().max().item()
+        failures.append(f"window input differs from training input (max diff {diff:.3g})")
+    if train[valid:].any():
+        failures.append("padding is not all zero")
+
+    # The same normalization on a batch, in NumPy and in torch
+    batch = np.repeat(np.array(sequence[:length], dtype=np.float64)[None], 3, axis=0)
+    numpy_batch = normalize_timestamps(batch.copy())
+    torch_batch = normalize_timestamps(torch.from_numpy(batch.copy()))
+    single = timestamp_column(np.array(sequence[:length, -1], dtype=np.float64))
+    if not (np.array_equal(numpy_batch[1, :, -1], single) and np.array_equal(torch_batch.numpy(), numpy_batch)):
+        failures.append("batched / torch timestamp normalization differs from a single sequence")
+
+    if model is not None:
+        with torch.no_grad():
+            if not torch.equal(model(train[None, :valid]), model(live[None])):
+                failures.append("model output differs between training and window input")
+
+            # Live streams are resampled to the model rate, streaming assumes that grid
+            grid = resample_sequence(np.asarray(sequence, dtype=np.float64), rate)
+            if len(grid) >= length:
+                streamer = StreamingSignLSTM(model, seq_length=length, stride=length, rate=rate)
+                outputs = [streamer.step(row) for row in grid[:length]]
+                expected = model(live_input(grid, length)[None])
+                if outputs[-1] is None or not torch.allclose(outputs[-1], expected, atol=1e-5):
+                    failures.append("streaming logits differ from the window logits")
+    return failures
+
+
+# Predicted class of every full window while the clip streams through the
+# live path: LandmarkResampler (as detection.py builds it) -> LandmarkWindow
+# -> model. The stored clips start with a frame from before the recording
+# countdown, about 3 s earlier: the resampler restarts its grid there instead
+# of interpolating across it, as it does on a live camera stall.
+def live_predictions(sequence, model, length=SEQUENCE_LENGTH, rate=MODEL_RATE):
+    resampler = LandmarkResampler(rate, sequence.shape[1])
+    window = LandmarkWindow(length)
+    predictions = []
+    with torch.no_grad():
+        for row in np.asarray(sequence, dtype=np.float64):
+            for resampled in resampler.push(row, row[-1]):
+                window.append(resampled)
+                if window.is_full():
+                    predictions.append(int(model(window.model_input()[None]).argmax(dim=1)))
+    return predictions
+
+
+def find_clips(data_dir):
+    clips = []
+    for label in sorted(os.listdir(data_dir)):
+        label_path = os.path.join(data_dir, label)
+        if os.path.isdir(label_path):
+            clips.extend(os.path.join(label_path, f) for f in sorted(os.listdir(label_path)) if f.endswith(".npy"))
+    return clips
+
+
+#---------------------------------------------#
+# MAIN                                        #
+#                                             #
+#---------------------------------------------#
+def main():
+    parser = argparse.ArgumentParser(description="Check that training and live inference build the same model input")
+    parser.add_argument("data_dir", nargs="?", default="landmark_data/")
+    parser.add_argument("--clips", type=int, default=20, help="clips to check (0 = all)")
+    parser.add_argument("--sequence-length", type=int, default=SEQUENCE_LENGTH)
+    parser.add_argument("--model", default=None, help="also compare model outputs, e.g. sign_lstm.pth")
+    parser.add_argument("--label-map", default="label_map.json")
+    parser.add_argument("--rate", type=float, default=MODEL_RATE, help="model rate the live path resamples to")
+    parser.add_argument("--tolerance", type=float, default=2.0,
+                        help="max accuracy drop (%%) of the resampled clips against the raw clips")
+    args = parser.parse_args()
+
+    model = None
+    if args.model:
+        from training.model import load_sign_lstm
+        with open(args.label_map, "r") as f:
+            label_map = json.load(f)
+        model = load_sign_lstm(args.model, len(label_map))
+
+    clips = find_clips(args.data_dir)
+    if args.clips:
+        # Spread over all labels instead of the first label only
+        clips = clips[::max(1, len(clips) // args.clips)][:args.clips]
+
+    failed = 0
+    rates = []
+    raw_correct = last_correct = window_correct = windows = compared = short = 0
+    for path in clips:
+        sequence = np.load(path)
+        failures = check_clip(sequence, args.sequence_length, model, args.rate)
+        for failure in failures:
+            print(f"[ERROR] {path}: {failure}")
+        failed += bool(failures)
+        rate = capture_rate(sequence[:, -1])
+        if rate is not None:
+            rates.append(rate)
+
+        label = label_map.get(os.path.basename(os.path.dirname(path))) if model is not None else None
+        if label is None:
+            continue
+        predictions = live_predictions(sequence, model, args.sequence_length, args.rate)
+        if not predictions:
+            # Shorter than a window once resampled, a continuous live stream
+            # would have filled it with the next frames
+            short += 1
+            continue
+        compared += 1
+        train, valid = training_input(sequence, args.sequence_length)
+        with torch.no_grad():
+            raw_correct += int(model(train[None, :valid]).argmax(dim=1)) == label
+        last_correct += predictions[-1] == label
+        window_correct += sum(p == label for p in predictions)
+        windows += len(predictions)
+
+    print(f"[STATS] {len(clips) - failed}/{len(clips)} clips identical on both paths.")
+    if rates:
+        clip_rate = float(np.median(rates))
+        print(f"[STATS] Clips captured at {clip_rate:.1f} Hz (median), the live path resamples to {args.rate:g} Hz")
+        if abs(clip_rate - args.rate) > 0.1 * args.rate:
+            print(f"[ERROR] A {args.sequence_length}-frame live window covers {args.sequence_length / args.rate:.1f} s, "
+                  f"training windows {args.sequence_length / clip_rate:.1f} s: set MODEL_RATE to the capture rate")
+            failed += 1
+    if model is not None:
+        if not compared:
+            print(f"[ERROR] No clip fills a {args.sequence_length}-frame window at {args.rate:g} Hz")
+            sys.exit(1)
+        raw_acc = 100 * raw_correct / compared
+        last_acc = 100 * last_correct / compared
+        window_acc = 100 * window_correct / windows
+        print(f"[STATS] Accuracy on {compared} clips: raw {raw_acc:.1f}%, resampled to {args.rate:g} Hz "
+              f"{last_acc:.1f}% (last window), {window_acc:.1f}% (all {windows} windows); "
+              f"{short} clips shorter than a window once resampled")
+        if min(last_acc, window_acc) < raw_acc - args.tolerance:
+            print(f"[ERROR] Resampled accuracy drops more than {args.tolerance:g}% against the raw clips")
+            failed += 1
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
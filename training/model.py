@@ -0,0 +1,51 @@
+#
+#
+# The SignLSTM model, shared by training and detection. 
+#
+#
+
+import torch
+import torch.nn as nn
+from torch.nn.utils.rnn import pack_padded_sequence
+
+#---------------------------------------------#
+# Define LSTM model                           #
+#                                             #
+#---------------------------------------------#
+class SignLSTM(nn.Module):
+    def __init__(self, input_size=135, hidden_size=64, num_layers=2, num_classes=3):
+        super(SignLSTM, self).__init__()
+        self.lstm = nn.LSTM(input_size, hidden_size, num_layers, batch_first=True)
+        self.fc = nn.Linear(hidden_size, num_classes)
+
+    # lengths: (batch,) real frames per sequence, the rest is zero padding at
+    # the end. Given, the LSTM runs on packed sequences: no steps are spent on
+    # padding and hn[-1] is the state after each sequence's own last frame.
+    # Without it (live windows, exported models) every frame is real.
+    def forward(self, x, lengths=None):
+        if lengths is not None:
+            lengths = lengths.clamp(min=1)
+            max_length = int(lengths.max())
+            x = x[:, :max_length]
+            if int(lengths.min()) < max_length:
+                x = pack_padded_sequence(x, lengths.cpu(), batch_first=True, enforce_sorted=False)
+        _, (hn, _) = self.lstm(x)
+        out = self.fc(hn[-1])
+        return out
+
+
+#---------------------------------------------#
+# LOAD TRAINED WEIGHTS                        #
+#                                             #
+#---------------------------------------------#
+# hidden_size / num_layers are read from the weights, so models of any size
+# (training/sweep.py) load without further settings
+def load_sign_lstm(model_path, num_classes, device="cpu"):
+    state_dict = torch.load(model_path, map_location=device)
+    hidden_size = state_dict["lstm.weight_hh_l0"].shape[1]
+    num_layers = sum(1 for key in state_dict if key.startswith("lstm.weight_ih_l"))
+    model = SignLSTM(input_size=135, hidden_size=hidden_size, num_layers=num_layers, num_classes=num_classes)
+    model.load_state_dict(state_dict)
+    model.to(device)
+    model.eval()
+    return model
@@ -0,0 +1,241 @@
+#
+#
+# Packed landmark dataset: every recording in landmark_data/<label>/ is
+# compiled into one contiguous float32 file that is opened with np.memmap,
+# instead of np.load-ing hundreds of .npy files each time training starts.
+#
+# Layout of a packed directory:
+#   data.f32     all frames of all clips, (total_frames, num_features) float32
+#   index.i64    one (offset, length, label) int64 row per clip
+#   sources.txt  one "<label>/<file>.npy" line per clip, in index order
+#   meta.json    num_features, label_map and the capture rate of the clips
+#
+# All three data files are append-only, so new recordings can be added
+# without rebuilding and open time does not grow with the dataset.
+#
+# Usage:  python training/packed_dataset.py landmark_data/ landmark_data_packed/
+#
+
+import os
+import sys
+
+# Add project root to the system path so you can import training.*
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import argparse
+import json
+import numpy as np
+import torch
+from torch.utils.data import Dataset
+from hand_utils.features import SEQUENCE_LENGTH, capture_rate, normalize_timestamps, timestamp_column
+
+DATA_FILE = "data.f32"
+INDEX_FILE = "index.i64"
+SOURCES_FILE = "sources.txt"
+META_FILE = "meta.json"
+
+
+#---------------------------------------------#
+# READ / WRITE META                           #
+#                                             #
+#---------------------------------------------#
+def load_meta(packed_dir):
+    meta_path = os.path.join(packed_dir, META_FILE)
+    if not os.path.exists(meta_path):
+        return {"num_features": None, "label_map": {}, "rate": None, "rate_clips": 0}
+    with open(meta_path, "r") as f:
+        meta = json.load(f)
+    meta.setdefault("rate", None)      # packed before the rate was recorded
+    meta.setdefault("rate_clips", 0)
+    return meta
+
+
+def save_meta(packed_dir, meta):
+    tmp_path = os.path.join(packed_dir, META_FILE + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, os.path.join(packed_dir, META_FILE))
+
+
+def load_sources(packed_dir):
+    sources_path = os.path.join(packed_dir, SOURCES_FILE)
+    if not os.path.exists(sources_path):
+        return set()
+    with open(sources_path, "r") as f:
+        return set(line.strip() for line in f if line.strip())
+
+
+#---------------------------------------------#
+# APPEND CLIPS TO A PACKED DIRECTORY          #
+#                                             #
+#---------------------------------------------#
+# clips: list of (filepath, label). Clips already packed are skipped.
+# Returns the number of clips added.
+def append_clips(packed_dir, clips):
+    os.makedirs(packed_dir, exist_ok=True)
+    meta = load_meta(packed_dir)
+    packed = load_sources(packed_dir)
+    label_map = meta["label_map"]
+    added = 0
+
+    # meta is saved even when a clip fails: the clips written before it keep
+    # their label ids and the feature count
+    try:
+        data_path = os.path.join(packed_dir, DATA_FILE)
+        with open(data_path, "ab") as data_f, \
+             open(os.path.join(packed_dir, INDEX_FILE), "ab") as index_f, \
+             open(os.path.join(packed_dir, SOURCES_FILE), "a") as sources_f:
+
+            for filepath, label in clips:
+                source = f"{label}/{os.path.basename(filepath)}"
+                if source in packed:
+                    continue
+
+                sequence = np.load(filepath)
+                if meta["num_features"] is None:
+                    meta["num_features"] = sequence.shape[1]
+                elif sequence.shape[1] != meta["num_features"]:
+                    raise ValueError(f"{filepath}: expected {meta['num_features']} features, got {sequence.shape[1]}")
+
+                # Mean capture rate over all packed clips, measured before the
+                # timestamps are normalized
+                rate = capture_rate(sequence[:, -1])
+                if rate is not None:
+                    meta["rate"] = ((meta["rate"] or 0.0) * meta["rate_clips"] + rate) / (meta["rate_clips"] + 1)
+                    meta["rate_clips"] += 1
+
+                # Timestamps are normalized before the cast, float32 cannot hold epoch times
+                sequence = normalize_timestamps(sequence).astype(np.float32)
+
+                if label not in label_map:
+                    label_map[label] = len(label_map)
+
+                # Offset from the data file itself, so a partial write never shifts the index
+                offset = data_f.tell() // (4 * meta["num_features"])
+                data_f.write(np.ascontiguousarray(sequence).tobytes())
+                data_f.flush()
+                index_f.write(np.array([offset, len(sequence), label_map[label]], dtype=np.int64).tobytes())
+                index_f.flush()
+                sources_f.write(source + "\n")
+
+                packed.add(source)
+                added += 1
+    finally:
+        save_meta(packed_dir, meta)
+    return added
+
+
+#---------------------------------------------#
+# PACK (OR UPDATE) A WHOLE DIRECTORY TREE     #
+#                                             #
+#---------------------------------------------#
+def pack_dataset(root_dir, packed_dir):
+    clips = []
+    for label in sorted(os.listdir(root_dir)):
+        label_path = os.path.join(root_dir, label)
+        if not os.path.isdir(label_path):
+            continue
+        for file in sorted(os.listdir(label_path)):
+            if file.endswith(".npy"):
+                clips.append((os.path.join(label_path, file), label))
+    return append_clips(packed_dir, clips)
+
+
+#---------------------------------------------#
+# DATASET                                     #
+#                                             #
+#---------------------------------------------#
+# Drop-in replacement for LandmarkDataset. Samples are views into the
+# memory-mapped file, only clips shorter than sequence_length are copied
+# (to be zero-padded) and longer ones (to renormalize their timestamps).
+class PackedLandmarkDataset(Dataset):
+    def __init__(self, packed_dir, sequence_length=SEQUENCE_LENGTH, label_map_path="label_map.json"):
+        self.packed_dir = packed_dir
+        self.sequence_length = sequence_length
+
+        meta = load_meta(packed_dir)
+        self.num_features = meta["num_features"]
+        self.label_map = meta["label_map"]
+        self.rate = meta["rate"]
+
+        # Save label map
+        if label_map_path is not None:
+            with open(label_map_path, "w") as f:
+                json.dump(self.label_map, f)
+
+        self._open()
+
+    def _open(self):
+        index_path = os.path.join(self.packed_dir, INDEX_FILE)
+        data_path = os.path.join(self.packed_dir, DATA_FILE)
+
+        num_clips = os.path.getsize(index_path) // (8 * 3)
+        self.index = np.memmap(index_path, dtype=np.int64, mode="r", shape=(num_clips, 3))
+
+        # Only the frames referenced by the index, a half-written tail is ignored
+        num_frames = int(self.index[-1, 0] + self.index[-1, 1]) if num_clips else 0
+        if num_frames:
+            # Copy-on-write so torch gets writable views without copying
+            self.data = np.memmap(data_path, dtype=np.float32, mode="c",
+                                  shape=(num_frames, self.num_features))
+        else:
+            self.data = np.zeros((0, self.num_features or 0), dtype=np.float32)
+
+    # DataLoader workers re-open the memmap instead of pickling its contents
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["index"], state["data"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._open()
+
+    @property
+    def labels(self):
+        return torch.from_numpy(np.array(self.index[:, 2]))  # a copy, the memmap is read-only
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, idx):
+        offset, length, label = self.index[idx]
+        trimmed = length > self.sequence_length
+        length = min(int(length), self.sequence_length)
+        sequence = self.data[offset:offset + length]
+
+        # Timestamps were normalized over the whole clip, the model sees them
+        # normalized over the frames it gets (like a live window)
+        if trimmed:
+            sequence = np.array(sequence)
+            sequence[:, -1] = timestamp_column(sequence[:, -1].astype(np.float64))
+
+        # Pad to fixed length
+        if length < self.sequence_length:
+            padded = np.zeros((self.sequence_length, self.num_features), dtype=np.float32)
+            padded[:length] = sequence
+            sequence = padded
+
+        return torch.from_numpy(sequence), torch.tensor(label, dtype=torch.long)
+
+
+#---------------------------------------------#
+# MAIN                                        #
+#                                             #
+#---------------------------------------------#
+def main():
+    parser = argparse.ArgumentParser(description="Pack landmark_data/<label>/*.npy into one memory-mapped file")
+    parser.add_argument("root_dir", nargs="?", default="landmark_data/")
+    parser.add_argument("packed_dir", nargs="?", default="landmark_data_packed/")
+    args = parser.parse_args()
+
+    added = pack_dataset(args.root_dir, args.packed_dir)
+    dataset = PackedLandmarkDataset(args.packed_dir, label_map_path=None)
+    print(f"[INFO] Added {added} clips, {len(dataset)} clips packed in {args.packed_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,9 +10,11 @@ import numpy as np
 import json
 import torch
 from torch.utils.data import Dataset
+# Shared with live inference, so training and detection transform frames the same way
+from hand_utils.features import SEQUENCE_LENGTH, prepare_sequence
 
 class LandmarkDataset(Dataset):
-    def __init__(self, root_dir, sequence_length=45, label_map_path="label_map.json"):
+    def __init__(self, root_dir, sequence_length=SEQUENCE_LENGTH, label_map_path="label_map.json"):
         self.data = []
         self.labels = []
         self.sequence_length = sequence_length
@@ -32,21 +34,8 @@ class LandmarkDataset(Dataset):
             for file in os.listdir(label_path):
                 if file.endswith(".npy"):
                     filepath = os.path.join(label_path, file)
-                    sequence = np.load(filepath)
-
-                    # Optional: normalize timestamps to [0, 1]
-                    timestamps = sequence[:, -1]
-                    timestamps = (timestamps - timestamps.min()) / (np.ptp(timestamps) + 1e-6)
-                    sequence[:, -1] = timestamps
-
-
-                    # Pad or trim to fixed length
-                    if len(sequence) < self.sequence_length:
-                        pad_len = self.sequence_length - len(sequence)
-                        padding = np.zeros((pad_len, sequence.shape[1]))
-                        sequence = np.vstack([sequence, padding])
-                    else:
-                        sequence = sequence[:self.sequence_length]
+                    # Trim to fixed length, normalize timestamps over those frames, pad
+                    sequence, _ = prepare_sequence(np.load(filepath), self.sequence_length)
 
                     self.data.append(sequence)
                     self.labels.append(self.label_map[label])
@@ -0,0 +1,321 @@
+#
+#
+# Hyperparameter sweep: trains every combination of the given hidden sizes,
+# layer counts, learning rates, batch sizes and sequence lengths, and reports
+# validation accuracy, model size and CPU inference latency for each, with
+# the Pareto-optimal configurations marked. Meant for picking the smallest /
+# fastest SignLSTM that is still accurate enough for the edge device.
+#
+#   - Configurations run concurrently in a process pool. Each worker is
+#     pinned to its own slice of cores (--threads per job) and sizes torch's
+#     thread pools to it, so jobs do not fight over cores.
+#   - All workers open the same packed dataset (training/packed_dataset.py)
+#     with np.memmap: one copy of the data in the page cache, whatever the
+#     number of jobs. A landmark_data/ directory is packed into the sweep
+#     directory first.
+#   - Training is train_LSTM.fit (validation split, early stopping). Every
+#     finished configuration is appended to results.jsonl, so an interrupted
+#     sweep skips the configurations it already has when run again.
+#   - Latency is measured after the pool has finished, one model at a time,
+#     so no measurement shares the CPU with a configuration still training.
+#
+# Usage:  python training/sweep.py --hidden-sizes 16 32 64 --num-layers 1 2 --jobs 4
+#         python training/sweep.py --seq-lengths 30 45 --min-accuracy 95
+#
+#
+
+import os
+import sys
+
+# Add project root to the system path so you can import training.* and hand_utils.*
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import time
+import numpy as np
+import torch
+import torch.optim as optim
+from torch.utils.data import Subset
+from hand_utils.features import SEQUENCE_LENGTH
+from training.model import SignLSTM, load_sign_lstm
+from training.packed_dataset import PackedLandmarkDataset, META_FILE, load_meta, pack_dataset
+from training.augmentation import BatchAugmenter, make_train_loader
+from training.train_LSTM import fit, split_indices
+
+RESULTS_FILE = "results.jsonl"
+
+# Set in every pool worker by _init_worker
+_packed_dir = None
+_datasets = {}   # sequence_length -> PackedLandmarkDataset over the shared memmap
+
+
+#---------------------------------------------#
+# CONFIGURATIONS                              #
+#                                             #
+#---------------------------------------------#
+def config_name(config):
+    return (f"h{config['hidden_size']}_l{config['num_layers']}_lr{config['lr']:g}"
+            f"_b{config['batch_size']}_s{config['sequence_length']}")
+
+
+def make_configs(hidden_sizes, num_layers, lrs, batch_sizes, sequence_lengths):
+    configs = []
+    for hidden_size, layers, lr, batch_size, length in itertools.product(hidden_sizes, num_layers, lrs,
+                                                                         batch_sizes, sequence_lengths):
+        configs.append({"hidden_size": hidden_size, "num_layers": layers, "lr": lr,
+                        "batch_size": batch_size, "sequence_length": length})
+    return configs
+
+
+# Core slices for `jobs` workers of `threads` cores each, from the cores
+# this process may use (wrapping around when there are not enough)
+def core_slices(jobs, threads):
+    if hasattr(os, "sched_getaffinity"):
+        cores = sorted(os.sched_getaffinity(0))
+    else:
+        cores = list(range(os.cpu_count() or 1))
+    return [[cores[(job * threads + i) % len(cores)] for i in range(threads)] for job in range(jobs)]
+
+
+#---------------------------------------------#
+# POOL WORKER                                 #
+#                                             #
+#---------------------------------------------#
+# Runs once per worker process: takes a free core slice, pins the process to
+# it and sizes torch's thread pools before any torch work
+def _init_worker(free_slices, packed_dir):
+    global _packed_dir
+    cores = free_slices.get()
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    torch.set_num_interop_threads(1)
+    torch.set_num_threads(len(cores))
+    _packed_dir = packed_dir
+
+
+def _dataset(sequence_length):
+    if sequence_length not in _datasets:
+        _datasets[sequence_length] = PackedLandmarkDataset(_packed_dir, sequence_length, label_map_path=None)
+    return _datasets[sequence_length]
+
+
+# Median and 90th percentile time (ms) of one full-window forward pass, the
+# work detection.py does per prediction in window mode
+def measure_latency(model, sequence_length, threads=1, runs=200, warmup=20):
+    model.eval()
+    x = torch.randn(1, sequence_length, model.lstm.input_size)
+    previous_threads = torch.get_num_threads()
+    torch.set_num_threads(threads)
+
+    times = []
+    with torch.no_grad():
+        for i in range(warmup + runs):
+            start = time.perf_counter()
+            model(x)
+            if i >= warmup:
+                times.append(time.perf_counter() - start)
+
+    torch.set_num_threads(previous_threads)
+    times = np.array(times) * 1000
+    return float(np.median(times)), float(np.percentile(times, 90))
+
+
+# One configuration: train with early stopping, keep the best weights in
+# out_dir/<name>.pth. Returns the result record, without latency.
+def run_config(task):
+    config, settings = task
+    name = config_name(config)
+    torch.manual_seed(settings["seed"])
+    start = time.perf_counter()
+
+    dataset = _dataset(config["sequence_length"])
+    train_idx, val_idx = split_indices(dataset.labels, settings["val_fraction"], settings["seed"])
+    # Pool workers are daemonic and cannot start DataLoader workers, batches are built in-process
+    augmenter = BatchAugmenter() if settings["augment"] else None
+    train_loader = make_train_loader(Subset(dataset, train_idx), batch_size=config["batch_size"],
+                                     augmenter=augmenter, num_workers=0)
+    val_loader = make_train_loader(Subset(dataset, val_idx), batch_size=256, num_workers=0, shuffle=False)
+
+    model = SignLSTM(input_size=dataset.num_features, hidden_size=config["hidden_size"],
+                     num_layers=config["num_layers"], num_classes=len(dataset.label_map))
+    optimizer = optim.Adam(model.parameters(), lr=config["lr"])
+    model_path = os.path.join(settings["out_dir"], name + ".pth")
+    progress = fit(model, optimizer, train_loader, val_loader, torch.device("cpu"), settings["epochs"],
+                   settings["patience"], output_path=model_path, verbose=False)
+    train_time = time.perf_counter() - start
+
+    record = dict(config)
+    record.update(
+        name=name,
+        val_accuracy=round(progress["best_acc"], 2),
+        val_loss=round(progress["best_loss"], 4),
+        best_epoch=progress["best_epoch"],
+        epochs=progress["epoch"],
+        params=sum(p.numel() for p in model.parameters()),
+        size_kb=round(os.path.getsize(model_path) / 1024, 1),
+        latency_ms=None,        # measured by measure_results once training is done
+        latency_p90_ms=None,
+        train_seconds=round(train_time, 1),
+        cores=sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else None,
+        model=model_path,
+    )
+    return record
+
+
+#---------------------------------------------#
+# PARETO TABLE                                #
+#                                             #
+#---------------------------------------------#
+# A result is Pareto-optimal when no other result is at least as accurate,
+# as fast and as small, and better in one of them
+def pareto_front(results):
+    def dominates(a, b):
+        at_least = (a["val_accuracy"] >= b["val_accuracy"] and a["latency_ms"] <= b["latency_ms"]
+                    and a["params"] <= b["params"])
+        better = (a["val_accuracy"] > b["val_accuracy"] or a["latency_ms"] < b["latency_ms"]
+                  or a["params"] < b["params"])
+        return at_least and better
+    return {r["name"] for r in results if not any(dominates(other, r) for other in results)}
+
+
+def format_table(results):
+    front = pareto_front(results)
+    lines = [f"{'':2}{'config':<28}{'val acc':>9}{'params':>9}{'size KB':>9}{'ms/win':>9}{'p90 ms':>9}"
+             f"{'epochs':>8}{'train s':>9}"]
+    for r in sorted(results, key=lambda r: (r["latency_ms"], -r["val_accuracy"])):
+        mark = "*" if r["name"] in front else ""
+        lines.append(f"{mark:<2}{r['name']:<28}{r['val_accuracy']:>8.2f}%{r['params']:>9}{r['size_kb']:>9.1f}"
+                     f"{r['latency_ms']:>9.3f}{r['latency_p90_ms']:>9.3f}{r['best_epoch']:>4}/{r['epochs']:<3}"
+                     f"{r['train_seconds']:>9.1f}")
+    lines.append("* Pareto-optimal (accuracy / latency / parameters)")
+    return "\n".join(lines)
+
+
+def load_results(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, "r") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def save_results(path, results):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        for record in results:
+            f.write(json.dumps(record) + "\n")
+    os.replace(tmp_path, path)
+
+
+# Serial pass over the saved models of the results without a latency yet
+def measure_results(results, num_classes, threads=1):
+    for record in results:
+        if record["latency_ms"] is not None:
+            continue
+        model = load_sign_lstm(record["model"], num_classes)
+        latency, latency_p90 = measure_latency(model, record["sequence_length"], threads)
+        record["latency_ms"] = round(latency, 3)
+        record["latency_p90_ms"] = round(latency_p90, 3)
+        print(f"[INFO] {record['name']}: {record['latency_ms']:.3f} ms per window")
+
+
+#---------------------------------------------#
+# MAIN                                        #
+#                                             #
+#---------------------------------------------#
+def main():
+    parser = argparse.ArgumentParser(description="Sweep SignLSTM hyperparameters and report accuracy / size / latency")
+    parser.add_argument("--data", default=None,
+                        help="packed dataset or landmark_data/ (default: landmark_data_packed/ if it exists)")
+    parser.add_argument("--out-dir", default="sweep/", help="models, results.jsonl and the packed data if needed")
+    parser.add_argument("--hidden-sizes", type=int, nargs="+", default=[16, 32, 64])
+    parser.add_argument("--num-layers", type=int, nargs="+", default=[1, 2])
+    parser.add_argument("--lrs", type=float, nargs="+", default=[0.001])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[16])
+    parser.add_argument("--seq-lengths", type=int, nargs="+", default=[SEQUENCE_LENGTH])
+    parser.add_argument("--epochs", type=int, default=50, help="maximum epochs per configuration")
+    parser.add_argument("--patience", type=int, default=5)
+    parser.add_argument("--val-fraction", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-augment", action="store_true")
+    parser.add_argument("--threads", type=int, default=1, help="cores per job")
+    parser.add_argument("--jobs", type=int, default=0, help="configurations trained at once (0 = cores / threads)")
+    parser.add_argument("--latency-threads", type=int, default=1, help="torch threads when measuring latency")
+    parser.add_argument("--min-accuracy", type=float, default=None,
+                        help="also print the fastest configuration with at least this validation accuracy (%%)")
+    args = parser.parse_args()
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    data_dir = args.data or ("landmark_data_packed/" if os.path.isdir("landmark_data_packed/") else "landmark_data/")
+    if os.path.isfile(os.path.join(data_dir, META_FILE)):
+        packed_dir = data_dir
+    else:
+        packed_dir = os.path.join(args.out_dir, "packed")
+        added = pack_dataset(data_dir, packed_dir)
+        print(f"[INFO] Packed {added} new clips from {data_dir} into {packed_dir}")
+    with open(os.path.join(args.out_dir, "label_map.json"), "w") as f:
+        json.dump(load_meta(packed_dir)["label_map"], f)
+
+    results_path = os.path.join(args.out_dir, RESULTS_FILE)
+    results = load_results(results_path)
+    done = {r["name"] for r in results}
+    configs = make_configs(args.hidden_sizes, args.num_layers, args.lrs, args.batch_sizes, args.seq_lengths)
+    todo = [c for c in configs if config_name(c) not in done]
+
+    num_cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    jobs = min(args.jobs or max(1, num_cores // args.threads), max(1, len(todo)))
+    print(f"[INFO] {len(todo)} configurations to train ({len(configs) - len(todo)} already done), "
+          f"{jobs} jobs x {args.threads} cores")
+    if todo and jobs * args.threads > num_cores:
+        print(f"[INFO] Warning: {jobs} jobs x {args.threads} cores is more than the {num_cores} cores available, "
+              f"jobs will share cores and train slower (lower --jobs or --threads)")
+
+    settings = {"out_dir": args.out_dir, "epochs": args.epochs, "patience": args.patience,
+                "val_fraction": args.val_fraction, "seed": args.seed, "augment": not args.no_augment}
+
+    if todo:
+        # Spawned, not forked: a fork would copy the parent's torch thread pools
+        context = multiprocessing.get_context("spawn")
+        free_slices = context.Queue()
+        for cores in core_slices(jobs, args.threads):
+            free_slices.put(cores)
+
+        with context.Pool(jobs, initializer=_init_worker, initargs=(free_slices, packed_dir)) as pool, \
+                open(results_path, "a") as out:
+            for record in pool.imap_unordered(run_config, [(c, settings) for c in todo]):
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+                results.append(record)
+                print(f"[INFO] {record['name']}: {record['val_accuracy']:.2f}%, {record['params']} params "
+                      f"({len(results)}/{len(configs)})")
+
+    # Nothing else is running now: the latencies are comparable with each other
+    measure_results(results, len(load_meta(packed_dir)["label_map"]), args.latency_threads)
+    save_results(results_path, results)
+
+    wanted = {config_name(c) for c in configs}
+    results = [r for r in results if r["name"] in wanted]
+    if not results:
+        print("[ERROR] No results")
+        return
+    print()
+    print(format_table(results))
+
+    if args.min_accuracy is not None:
+        accurate = [r for r in results if r["val_accuracy"] >= args.min_accuracy]
+        if not accurate:
+            print(f"[INFO] No configuration reaches {args.min_accuracy:.2f}% validation accuracy")
+        else:
+            best = min(accurate, key=lambda r: (r["latency_ms"], r["params"]))
+            print(f"[INFO] Fastest with >= {args.min_accuracy:.2f}%: {best['name']} ({best['model']}), "
+                  f"run detection with --model {best['model']} --seq-length {best['sequence_length']}")
+
+
+# Guard needed: the pool's spawned workers re-import this file
+if __name__ == "__main__":
+    main()
@@ -1,76 +1,238 @@
 import os
-import json
+import sys
+
+# Add project root to the system path so you can import training.*
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import argparse
 import torch
 import torch.nn as nn
 import torch.optim as optim
-from torch.utils.data import DataLoader
-from preprocessing import LandmarkDataset
+from training.preprocessing import LandmarkDataset
+from training.packed_dataset import PackedLandmarkDataset, META_FILE
+from training.model import SignLSTM
+from training.augmentation import BatchAugmenter, make_train_loader
+from hand_utils.features import MODEL_RATE, SEQUENCE_LENGTH
+
+AUGMENT = True
+NUM_WORKERS = min(4, os.cpu_count() or 1)  # DataLoader worker processes
+
 
 #---------------------------------------------#
-# Load dataset and extract label map          #
+# VALIDATION SPLIT                            #
+#                                             #
 #---------------------------------------------#
-dataset = LandmarkDataset("landmark_data/")
-label_map = dataset.label_map  # Access from dataset
-num_classes = len(label_map)
+# Stratified: val_fraction of every label is held out, so a small label is
+# never missing from validation. Seeded, the same split on every run.
+def split_indices(labels, val_fraction=0.2, seed=0):
+    generator = torch.Generator().manual_seed(seed)
+    train_idx, val_idx = [], []
+    for label in torch.unique(labels):
+        idx = torch.nonzero(labels == label).flatten()
+        idx = idx[torch.randperm(len(idx), generator=generator)]
+        num_val = int(round(len(idx) * val_fraction))
+        val_idx.extend(idx[:num_val].tolist())
+        train_idx.extend(idx[num_val:].tolist())
+    return sorted(train_idx), sorted(val_idx)
 
-train_loader = DataLoader(dataset, batch_size=16, shuffle=True)
 
 #---------------------------------------------#
-# Define LSTM model                           #
+# ONE PASS OVER A LOADER                      #
 #                                             #
 #---------------------------------------------#
-class SignLSTM(nn.Module):
-    def __init__(self, input_size=135, hidden_size=64, num_layers=2, num_classes=3):
-        super(SignLSTM, self).__init__()
-        self.lstm = nn.LSTM(input_size, hidden_size, num_layers, batch_first=True)
-        self.fc = nn.Linear(hidden_size, num_classes)
+# Loss and correct predictions are summed on the device and read once at the
+# end of the pass, a .item() per batch would wait for every batch to finish.
+# Returns (mean loss, accuracy in %).
+def run_epoch(model, loader, criterion, device, optimizer=None):
+    training = optimizer is not None
+    model.train(training)
+    total_loss = torch.zeros((), device=device)
+    correct = torch.zeros((), dtype=torch.long, device=device)
+    total = 0
+
+    with torch.set_grad_enabled(training):
+        for sequences, labels, lengths in loader:
+            sequences, labels = sequences.to(device, non_blocking=True), labels.to(device, non_blocking=True)
+
+            # Packed by length: no LSTM steps on the zero padding
+            outputs = model(sequences, lengths)
+            loss = criterion(outputs, labels)
+
+            if training:
+                optimizer.zero_grad()
+                loss.backward()
+                optimizer.step()
+
+            total_loss += loss.detach() * labels.size(0)
+            correct += (outputs.detach().argmax(dim=1) == labels).sum()
+            total += labels.size(0)
+
+    total = max(total, 1)
+    return total_loss.item() / total, 100 * correct.item() / total
 
-    def forward(self, x):
-        _, (hn, _) = self.lstm(x)
-        out = self.fc(hn[-1])
-        return out
 
 #---------------------------------------------#
-# Initialize                                  #
+# CHECKPOINTS                                 #
 #                                             #
 #---------------------------------------------#
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-model = SignLSTM(input_size=135, hidden_size=64, num_layers=2, num_classes=num_classes).to(device)
-criterion = nn.CrossEntropyLoss()
-optimizer = optim.Adam(model.parameters(), lr=0.001)
+# Written to a temporary file and renamed, a job killed mid-save keeps the
+# previous checkpoint
+def save_atomic(obj, path):
+    tmp_path = path + ".tmp"
+    torch.save(obj, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def new_progress():
+    return {"epoch": 0, "best_loss": float("inf"), "best_acc": 0.0, "best_epoch": 0, "bad_epochs": 0}
+
 
 #---------------------------------------------#
-# Training loop                               #
+# TRAIN WITH EARLY STOPPING                   #
 #                                             #
 #---------------------------------------------#
-epochs = 20
-for epoch in range(epochs):
-    model.train()
-    total_loss = 0
-    correct = 0
-    total = 0
+# Trains until `epochs`, or until the validation loss has not improved for
+# `patience` epochs. Every improvement saves the weights to output_path (a
+# plain state_dict, what load_sign_lstm reads). checkpoint_path gets model,
+# optimizer and progress after every epoch, plus `extra` (split, config), so
+# an interrupted job resumes where it stopped. Without a validation loader
+# the training loss decides. Returns the progress dict.
+def fit(model, optimizer, train_loader, val_loader, device, epochs=100, patience=10,
+        output_path=None, checkpoint_path=None, progress=None, extra=None, verbose=True):
+    criterion = nn.CrossEntropyLoss()
+    progress = progress or new_progress()
+
+    while progress["epoch"] < epochs and progress["bad_epochs"] < patience:
+        train_loss, train_acc = run_epoch(model, train_loader, criterion, device, optimizer)
+        if val_loader is not None:
+            val_loss, val_acc = run_epoch(model, val_loader, criterion, device)
+        else:
+            val_loss, val_acc = train_loss, train_acc
+        progress["epoch"] += 1
 
-    for sequences, labels in train_loader:
-        sequences, labels = sequences.to(device), labels.to(device)
+        improved = val_loss < progress["best_loss"]
+        if improved:
+            progress.update(best_loss=val_loss, best_acc=val_acc, best_epoch=progress["epoch"], bad_epochs=0)
+            if output_path is not None:
+                save_atomic(model.state_dict(), output_path)
+        else:
+            progress["bad_epochs"] += 1
 
-        outputs = model(sequences)
-        loss = criterion(outputs, labels)
+        if checkpoint_path is not None:
+            checkpoint = {"model": model.state_dict(), "optimizer": optimizer.state_dict(), "progress": progress}
+            checkpoint.update(extra or {})
+            save_atomic(checkpoint, checkpoint_path)
 
-        optimizer.zero_grad()
-        loss.backward()
-        optimizer.step()
+        if verbose:
+            print(f"Epoch [{progress['epoch']}/{epochs}], Loss: {train_loss:.4f}, Accuracy: {train_acc:.2f}%, "
+                  f"Val loss: {val_loss:.4f}, Val accuracy: {val_acc:.2f}%" + (" *" if improved else ""))
 
-        total_loss += loss.item()
-        _, predicted = torch.max(outputs.data, 1)
-        total += labels.size(0)
-        correct += (predicted == labels).sum().item()
+    if verbose and progress["bad_epochs"] >= patience:
+        print(f"[INFO] Early stop: no improvement in the last {patience} epochs")
+    return progress
 
-    acc = 100 * correct / total
-    print(f"Epoch [{epoch+1}/{epochs}], Loss: {total_loss:.4f}, Accuracy: {acc:.2f}%")
 
+def main():
 #---------------------------------------------#
-# Optional: Save model and label map          # 
+# Arguments                                   #
 #                                             #
 #---------------------------------------------#
-torch.save(model.state_dict(), "sign_lstm.pth")
-print("✅ Model saved to sign_lstm.pth")
+    parser = argparse.ArgumentParser(description="Train SignLSTM on the recorded landmark data")
+    parser.add_argument("--data", default=None, help="landmark_data/ or a packed dataset (default: landmark_data_packed/ if it exists)")
+    parser.add_argument("--epochs", type=int, default=100, help="maximum epochs")
+    parser.add_argument("--patience", type=int, default=10, help="stop after this many epochs without a better validation loss")
+    parser.add_argument("--hidden-size", type=int, default=64)
+    parser.add_argument("--num-layers", type=int, default=2)
+    parser.add_argument("--sequence-length", type=int, default=SEQUENCE_LENGTH, help="frames per clip the model sees")
+    parser.add_argument("--lr", type=float, default=0.001)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--val-fraction", type=float, default=0.2, help="clips of every label held out for validation (0 = none)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--threads", type=int, default=0, help="torch intra-op threads (0 = torch default)")
+    parser.add_argument("--interop-threads", type=int, default=0, help="torch inter-op threads (0 = torch default)")
+    parser.add_argument("--workers", type=int, default=NUM_WORKERS, help="DataLoader worker processes")
+    parser.add_argument("--output", default="sign_lstm.pth", help="best weights")
+    parser.add_argument("--checkpoint", default="sign_lstm_checkpoint.pt", help="resumable checkpoint, written every epoch")
+    parser.add_argument("--resume", action="store_true", help="continue from --checkpoint")
+    args = parser.parse_args()
+
+    # Before any torch work: the inter-op pool can only be sized once
+    if args.interop_threads:
+        torch.set_num_interop_threads(args.interop_threads)
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    torch.manual_seed(args.seed)
+
+#---------------------------------------------#
+# Load dataset and extract label map          #
+#---------------------------------------------#
+    data_dir = args.data or ("landmark_data_packed/" if os.path.isdir("landmark_data_packed/") else "landmark_data/")
+    # Use the packed dataset (training/packed_dataset.py) when it has been built
+    if os.path.isfile(os.path.join(data_dir, META_FILE)):
+        dataset = PackedLandmarkDataset(data_dir, args.sequence_length)
+        # Live inference resamples to MODEL_RATE, clips at another rate would
+        # teach the model a different window length in seconds
+        if dataset.rate is not None and abs(dataset.rate - MODEL_RATE) > 0.1 * MODEL_RATE:
+            print(f"[INFO] Warning: clips were captured at {dataset.rate:.1f} Hz, live inference runs at "
+                  f"MODEL_RATE = {MODEL_RATE:g} Hz (hand_utils/features.py)")
+    else:
+        dataset = LandmarkDataset(data_dir, args.sequence_length)
+    label_map = dataset.label_map  # Access from dataset
+    num_classes = len(label_map)
+
+    checkpoint = None
+    if args.resume:
+        checkpoint = torch.load(args.checkpoint, map_location="cpu", weights_only=False)
+        train_idx, val_idx = checkpoint["train_idx"], checkpoint["val_idx"]  # the split the run started with
+    else:
+        train_idx, val_idx = split_indices(dataset.labels, args.val_fraction, args.seed)
+    print(f"[INFO] {len(train_idx)} training clips, {len(val_idx)} validation clips")
+
+#---------------------------------------------#
+# Data pipeline                               #
+#                                             #
+#---------------------------------------------#
+    # Batches are built and augmented in worker processes (training/augmentation.py)
+    augmenter = BatchAugmenter() if AUGMENT else None
+    train_loader = make_train_loader(torch.utils.data.Subset(dataset, train_idx), batch_size=args.batch_size,
+                                     augmenter=augmenter, num_workers=args.workers)
+    # Validation clips as they are: no augmentation, fixed order
+    val_loader = None
+    if val_idx:
+        val_loader = make_train_loader(torch.utils.data.Subset(dataset, val_idx), batch_size=256,
+                                       num_workers=0, shuffle=False)
+
+#---------------------------------------------#
+# Initialize                                  #
+#                                             #
+#---------------------------------------------#
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    model = SignLSTM(input_size=135, hidden_size=args.hidden_size, num_layers=args.num_layers,
+                     num_classes=num_classes).to(device)
+    optimizer = optim.Adam(model.parameters(), lr=args.lr)
+
+    progress = None
+    if checkpoint is not None:
+        model.load_state_dict(checkpoint["model"])
+        optimizer.load_state_dict(checkpoint["optimizer"])
+        progress = checkpoint["progress"]
+        print(f"[INFO] Resuming after epoch {progress['epoch']} (best validation loss {progress['best_loss']:.4f})")
+
+#---------------------------------------------#
+# Training loop                               #
+#                                             #
+#---------------------------------------------#
+    progress = fit(model, optimizer, train_loader, val_loader, device, args.epochs, args.patience,
+                   output_path=args.output, checkpoint_path=args.checkpoint, progress=progress,
+                   extra={"train_idx": train_idx, "val_idx": val_idx, "label_map": label_map})
+
+    print(f"✅ Best model (epoch {progress['best_epoch']}, validation accuracy {progress['best_acc']:.2f}%) "
+          f"saved to {args.output}")
+
+
+# Guard needed: DataLoader workers re-import this file on macOS / Windows
+if __name__ == "__main__":
+    main()